@@ -1,24 +1,51 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_file 
+from flask import Flask, Request, Response, render_template, request, redirect, url_for, session, jsonify, send_file
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from flask_wtf.csrf import CSRFProtect
 from datetime import timedelta, datetime
 import os
+import hmac
 import json
 import traceback
 
-from backend.auth import authenticate, load_user, User
+from backend.auth import authenticate, users, login_throttle, AuthBusy
 from backend.forms import LoginForm
 from backend.models import (
-    load_applications, save_application,
-    load_vulnerabilities, save_vulnerability
+    save_application, get_application,
+    page_applications, page_vulnerabilities,
+    load_vulnerabilities, save_vulnerability,
+    load_applications, load_vulnerabilities_with_revision, append_vulnerabilities,
+    load_findings, apply_finding_op, measure_writes,
+    applications_summary, vulnerabilities_summary, search_findings, ConflictError,
+    APPLICATIONS_SCOPE, FINDINGS_SCOPE, APP_FINDINGS_SCOPE
+)
+from backend.findings import FindingNotFound, InvalidOperation
+from backend.search import KINDS as SEARCH_KINDS, DEFAULT_LIMIT as SEARCH_DEFAULT_LIMIT, MAX_LIMIT as SEARCH_MAX_LIMIT
+from backend.listing import (
+    InvalidQuery, APPLICATION_SORTS, VULNERABILITY_SORTS,
+    parse_sort, parse_limit, parse_fields, parse_float, project, encode_cursor, decode_cursor
 )
 from backend.utils import (
     generate_word_report, generate_excel_report,
-    log_action
+    log_action, BATCH_LAYOUTS
 )
+from backend.tasks import export_jobs, screenshot_jobs, JOB_DONE
+from backend.catalog import catalog as template_catalog
+from backend.profiling import ExportStats
+from backend.screenshots import screenshot_store, is_blob
+from backend.config import METRICS_TOKEN, SECRET_KEY
+from backend.response_cache import cached_json
+from backend import metrics
+
+class UploadRequest(Request):
+    """Uploaded files stream into the screenshot store, hashed as they arrive."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return screenshot_store.new_upload()
 
 app = Flask(__name__, template_folder="../templates", static_folder="../static")
-app.secret_key = os.urandom(24)
+app.request_class = UploadRequest
+metrics.instrument(app)
+app.secret_key = SECRET_KEY   # shared by every worker, so any of them accepts a session
 app.permanent_session_lifetime = timedelta(minutes=30)
 
 login_manager = LoginManager()
@@ -30,10 +57,24 @@ csrf = CSRFProtect(app)
 # ================= USER LOADER =====================
 @login_manager.user_loader
 def user_loader(user_id):
-    data = load_user(user_id)
-    if data:
-        return User(data['username'], data['password'])
-    return None
+    return users.get(user_id)
+
+# ================= OPTIMISTIC REVISIONS ============
+def _requested_revision(value):
+    """Revision echoed back by the client, or None when it did not send one."""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except TypeError:
+        raise ValueError(f"invalid revision {value!r}")
+
+def _conflict_response(e):
+    return jsonify({
+        "success": False,
+        "message": f"{e}. Reload to see the latest version.",
+        "revision": e.current_revision,
+    }), 409
 
 # ================= HOME ============================
 @app.route('/')
@@ -47,12 +88,24 @@ def login():
     if form.validate_on_submit():
         username = form.username.data
         password = form.password.data
-        if authenticate(username, password):
-            data = load_user(username)
-            user = User(data['username'], data['password'])
+        address = request.remote_addr
+        wait = login_throttle.retry_after(username, address)
+        if wait:
+            return render_template('login.html', form=form,
+                                   error=f"Too many failed logins. Try again in {wait // 60 + 1} minute(s)."), \
+                429, {"Retry-After": str(wait)}
+        try:
+            ok = authenticate(username, password)
+        except AuthBusy:
+            return render_template('login.html', form=form, error="Server busy, please try again."), \
+                503, {"Retry-After": "2"}
+        user = users.get(username) if ok else None
+        if user:
+            login_throttle.succeeded(username)
             login_user(user)
             session.permanent = True
             return redirect(url_for('dashboard'))
+        login_throttle.failed(username, address)
     return render_template('login.html', form=form)
 
 @app.route('/logout', methods=['POST'])
@@ -71,90 +124,79 @@ def dashboard():
 @app.route('/applications', methods=['GET'])
 @login_required
 def applications_page():
-    apps = load_applications()
-    return render_template('applications.html', applications=apps)
-
-@app.route('/api/applications', methods=['GET'])
-@login_required
-def get_applications_api():
-    apps = load_applications()
-    simplified = []
-    for app in apps:
-        simplified.append({
-            "id": app.get("id"),
-            "name": app.get("name"),
-            "status": app.get("status", "").lower(),
-            "start_date": app.get("start_date", ""),
-            "end_date": app.get("end_date", "")
-        })
-    return jsonify(simplified)
+    # Rows are fetched a page at a time from /api/applications
+    return render_template('applications.html')
 
-@app.route('/api/applications_summary', methods=['GET'])
-@login_required
-def applications_summary_api():
-    apps = load_applications()
+# ---- listing helpers ----
+# Both listings take ?sort=field (or -field), ?fields=a,b and filters. With
+# ?limit= or ?cursor= the response is {"items": [...], "next_cursor": ...};
+# pass next_cursor back as ?cursor= until it is null. Without them the
+# whole (filtered) list is returned as before.
 
-    total = len(apps)
-    completed = 0
-    in_progress = 0
+APPLICATION_LIST_FIELDS = ["id", "name", "status", "start_date", "end_date"]
 
-    # Always return Jan..Dec
-    monthly = [0] * 12
+def _paged_request():
+    return "limit" in request.args or "cursor" in request.args
 
-    def parse_date(app):
-        v = (app.get("start_date") or "").strip()
-        for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d"):
-            try:
-                return datetime.strptime(v, fmt)
-            except Exception:
-                pass
-        # optional fallback: file mtime of this app's json (comment out if not desired)
-        try:
-            app_id = app.get("id")
-            if app_id:
-                p = os.path.join("backend", "data", "applications", f"{app_id}.json")
-                if os.path.isfile(p):
-                    return datetime.fromtimestamp(os.path.getmtime(p))
-        except Exception:
-            pass
+def _date_arg(name):
+    value = request.args.get(name)
+    if not value:
         return None
-
-    for app in apps:
-        status = (app.get("status") or "").lower()
-        if status in ("completed",):
-            completed += 1
-        elif status in ("in-progress", "in progress", "inprogress"):
-            in_progress += 1
-
-        dt = parse_date(app)
-        if dt:
-            monthly[dt.month - 1] += 1
-
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise InvalidQuery(f"{name} must be YYYY-MM-DD")
+
+def _listing_args(sorts):
+    sort, descending = parse_sort(request.args.get("sort"), sorts)
+    after = decode_cursor(request.args.get("cursor"), sort, descending)
+    limit = parse_limit(request.args.get("limit")) if _paged_request() else None
+    return sort, descending, after, limit
+
+def _listing_response(items, next_key, sort, descending):
+    if not _paged_request():
+        return jsonify(items)
     return jsonify({
-        "total": total,
-        "completed": completed,
-        "in_progress": in_progress,
-        "monthly": monthly
+        "items": items,
+        "next_cursor": encode_cursor(sort, descending, next_key) if next_key is not None else None,
     })
 
+def _invalid_query(e):
+    return jsonify({"success": False, "message": str(e)}), 400
 
-    for app in apps:
-        summary["total"] += 1
-        status = (app.get("status") or "").lower()
-        if status == "completed":
-            summary["completed"] += 1
-        elif status == "in-progress":
-            summary["in_progress"] += 1
+# Read-only JSON APIs below are served through backend/response_cache.py:
+# the body is rebuilt only after a write to the data it depends on, and
+# clients revalidating with If-None-Match / If-Modified-Since get a 304.
 
-        try:
-            date_obj = datetime.strptime(app.get("start_date", ""), "%Y-%m-%d")
-            month_name = date_obj.strftime("%b")
-            if month_name in summary["monthly"]:
-                summary["monthly"][month_name] += 1
-        except:
-            pass
+@app.route('/api/applications', methods=['GET'])
+@login_required
+@cached_json(APPLICATIONS_SCOPE)
+def get_applications_api():
+    """?status=&start_from=&start_to=&sort=name|start_date|status|id&fields=&limit=&cursor="""
+    try:
+        sort, descending, after, limit = _listing_args(APPLICATION_SORTS)
+        apps, next_key = page_applications(
+            status=(request.args.get("status") or "").strip().lower() or None,
+            start_from=_date_arg("start_from"), start_to=_date_arg("start_to"),
+            sort=sort, descending=descending, after=after, limit=limit,
+        )
+    except InvalidQuery as e:
+        return _invalid_query(e)
+    fields = parse_fields(request.args.get("fields")) or APPLICATION_LIST_FIELDS
+    items = []
+    for app in apps:
+        item = project(app, fields)
+        if "status" in item:
+            item["status"] = (item["status"] or "").lower()
+        items.append(item)
+    return _listing_response(items, next_key, sort, descending)
 
-    return jsonify(summary)
+@app.route('/api/applications_summary', methods=['GET'])
+@login_required
+@cached_json(APPLICATIONS_SCOPE)
+def applications_summary_api():
+    # Always Jan..Dec; maintained incrementally by the models layer
+    return jsonify(applications_summary())
 
 @app.route('/api/applications/<app_id>/status', methods=['POST'])
 @login_required
@@ -178,15 +220,21 @@ def update_status_only(app_id):
 
         final_status = valid_statuses[new_status_input]
 
-        applications = load_applications()
-        for i, app in enumerate(applications):
-            if app.get("id") == app_id:
-                applications[i]["status"] = final_status
-                save_application(applications[i])
-                log_action(f"Updated status of {app_id} to {final_status}")
-                return jsonify({"success": True})
+        app = get_application(app_id)
+        if not app:
+            return jsonify({"success": False, "message": "Application not found"}), 404
 
-        return jsonify({"success": False, "message": "Application not found"}), 404
+        try:
+            expected_revision = _requested_revision(data.get("revision"))
+        except ValueError:
+            return jsonify({"success": False, "message": "revision must be an integer"}), 400
+
+        app["status"] = final_status
+        revision = save_application(app, expected_revision=expected_revision)
+        log_action(f"Updated status of {app_id} to {final_status}")
+        return jsonify({"success": True, "revision": revision})
+    except ConflictError as e:
+        return _conflict_response(e)
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
@@ -219,8 +267,7 @@ def add_application():
 @app.route('/applications/<app_id>/edit', methods=['GET'])
 @login_required
 def edit_application_page(app_id):
-    applications = load_applications()
-    app_data = next((a for a in applications if a["id"] == app_id), None)
+    app_data = get_application(app_id)
     if not app_data:
         return "Application not found", 404
     return render_template('edit_application.html', application=app_data)
@@ -233,25 +280,30 @@ def update_application(app_id):
         if not data:
             return jsonify({"success": False, "message": "Empty request body"}), 400
 
-        applications = load_applications()
-        for i, app in enumerate(applications):
-            if app.get("id") == app_id:
-                applications[i]["name"] = data.get("name", app.get("name", ""))
-                applications[i]["start_date"] = data.get("start_date", app.get("start_date", ""))
-                applications[i]["end_date"] = data.get("end_date", app.get("end_date", ""))
-                applications[i]["status"] = data.get("status", app.get("status", ""))
-                applications[i]["app_details"] = data.get("app_details", app.get("app_details", []))
-                applications[i]["pentesters"] = data.get("pentesters", app.get("pentesters", []))
-                applications[i]["test_credentials"] = data.get("test_credentials", app.get("test_credentials", []))
-
-                save_application(applications[i])
-                log_action(f"Application updated: {app_id}")
-                return jsonify({"success": True})
-
-        return jsonify({"success": False, "message": "Application not found"}), 404
-
+        try:
+            expected_revision = _requested_revision(data.get("revision"))
+        except ValueError:
+            return jsonify({"success": False, "message": "revision must be an integer"}), 400
+
+        app = get_application(app_id)
+        if not app:
+            return jsonify({"success": False, "message": "Application not found"}), 404
+
+        app["name"] = data.get("name", app.get("name", ""))
+        app["start_date"] = data.get("start_date", app.get("start_date", ""))
+        app["end_date"] = data.get("end_date", app.get("end_date", ""))
+        app["status"] = data.get("status", app.get("status", ""))
+        app["app_details"] = data.get("app_details", app.get("app_details", []))
+        app["pentesters"] = data.get("pentesters", app.get("pentesters", []))
+        app["test_credentials"] = data.get("test_credentials", app.get("test_credentials", []))
+
+        revision = save_application(app, expected_revision=expected_revision)
+        log_action(f"Application updated: {app_id}")
+        return jsonify({"success": True, "revision": revision})
+
+    except ConflictError as e:
+        return _conflict_response(e)
     except Exception as e:
-        import traceback
         traceback.print_exc()
         return jsonify({"success": False, "message": f"Server error: {str(e)}"}), 500
 
@@ -262,68 +314,86 @@ def update_application(app_id):
 def add_vulnerability_page(app_id):
     return render_template('add_vulnerability.html', app_id=app_id)
 
-from werkzeug.utils import secure_filename
 from backend.models import save_vulnerabilities, load_vulnerabilities
-from backend.utils import log_action
+from backend.utils import log_action, screenshot_thumbnail_path, THUMBNAIL_FORMAT
 
-SCREENSHOT_UPLOAD_DIR = os.path.join(os.path.dirname(__file__), '..', 'static', 'screenshots')
-os.makedirs(SCREENSHOT_UPLOAD_DIR, exist_ok=True)
+def _store_screenshot(file):
+    """Store an uploaded screenshot; its thumbnail and export rendition are built in the background."""
+    name = screenshot_store.ingest(file)
+    screenshot_jobs.submit(name)
+    return name
+
+@app.route('/screenshots/<name>/thumbnail', methods=['GET'])
+@login_required
+def screenshot_thumbnail(name):
+    path = screenshot_thumbnail_path(name) if is_blob(name) else None
+    if path is None:
+        # Not built yet (or a legacy upload): show the original meanwhile
+        screenshot_jobs.submit(name)
+        return redirect(url_for('static', filename=f'screenshots/{name}'))
+    # Content-addressed, so the preview for a name never changes
+    return send_file(path, mimetype=f"image/{THUMBNAIL_FORMAT.lower()}", max_age=365 * 24 * 3600)
 
 @app.route('/add_vulnerability', methods=['POST'])
 @login_required
 def add_vulnerability():
-    # ========== DEBUGGING SECTION ==========
-    print("\n==== /add_vulnerability submission ====")
-    print("Form keys:", list(request.form.keys()))
-    print("File keys:", list(request.files.keys()))
-    # =======================================
-
     if 'vulnerabilities' not in request.form or 'application_id' not in request.form:
-        print("Missing required data in request.form")
         return jsonify({"success": False, "message": "Missing required data"}), 400
 
     try:
         app_id = request.form['application_id']
         vuln_data = json.loads(request.form['vulnerabilities'])
     except Exception as e:
-        print("Failed to parse vulnerabilities or application_id:", e)
         return jsonify({"success": False, "message": "Invalid payload", "error": str(e)}), 400
 
-    # Load previously saved vulnerabilities for the app
-    existing = load_vulnerabilities(app_id)
-
+    new_vulns = []
     for v_idx, vuln in enumerate(vuln_data):
         for s_idx, step in enumerate(vuln.get("steps", [])):
             screenshot_filename = step.get("screenshot")
-            print(f"Vuln {v_idx} Step {s_idx} expects screenshot field: '{screenshot_filename}'")
             if screenshot_filename:
                 if screenshot_filename in request.files:
                     file = request.files[screenshot_filename]
-                    safe_name = secure_filename(screenshot_filename)
-                    save_path = os.path.join(SCREENSHOT_UPLOAD_DIR, safe_name)
                     try:
-                        file.save(save_path)
-                        print(f"Saved screenshot: {safe_name} -> {save_path}")
+                        step["screenshot"] = _store_screenshot(file)
                     except Exception as file_save_exc:
-                        print(f"ERROR: Could not save {safe_name}: {file_save_exc}")
+                        app.logger.warning("Could not store screenshot %r (finding %d, step %d): %s",
+                                           screenshot_filename, v_idx, s_idx, file_save_exc)
                         step["screenshot"] = ""  # Mark as missing if failed to save
                 else:
-                    print(f"WARNING: Screenshot '{screenshot_filename}' not found in uploaded files ({list(request.files.keys())})")
+                    app.logger.warning("Screenshot %r for finding %d, step %d was not uploaded",
+                                       screenshot_filename, v_idx, s_idx)
                     step["screenshot"] = ""  # No file found, clear to avoid JSON/file mismatch
 
-        existing.append(vuln)
+        new_vulns.append(vuln)
 
-    # Save all vulnerabilities back
-    save_vulnerabilities(app_id, existing)
+    # Append under the app lock so findings added concurrently are not lost
+    append_vulnerabilities(app_id, new_vulns)
     log_action(f"Vulnerabilities added for app {app_id}")
-    print("==== /add_vulnerability done ====")
     return jsonify({"success": True})
 
 @app.route('/applications/<app_id>/vulnerabilities', methods=['GET'])
 @login_required
+@cached_json(APP_FINDINGS_SCOPE)
 def get_vulnerabilities(app_id):
-    vulns = load_vulnerabilities(app_id)
-    return jsonify(vulns)
+    """?severity=high,critical&cvss_min=&cvss_max=&sort=position|cvss|severity|title&fields=&limit=&cursor="""
+    if not request.args:
+        revision, vulns = load_vulnerabilities_with_revision(app_id)
+        response = jsonify(vulns)
+        response.headers["X-Revision"] = str(revision)
+        return response
+    try:
+        sort, descending, after, limit = _listing_args(VULNERABILITY_SORTS)
+        severities = {s.strip().lower() for s in (request.args.get("severity") or "").split(",") if s.strip()}
+        vulns, next_key = page_vulnerabilities(
+            app_id, severities=severities or None,
+            cvss_min=parse_float(request.args.get("cvss_min"), "cvss_min"),
+            cvss_max=parse_float(request.args.get("cvss_max"), "cvss_max"),
+            sort=sort, descending=descending, after=after, limit=limit,
+        )
+    except InvalidQuery as e:
+        return _invalid_query(e)
+    fields = parse_fields(request.args.get("fields"))
+    return _listing_response([project(v, fields) for v in vulns], next_key, sort, descending)
 
 # ======== REPLACE ONLY THIS ROUTE IN app.py =========
 @app.route('/applications/<app_id>/vulnerabilities/update', methods=['POST'])
@@ -351,7 +421,12 @@ def update_vulnerabilities_route(app_id):
         if not isinstance(payload, list):
             return jsonify({"success": False, "message": "Payload must be a JSON array."}), 400
 
-        # 2) For each step, if a file with that key exists in request.files, save it
+        try:
+            expected_revision = _requested_revision(request.form.get('revision', request.args.get('revision')))
+        except ValueError:
+            return jsonify({"success": False, "message": "revision must be an integer"}), 400
+
+        # 2) For each step, if a file with that key exists in request.files, store it
         saved_any = False
         for v in payload:
             steps = v.get("steps", [])
@@ -365,12 +440,8 @@ def update_vulnerabilities_route(app_id):
                     f = request.files[name]
                     if not f or not getattr(f, "filename", ""):
                         continue
-                    safe = secure_filename(name)  # preserves your generated key pattern
-                    out_path = os.path.join(SCREENSHOT_UPLOAD_DIR, safe)
-                    os.makedirs(SCREENSHOT_UPLOAD_DIR, exist_ok=True)
-                    f.save(out_path)
-                    # store just the filename (your UI links to /static/screenshots/<filename>)
-                    s["screenshot"] = safe
+                    # store just the blob name (your UI links to /static/screenshots/<name>)
+                    s["screenshot"] = _store_screenshot(f)
                     saved_any = True
                 else:
                     # If no file uploaded under that key, leave the existing value as-is
@@ -378,10 +449,14 @@ def update_vulnerabilities_route(app_id):
                     pass
 
         # 3) Save entire list back to JSON
-        save_vulnerabilities(app_id, payload)
+        with measure_writes() as written:
+            revision = save_vulnerabilities(app_id, payload, expected_revision=expected_revision)
         log_action(f"Vulnerabilities updated for app {app_id}. files_saved={saved_any}")
-        return jsonify({"success": True, "count": len(payload)})
+        return jsonify({"success": True, "count": len(payload), "revision": revision,
+                        "bytes_written": written["bytes"]})
 
+    except ConflictError as e:
+        return _conflict_response(e)
     except Exception as e:
         traceback.print_exc()
         return jsonify({"success": False, "message": str(e)}), 500
@@ -389,98 +464,343 @@ def update_vulnerabilities_route(app_id):
 
 # ======== END FIX =======================================
 
+# ========== FINDING API =============================
+# Granular edits of single findings and steps by their stable uid. Only the
+# change is stored; every response reports the bytes it wrote. Send
+# "If-Match: <revision>" to reject the edit if the list changed meanwhile.
+
+def _run_finding_op(app_id, op, status=200):
+    if not get_application(app_id):
+        return jsonify({"success": False, "message": "Application not found"}), 404
+    try:
+        expected_revision = _requested_revision(request.headers.get("If-Match", "").strip('"'))
+    except ValueError:
+        return jsonify({"success": False, "message": "If-Match must be a revision number"}), 400
+    try:
+        with measure_writes() as written:
+            revision, finding = apply_finding_op(app_id, op, expected_revision)
+    except ConflictError as e:
+        return _conflict_response(e)
+    except FindingNotFound as e:
+        return jsonify({"success": False, "message": str(e)}), 404
+    except InvalidOperation as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    log_action(f"Finding {op['op']} for app {app_id} ({written['bytes']} bytes written)")
+    return jsonify({"success": True, "revision": revision, "finding": finding,
+                    "bytes_written": written["bytes"]}), status
+
+def _json_body():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise InvalidOperation("Request body must be a JSON object")
+    return data
+
+def _position_arg():
+    value = request.args.get("position")
+    try:
+        return int(value) if value not in (None, "") else None
+    except ValueError:
+        raise InvalidOperation("position must be an integer")
+
+def _step_body():
+    """A step as JSON, or multipart with a 'step' JSON field and an optional 'screenshot' file."""
+    if request.files or request.form:
+        try:
+            step = json.loads(request.form.get("step") or "{}")
+        except ValueError:
+            raise InvalidOperation("step must be JSON")
+        if not isinstance(step, dict):
+            raise InvalidOperation("step must be a JSON object")
+        f = request.files.get("screenshot")
+        if f and f.filename:
+            step["screenshot"] = _store_screenshot(f)
+        return step
+    return _json_body()
+
+@app.route('/api/applications/<app_id>/findings', methods=['GET'])
+@login_required
+def list_findings(app_id):
+    revision, findings = load_findings(app_id)
+    return jsonify({"revision": revision, "findings": findings})
+
+@app.route('/api/applications/<app_id>/findings/<uid>', methods=['GET'])
+@login_required
+def get_finding(app_id, uid):
+    revision, findings = load_findings(app_id)
+    for finding in findings:
+        if finding.get("uid") == uid:
+            return jsonify({"revision": revision, "finding": finding})
+    return jsonify({"success": False, "message": f"Finding {uid} not found"}), 404
+
+@app.route('/api/applications/<app_id>/findings', methods=['POST'])
+@login_required
+def create_finding(app_id):
+    try:
+        op = {"op": "add", "finding": _json_body(), "position": _position_arg()}
+    except InvalidOperation as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return _run_finding_op(app_id, op, 201)
+
+@app.route('/api/applications/<app_id>/findings/order', methods=['PUT'])
+@login_required
+def reorder_findings(app_id):
+    try:
+        op = {"op": "order", "uids": _json_body().get("order")}
+    except InvalidOperation as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return _run_finding_op(app_id, op)
+
+@app.route('/api/applications/<app_id>/findings/<uid>', methods=['PATCH'])
+@login_required
+def patch_finding(app_id, uid):
+    try:
+        op = {"op": "patch", "uid": uid, "fields": _json_body()}
+    except InvalidOperation as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return _run_finding_op(app_id, op)
+
+@app.route('/api/applications/<app_id>/findings/<uid>', methods=['DELETE'])
+@login_required
+def delete_finding(app_id, uid):
+    return _run_finding_op(app_id, {"op": "delete", "uid": uid})
+
+@app.route('/api/applications/<app_id>/findings/<uid>/steps', methods=['POST'])
+@login_required
+def create_step(app_id, uid):
+    try:
+        op = {"op": "add_step", "uid": uid, "step": _step_body(), "position": _position_arg()}
+    except InvalidOperation as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return _run_finding_op(app_id, op, 201)
+
+@app.route('/api/applications/<app_id>/findings/<uid>/steps/order', methods=['PUT'])
+@login_required
+def reorder_steps(app_id, uid):
+    try:
+        op = {"op": "order_steps", "uid": uid, "step_uids": _json_body().get("order")}
+    except InvalidOperation as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return _run_finding_op(app_id, op)
+
+@app.route('/api/applications/<app_id>/findings/<uid>/steps/<step_uid>', methods=['PATCH'])
+@login_required
+def patch_step(app_id, uid, step_uid):
+    try:
+        op = {"op": "patch_step", "uid": uid, "step_uid": step_uid, "fields": _step_body()}
+    except InvalidOperation as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return _run_finding_op(app_id, op)
+
+@app.route('/api/applications/<app_id>/findings/<uid>/steps/<step_uid>', methods=['DELETE'])
+@login_required
+def delete_step(app_id, uid, step_uid):
+    return _run_finding_op(app_id, {"op": "delete_step", "uid": uid, "step_uid": step_uid})
+
 @app.route('/vulnerabilities_summary', methods=['GET'])
 @login_required
 def vulnerabilities_summary_page():
-    summary = {"total": 0, "info": 0, "low": 0, "medium": 0, "high": 0, "critical": 0}
-    apps = load_applications()
-    for app in apps:
-        vulns = load_vulnerabilities(app["id"])
-        for v in vulns:
-            sev = (v.get("severity") or '').lower()
-            summary["total"] += 1
-            if sev in summary:
-                summary[sev] += 1
-    return render_template("vulnerabilities_summary.html", summary=summary)
+    return render_template("vulnerabilities_summary.html", summary=vulnerabilities_summary())
 
 @app.route('/api/vulnerabilities_summary', methods=['GET'])
 @login_required
+@cached_json(FINDINGS_SCOPE)
 def vulnerabilities_summary_api():
-    summary = {"total": 0, "info": 0, "low": 0, "medium": 0, "high": 0, "critical": 0}
-    apps = load_applications()
-    for app in apps:
-        vulns = load_vulnerabilities(app["id"])
-        for v in vulns:
-            sev = (v.get("severity") or '').lower()
-            summary["total"] += 1
-            if sev in summary:
-                summary[sev] += 1
-    return jsonify(summary)
+    return jsonify(vulnerabilities_summary())
+
+# ========== VULNERABILITY TEMPLATES =================
+# Served from backend/catalog.py: bodies are pre-serialized and pre-compressed,
+# and the browser revalidates with If-None-Match, so a repeat load is a 304.
+
+def _catalog_response(body):
+    data, encoding, etag = body.variant(request.headers.get("Accept-Encoding"))
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(data, mimetype="application/json")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
 
 @app.route('/vulnerability_templates', methods=['GET'])
 @login_required
 def get_templates():
+    """The whole catalogue (prefer the index plus single templates)."""
+    return _catalog_response(template_catalog.full())
+
+@app.route('/vulnerability_templates/index', methods=['GET'])
+@login_required
+def get_templates_index():
+    """[{index, id, title, severity}] for pickers."""
+    return _catalog_response(template_catalog.index())
+
+@app.route('/vulnerability_templates/<int:n>', methods=['GET'])
+@login_required
+def get_template(n):
+    body = template_catalog.template(n)
+    if body is None:
+        return jsonify({"success": False, "message": f"Template {n} not found"}), 404
+    return _catalog_response(body)
+
+# ========== SEARCH ==================================
+@app.route('/api/search', methods=['GET'])
+@login_required
+def search_api():
+    """?q=words&kind=finding|template&app_id=&severity=high,critical&limit=20"""
+    q = (request.args.get("q") or "").strip()
+    kind = (request.args.get("kind") or "").strip().lower() or None
+    if kind and kind not in SEARCH_KINDS:
+        return jsonify({"success": False, "message": f"kind must be one of {', '.join(SEARCH_KINDS)}"}), 400
     try:
-        with open("backend/data/templates/vuln_templates.json") as f:
-            return jsonify(json.load(f))
-    except Exception:
-        return jsonify([])
+        limit = int(request.args.get("limit") or SEARCH_DEFAULT_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "message": "limit must be an integer"}), 400
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    severities = {s.strip().lower() for s in (request.args.get("severity") or "").split(",") if s.strip()}
+
+    results = search_findings(q, kind=kind, app_id=request.args.get("app_id") or None,
+                              severities=severities or None, limit=limit)
+    names = {}
+    for hit in results:
+        if hit["app_id"] and hit["app_id"] not in names:
+            app_data = get_application(hit["app_id"])
+            names[hit["app_id"]] = app_data.get("name") if app_data else None
+        hit["app_name"] = names.get(hit["app_id"])
+    return jsonify({"query": q, "results": results})
 
 @app.route("/edit_vulnerabilities/<app_id>")
 @login_required
 def edit_vulnerabilities(app_id):
-    app_file = os.path.join("backend", "data", "applications", f"{app_id}.json")
-    vuln_file = os.path.join("backend", "data", "vulnerabilities", f"{app_id}.json")
-
-    if not os.path.exists(app_file):
-        print("App file not found:", app_file)
+    app_data = get_application(app_id)
+    if not app_data:
         return render_template("404.html"), 404
 
-    with open(app_file) as f:
-        app_data = json.load(f)
+    # The revision goes into the form so a concurrent edit is rejected on save
+    revision, vulns = load_vulnerabilities_with_revision(app_id)
 
-    if os.path.exists(vuln_file):
-        with open(vuln_file) as f:
-            try:
-                vulns = json.load(f)
-                print(f"Loaded {len(vulns)} vulnerabilities for app {app_id}: {vulns}")
-            except Exception as e:
-                print(f"Error loading vulnerabilities JSON: {e}")
-                vulns = []
-    else:
-        print("Vulnerability file not found:", vuln_file)
-        vulns = []
+    return render_template("edit_vulnerabilities.html", app=app_data, app_id=app_id,
+                           vulnerabilities=vulns, revision=revision)
 
-    return render_template("edit_vulnerabilities.html", app=app_data, app_id=app_id, vulnerabilities=vulns)
 
 
+# ========== METRICS =================================
+# Prometheus text format. With H4_METRICS_TOKEN set, scrapers authenticate
+# with "Authorization: Bearer <token>"; otherwise a logged-in session is needed.
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    if METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            return Response("Unauthorized\n", 401, {"WWW-Authenticate": "Bearer"}, mimetype="text/plain")
+    elif not current_user.is_authenticated and not app.config.get("LOGIN_DISABLED"):
+        return login_manager.unauthorized()
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 # ========== EXPORT ROUTES ===========================
-@app.route('/export/word/<app_id>', methods=['GET'])
-@login_required
-def export_word(app_id):
+# ?stats=1 adds the export's per-stage timings and counters to the response;
+# ?profile=1 also runs that one export under cProfile (dumped to exports/profiles).
+
+def _flag(name):
+    return (request.args.get(name) or "").lower() in ("1", "true", "yes")
+
+def _export_response(label, generate, app_id):
+    profile = _flag("profile")
+    stats = ExportStats(label.lower(), app_id)
     try:
-        path = generate_word_report(app_id)
+        path = generate(app_id, stats=stats, profile=profile)
         if path:
-            return jsonify({"message": "Word report generated", "path": path})
+            payload = {"message": f"{label} report generated", "path": path}
+            status = 200
         else:
-            return jsonify({"message": "Failed to generate Word report"}), 500
+            payload = {"message": f"Failed to generate {label} report"}
+            status = 500
     except Exception as e:
         traceback.print_exc()
-        return jsonify({"message": f"Export failed: {str(e)}"}), 500
+        payload = {"message": f"Export failed: {str(e)}"}
+        status = 500
+    if profile or _flag("stats"):
+        payload["stats"] = stats.report()
+    return jsonify(payload), status
+
+@app.route('/export/word/<app_id>', methods=['GET'])
+@login_required
+def export_word(app_id):
+    return _export_response("Word", generate_word_report, app_id)
 
 @app.route('/export/excel/<app_id>', methods=['GET'])
 @login_required
 def export_excel(app_id):
-    try:
-        path = generate_excel_report(app_id)
-        if path:
-            return jsonify({"message": "Excel report generated", "path": path})
-        else:
-            return jsonify({"message": "Failed to generate Excel report"}), 500
-    except Exception as e:
-        traceback.print_exc()
-        return jsonify({"message": f"Export failed: {str(e)}"}), 500
+    return _export_response("Excel", generate_excel_report, app_id)
+
+@app.route('/export/<kind>/<app_id>/jobs', methods=['POST'])
+@login_required
+def start_export_job(kind, app_id):
+    if kind not in ("word", "excel"):
+        return jsonify({"message": f"Unknown export type: {kind}"}), 404
+    job = export_jobs.submit(kind, app_id, {"profile": True} if _flag("profile") else None)
+    return jsonify(_export_job_payload(job)), 202
+
+@app.route('/export/batch', methods=['POST'])
+@login_required
+def start_batch_export_job():
+    """
+    JSON body: {"app_ids": [...]} and/or {"status": "...", "start_from": "YYYY-MM-DD",
+    "start_to": "YYYY-MM-DD"}, plus "layout" ("per_app" | "consolidated") and "word" (bool).
+    """
+    data = request.get_json(silent=True) or {}
+    app_ids = data.get("app_ids") or None
+    if app_ids is not None and not (isinstance(app_ids, list) and all(isinstance(a, str) for a in app_ids)):
+        return jsonify({"message": "app_ids must be a list of application ids"}), 400
+    layout = data.get("layout", "per_app")
+    if layout not in BATCH_LAYOUTS:
+        return jsonify({"message": f"layout must be one of {', '.join(BATCH_LAYOUTS)}"}), 400
+    for key in ("start_from", "start_to"):
+        if data.get(key):
+            try:
+                datetime.strptime(data[key], "%Y-%m-%d")
+            except (TypeError, ValueError):
+                return jsonify({"message": f"{key} must be YYYY-MM-DD"}), 400
+    options = {
+        "app_ids": app_ids,
+        "status": (data.get("status") or "").strip().lower() or None,
+        "start_from": data.get("start_from") or None,
+        "start_to": data.get("start_to") or None,
+        "layout": layout,
+        "word": bool(data.get("word")),
+    }
+    job = export_jobs.submit_batch(options)
+    log_action(f"Batch export requested: {options}")
+    return jsonify(_export_job_payload(job)), 202
+
+@app.route('/export/jobs/<job_id>', methods=['GET'])
+@login_required
+def export_job_status(job_id):
+    job = export_jobs.get(job_id)
+    if not job:
+        return jsonify({"message": "Export job not found"}), 404
+    return jsonify(_export_job_payload(job))
+
+@app.route('/export/jobs/<job_id>/download', methods=['GET'])
+@login_required
+def download_export_job(job_id):
+    job = export_jobs.get(job_id)
+    if not job or job["state"] != JOB_DONE or not job.get("path") or not os.path.exists(job["path"]):
+        return render_template("404.html"), 404
+    return send_file(job["path"], as_attachment=True)
+
+def _export_job_payload(job):
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "app_id": job["app_id"],
+        "state": job["state"],
+        "error": job.get("error"),
+        "status_url": url_for('export_job_status', job_id=job["id"]),
+        "download_url": url_for('download_export_job', job_id=job["id"]) if job["state"] == JOB_DONE else None,
+        **({"stats": job.get("stats")} if _flag("stats") else {}),
+    }
 
 @app.route('/exports/word_reports/<filename>')
 @login_required
@@ -495,6 +815,20 @@ def download_word_report(filename):
 def not_found(e):
     return render_template('404.html'), 404
 
+# ========== PRODUCTION SERVER =======================
+def warm_up():
+    """
+    Parse the data, summary, template catalogue and page templates once.
+    wsgi.py calls this so a preloading server (gunicorn preload_app) does
+    the work in the master and every forked worker starts warm.
+    """
+    load_applications()
+    applications_summary()
+    vulnerabilities_summary()
+    template_catalog.full()
+    for name in app.jinja_loader.list_templates():
+        app.jinja_env.get_template(name)
+
 # ========== MAIN ====================================
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,83 @@
+import os
+import time
+import shutil
+import threading
+
+from backend import metrics
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), '..', 'exports', 'artifacts')
+ARTIFACT_MAX_BYTES = 2 * 1024 * 1024 * 1024   # total size bound for stored reports
+ARTIFACT_MAX_AGE_S = 30 * 24 * 3600           # drop artifacts unused for this long
+
+class ArtifactStore:
+    """
+    Finished export files keyed by the fingerprint of their inputs.
+
+    A file's mtime records when it was last produced or served, which drives
+    both the age limit and least-recently-used eviction past max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=ARTIFACT_MAX_BYTES, max_age=ARTIFACT_MAX_AGE_S):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, fingerprint, ext):
+        return os.path.join(self.directory, f"{fingerprint}{ext}")
+
+    def fetch(self, fingerprint, ext, output_path):
+        """Copy a stored artifact to output_path; returns output_path or None on a miss."""
+        src = self._path(fingerprint, ext)
+        try:
+            os.utime(src)
+        except FileNotFoundError:
+            metrics.count_cache("export_artifacts", misses=1)
+            return None
+        tmp = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(src, tmp)
+        except FileNotFoundError:
+            metrics.count_cache("export_artifacts", misses=1)
+            return None   # evicted between utime and copy
+        os.replace(tmp, output_path)
+        metrics.count_cache("export_artifacts", hits=1)
+        return output_path
+
+    def store(self, fingerprint, ext, produced_path):
+        dst = self._path(fingerprint, ext)
+        tmp = f"{dst}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(produced_path, tmp)
+        os.replace(tmp, dst)
+        self.evict()
+        return dst
+
+    def evict(self):
+        cutoff = time.time() - self.max_age
+        with self._lock:
+            entries, total = [], 0
+            with os.scandir(self.directory) as it:
+                for e in it:
+                    if not e.is_file() or e.name.endswith('.tmp'):
+                        continue
+                    st = e.stat()
+                    if st.st_mtime < cutoff:
+                        self._remove(e.path)
+                        continue
+                    entries.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+artifact_store = ArtifactStore(ARTIFACT_DIR)
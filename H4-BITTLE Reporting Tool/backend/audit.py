@@ -0,0 +1,228 @@
+import os
+import glob
+import json
+import atexit
+import logging
+import threading
+from collections import deque
+
+from backend.config import DATA_DIR
+
+log = logging.getLogger(__name__)
+
+AUDIT_DIR = os.path.join(DATA_DIR, 'audit')
+LEGACY_LOG_FILE = os.path.join(DATA_DIR, 'audit_logs.json')
+
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024   # rotate to a new segment past this size
+FLUSH_MAX_ENTRIES = 64                # flush as soon as this many entries are buffered
+FLUSH_INTERVAL_S = 2.0                # ...or at least this often
+
+def _segment_name(n):
+    return f"{SEGMENT_PREFIX}{n:06d}{SEGMENT_SUFFIX}"
+
+def _segment_number(name):
+    if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+        return None
+    try:
+        return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+    except ValueError:
+        return None
+
+class AuditLog:
+    """
+    Append-only JSON Lines audit log split into size-rotated segments.
+
+    append() only buffers in memory; the buffer is written in one O_APPEND
+    write when it reaches FLUSH_MAX_ENTRIES, every FLUSH_INTERVAL_S, and at
+    interpreter exit. Cost per action is independent of the log's history,
+    and whole-line appends from several processes do not clobber each other.
+    """
+
+    def __init__(self, directory, legacy_file=None,
+                 segment_max_bytes=SEGMENT_MAX_BYTES,
+                 flush_max_entries=FLUSH_MAX_ENTRIES,
+                 flush_interval=FLUSH_INTERVAL_S):
+        self.directory = directory
+        self.legacy_file = legacy_file
+        self.segment_max_bytes = segment_max_bytes
+        self.flush_max_entries = flush_max_entries
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        self._ready = False
+        self._legacy = (None, [])   # (signature, entries) of the unmigrated legacy file
+
+    # ---- setup ----
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._ready = True
+
+    def _read_legacy(self, path):
+        """Entries of a legacy audit_logs.json array, or None if it cannot be read."""
+        try:
+            with open(path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            log.error(f"Legacy audit log {self.legacy_file} could not be read, left in place: {e}")
+            return None
+        if not isinstance(entries, list):
+            log.error(f"Legacy audit log {self.legacy_file} is not a JSON array, left in place")
+            return None
+        return entries
+
+    def _legacy_entries(self):
+        # Readers include the legacy array until audit-migrate has imported it
+        try:
+            st = os.stat(self.legacy_file) if self.legacy_file else None
+        except OSError:
+            st = None
+        if st is None:
+            return []
+        sig = (st.st_mtime_ns, st.st_size)
+        if self._legacy[0] != sig:
+            self._legacy = (sig, self._read_legacy(self.legacy_file) or [])
+        return self._legacy[1]
+
+    def migrate_legacy(self):
+        """
+        Import the old audit_logs.json array into segment 0 (python -m
+        backend.tasks audit-migrate). The legacy file is renamed first, so
+        only one process performs it; a claim left by an interrupted run is
+        picked up again. A file that does not parse is logged and left in
+        place. Safe to re-run.
+        """
+        if not self.legacy_file:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        claimed = f"{self.legacy_file}.migrating.{os.getpid()}"
+        try:
+            os.rename(self.legacy_file, claimed)
+        except FileNotFoundError:
+            leftover = sorted(glob.glob(glob.escape(self.legacy_file) + ".migrating.*"))
+            if not leftover:
+                return 0
+            try:
+                os.rename(leftover[0], claimed)
+            except FileNotFoundError:
+                return 0   # another process picked it up
+        entries = self._read_legacy(claimed)
+        if entries is None:
+            os.rename(claimed, self.legacy_file)
+            return 0
+        # Segment 0 holds only the legacy entries: rewrite it whole, so an
+        # interrupted run can simply be repeated
+        target = os.path.join(self.directory, _segment_name(0))
+        tmp = f"{target}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, target)
+        os.rename(claimed, f"{self.legacy_file}.migrated")
+        return len(entries)
+
+    def _start_flusher(self):
+        if self._flusher and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name="audit-flush", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    # ---- writing ----
+    def append(self, entry):
+        with self._lock:
+            self._buffer.append(entry)
+            pending = len(self._buffer)
+            self._start_flusher()
+        if pending >= self.flush_max_entries:
+            self._wakeup.set()
+
+    def segments(self):
+        if not os.path.isdir(self.directory):
+            return []
+        numbered = []
+        for name in os.listdir(self.directory):
+            n = _segment_number(name)
+            if n is not None:
+                numbered.append((n, os.path.join(self.directory, name)))
+        return [path for _, path in sorted(numbered)]
+
+    def _active_segment(self):
+        segments = self.segments()
+        if not segments:
+            return os.path.join(self.directory, _segment_name(1))
+        last = segments[-1]
+        n = _segment_number(os.path.basename(last))
+        try:
+            size = os.path.getsize(last)
+        except OSError:
+            size = 0
+        if n == 0 or size >= self.segment_max_bytes:
+            return os.path.join(self.directory, _segment_name(n + 1))
+        return last
+
+    def flush(self):
+        # The swap happens under the I/O lock so close() waits for a batch the
+        # background flusher has already taken but not yet written.
+        with self._io_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                batch, self._buffer = self._buffer, []
+            payload = "".join(json.dumps(e) + "\n" for e in batch).encode("utf-8")
+            self._ensure_ready()
+            fd = os.open(self._active_segment(), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload)
+            finally:
+                os.close(fd)
+        return len(batch)
+
+    def close(self):
+        self.flush()
+
+    # ---- reading ----
+    def iter_entries(self):
+        """Stream every entry, oldest first, including still-buffered ones."""
+        self.flush()
+        with self._io_lock:
+            self._ensure_ready()
+        yield from self._legacy_entries()
+        for path in self.segments():
+            with open(path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+
+    def tail(self, n=50):
+        """Last n entries, oldest first, reading only the newest segments."""
+        self.flush()
+        with self._io_lock:
+            self._ensure_ready()
+        result = deque(maxlen=n)
+        for path in reversed(self.segments()):
+            with open(path, 'r') as f:
+                chunk = [json.loads(line) for line in f if line.strip()]
+            result.extendleft(reversed(chunk[-(n - len(result)):]))
+            if len(result) >= n:
+                break
+        else:
+            legacy = self._legacy_entries()
+            if legacy and len(result) < n:
+                result.extendleft(reversed(legacy[-(n - len(result)):]))
+        return list(result)
+
+audit_log = AuditLog(AUDIT_DIR, legacy_file=LEGACY_LOG_FILE)
+atexit.register(audit_log.close)
@@ -1,36 +1,186 @@
+import os
 import json
+import logging
+import time
 import bcrypt
-import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from backend.config import DATA_DIR
+
+log = logging.getLogger(__name__)
+
+USERS_FILE = os.path.join(DATA_DIR, 'users.json')
+USERS_RECHECK_S = 2.0         # how often a request may stat users.json for changes
+BCRYPT_WORKERS = 2            # concurrent password checks per process
+BCRYPT_MAX_PENDING = 16       # checks queued beyond this are refused (AuthBusy) instead of piling up
+LOGIN_MAX_FAILURES = 5        # failed logins per username ...
+LOGIN_MAX_ADDRESS_FAILURES = 20   # ... or per client address (an office may share one) ...
+LOGIN_WINDOW_S = 300          # ... within this many seconds before further attempts are refused
 
-USERS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'users.json')
+# bcrypt (cost 12, like the stored hashes) of a random, discarded password:
+# unknown usernames are checked against it so they take as long as a wrong
+# password for a real one
+_DUMMY_HASH = "$2b$12$k9SUkjzJnQyM1Lce4P/BFOuKltW6yOz2n.Fn6xSnHnWVXwXwKj3L6"
 
 class User:
-    def __init__(self, username, password):
+    """The logged-in user as Flask-Login sees it; the password hash stays in the directory."""
+    __slots__ = ("id", "username")
+
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, username):
         self.id = username
         self.username = username
-        self.password = password
 
-    def is_authenticated(self):
-        return True
+    def get_id(self):
+        return self.username
+
+class UserDirectory:
+    """
+    users.json in memory. The file is stat'ed at most every USERS_RECHECK_S
+    and re-read when its (mtime, size, inode) changes, so resolving the
+    session user on a request is a dict lookup.
+    """
 
-    def is_active(self):
-        return True
+    def __init__(self, path=USERS_FILE, recheck_s=USERS_RECHECK_S):
+        self.path = path
+        self.recheck_s = recheck_s
+        self._lock = threading.Lock()
+        self._sig = None
+        self._checked = 0.0
+        self._records = {}   # username -> users.json entry
+        self._users = {}     # username -> User
 
-    def is_anonymous(self):
-        return False
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
 
-    def get_id(self):
-        return self.username
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked < self.recheck_s:
+            return
+        with self._lock:
+            if now - self._checked < self.recheck_s:
+                return
+            sig = self._signature()
+            if sig != self._sig:
+                records = {}
+                if sig is not None:
+                    try:
+                        with open(self.path, 'r') as f:
+                            records = json.load(f)
+                    except (OSError, ValueError) as e:
+                        log.warning(f"Could not load users from {self.path}: {e}")
+                        records = self._records   # keep serving the last good copy
+                self._records = records
+                self._users = {name: User(rec.get('username', name)) for name, rec in records.items()}
+                self._sig = sig
+            self._checked = now
+
+    def get(self, username):
+        self._refresh()
+        return self._users.get(username)
+
+    def record(self, username):
+        self._refresh()
+        return self._records.get(username)
+
+    def invalidate(self):
+        """Re-read the file on the next lookup (after writing users.json in-process)."""
+        with self._lock:
+            self._checked = 0.0
+            self._sig = None
+
+users = UserDirectory()
 
 def load_user(username):
-    if not os.path.exists(USERS_FILE):
-        return None
-    with open(USERS_FILE, 'r') as f:
-        users = json.load(f)
-    return users.get(username)
+    return users.record(username)
+
+# ------------------------------ PASSWORDS ------------------------------
+
+class AuthBusy(Exception):
+    """Too many password checks are already queued; the client should retry shortly."""
+
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_slots = threading.BoundedSemaphore(BCRYPT_WORKERS + BCRYPT_MAX_PENDING)
+
+def _checkpw(password, hashed):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    finally:
+        _bcrypt_slots.release()
 
 def authenticate(username, password):
-    user = load_user(username)
-    if user and bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
-        return True
-    return False
+    """
+    Check a password on the bcrypt pool, so at most BCRYPT_WORKERS hashes
+    run at once however many logins arrive together; raises AuthBusy when
+    the queue is full.
+    """
+    if not _bcrypt_slots.acquire(blocking=False):
+        raise AuthBusy()
+    user = users.record(username)
+    known = bool(user and user.get('password'))
+    try:
+        future = _bcrypt_pool.submit(_checkpw, password, user['password'] if known else _DUMMY_HASH)
+    except BaseException:
+        _bcrypt_slots.release()
+        raise
+    return future.result() and known
+
+# ------------------------------ RATE LIMIT ------------------------------
+
+class LoginThrottle:
+    """
+    Refuses logins for a username or a client address once it has that
+    many failed attempts within window_s seconds. A success clears the
+    username's failures. Counts are per process.
+    """
+
+    def __init__(self, max_failures=LOGIN_MAX_FAILURES, max_address_failures=LOGIN_MAX_ADDRESS_FAILURES,
+                 window_s=LOGIN_WINDOW_S):
+        self.limits = {"user": max_failures, "addr": max_address_failures}
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._failures = {}   # key -> deque of failure times
+
+    def _recent(self, key, now):
+        times = self._failures.get(key)
+        if times is None:
+            return 0
+        while times and times[0] <= now - self.window_s:
+            times.popleft()
+        if not times:
+            del self._failures[key]
+            return 0
+        return len(times)
+
+    def retry_after(self, username, address):
+        """Seconds until an attempt is allowed again, or 0 if it is allowed now."""
+        now = time.monotonic()
+        wait = 0
+        with self._lock:
+            for key in (("user", username), ("addr", address)):
+                if self._recent(key, now) >= self.limits[key[0]]:
+                    wait = max(wait, self._failures[key][0] + self.window_s - now)
+        return int(wait) + 1 if wait else 0
+
+    def failed(self, username, address):
+        now = time.monotonic()
+        with self._lock:
+            for key in (("user", username), ("addr", address)):
+                self._failures.setdefault(key, deque()).append(now)
+            if len(self._failures) > 10000:   # guessing many usernames: drop what has expired
+                for key in list(self._failures):
+                    self._recent(key, now)
+
+    def succeeded(self, username):
+        with self._lock:
+            self._failures.pop(("user", username), None)
+
+login_throttle = LoginThrottle()
@@ -0,0 +1,107 @@
+import os
+import gzip
+import json
+import logging
+import hashlib
+import threading
+
+try:
+    import brotli        # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+from backend.config import TEMPLATES_FILE
+from backend import metrics
+
+log = logging.getLogger(__name__)
+
+# The vulnerability template catalogue, parsed once and kept in memory. Every
+# response body is serialized, hashed and compressed when the file is loaded,
+# so a request only stats the file and picks bytes; a repeat visit is a 304.
+
+INDEX_FIELDS = ("id", "title", "severity")
+
+class EncodedBody:
+    """A JSON body with its strong ETag and gzip (and brotli) variants."""
+
+    def __init__(self, payload):
+        self.identity = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        self.etag = hashlib.sha1(self.identity).hexdigest()[:20]
+        self.gzip = gzip.compress(self.identity, compresslevel=9, mtime=0)
+        self.br = brotli.compress(self.identity) if brotli is not None else None
+
+    def variant(self, accept_encoding):
+        """(body, Content-Encoding or None, ETag) for the best encoding the client accepts."""
+        accepted = set()
+        for part in (accept_encoding or "").split(","):
+            coding, _, params = part.partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                accepted.add(coding.strip().lower())
+        if self.br is not None and "br" in accepted:
+            return self.br, "br", f"{self.etag}-br"
+        if "gzip" in accepted:
+            return self.gzip, "gzip", f"{self.etag}-gz"
+        return self.identity, None, self.etag
+
+class TemplateCatalog:
+    """
+    vuln_templates.json in memory, reloaded when the file's (mtime, size,
+    inode) changes. Templates are addressed by their position in the file:
+    `full` is the whole list, `index` the id/title/severity of each and
+    `template(n)` one body.
+    """
+
+    def __init__(self, path=TEMPLATES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sig = None
+        self._full = self._index = None
+        self._bodies = []
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self):
+        sig = self._signature()
+        if sig == self._sig and self._full is not None:
+            metrics.count_cache("templates", hits=1)
+            return
+        with self._lock:
+            if sig == self._sig and self._full is not None:
+                metrics.count_cache("templates", hits=1)
+                return
+            metrics.count_cache("templates", misses=1)
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    templates = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"Could not load vulnerability templates from {self.path}: {e}")
+                templates = []
+            if not isinstance(templates, list):
+                templates = []
+            index = [dict({f: t.get(f, "") for f in INDEX_FIELDS}, index=i)
+                     for i, t in enumerate(templates) if isinstance(t, dict)]
+            self._bodies = [EncodedBody(t) for t in templates]
+            self._index = EncodedBody(index)
+            self._full = EncodedBody(templates)
+            self._sig = sig
+
+    def full(self):
+        self._load()
+        return self._full
+
+    def index(self):
+        self._load()
+        return self._index
+
+    def template(self, n):
+        """One template's body, or None if there is no template n."""
+        self._load()
+        bodies = self._bodies
+        return bodies[n] if 0 <= n < len(bodies) else None
+
+catalog = TemplateCatalog()
@@ -0,0 +1,43 @@
+# Deployment settings, read from the environment once at import.
+#
+#   H4_DATA_DIR          data tree (default backend/data)
+#   H4_STORAGE_BACKEND   "json" (flat files, default) or "sqlite"
+#   H4_SQLITE_PATH       database file for the sqlite backend (default <data>/h4.sqlite3)
+#   H4_SEARCH_PATH       full-text search index (default <data>/search.sqlite3)
+#   H4_TEMPLATES_FILE    vulnerability templates (default <data>/templates/vuln_templates.json)
+#   H4_SCREENSHOT_DIR    uploaded screenshots (default static/screenshots; the pages link to
+#                        /static/screenshots/<name>, so serve a moved directory at that URL)
+#   H4_METRICS_TOKEN     bearer token for GET /metrics (unset: a logged-in session is required)
+#   H4_SECRET_KEY        session signing key shared by all workers (unset: generated once into
+#                        <data>/secret_key, so sessions survive restarts and work across workers)
+import os
+import time
+import secrets
+
+DATA_DIR = os.environ.get("H4_DATA_DIR") or os.path.join(os.path.dirname(__file__), 'data')
+STORAGE_BACKEND = (os.environ.get("H4_STORAGE_BACKEND") or "json").strip().lower()
+SQLITE_PATH = os.environ.get("H4_SQLITE_PATH") or os.path.join(DATA_DIR, 'h4.sqlite3')
+SEARCH_PATH = os.environ.get("H4_SEARCH_PATH") or os.path.join(DATA_DIR, 'search.sqlite3')
+TEMPLATES_FILE = os.environ.get("H4_TEMPLATES_FILE") or os.path.join(DATA_DIR, 'templates', 'vuln_templates.json')
+SCREENSHOT_DIR = os.environ.get("H4_SCREENSHOT_DIR") or os.path.join(os.path.dirname(__file__), '..', 'static', 'screenshots')
+METRICS_TOKEN = os.environ.get("H4_METRICS_TOKEN") or None
+
+def _load_secret_key(path):
+    """The key stored at path, created (readable by the owner only) by whichever process gets there first."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    for _ in range(50):
+        with open(path) as f:
+            key = f.read().strip()
+        if key:
+            return key
+        time.sleep(0.01)   # another worker created it and is still writing
+    raise RuntimeError(f"{path} is empty; delete it or set H4_SECRET_KEY")
+
+SECRET_KEY = os.environ.get("H4_SECRET_KEY") or _load_secret_key(os.path.join(DATA_DIR, "secret_key"))
@@ -0,0 +1,163 @@
+import json
+import uuid
+import hashlib
+
+# Granular edits of an application's findings list. Every finding and step
+# carries a stable "uid"; an edit is a small op dict applied with apply_op:
+#
+#   {"op": "add",         "finding": {...}, "position": n | None}
+#   {"op": "patch",       "uid": u, "fields": {...}}
+#   {"op": "delete",      "uid": u}
+#   {"op": "order",       "uids": [u, ...]}                 (a permutation)
+#   {"op": "add_step",    "uid": u, "step": {...}, "position": n | None}
+#   {"op": "patch_step",  "uid": u, "step_uid": s, "fields": {...}}
+#   {"op": "delete_step", "uid": u, "step_uid": s}
+#   {"op": "order_steps", "uid": u, "step_uids": [s, ...]}
+#
+# Ops are plain JSON, so the JSON backend can journal them instead of
+# rewriting the whole list.
+
+class FindingNotFound(LookupError):
+    pass
+
+class InvalidOperation(ValueError):
+    pass
+
+def new_uid():
+    return uuid.uuid4().hex[:12]
+
+def _derived_uid(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+def _with_step_uids(finding, derived=False):
+    steps = finding.get("steps")
+    if isinstance(steps, list) and any(isinstance(s, dict) and not s.get("uid") for s in steps):
+        finding = dict(finding, steps=[
+            s if not isinstance(s, dict) or s.get("uid")
+            else dict(s, uid=_derived_uid(finding.get("uid"), i, s) if derived else new_uid())
+            for i, s in enumerate(steps)])
+    return finding
+
+def missing_uids(vulns):
+    return not all(v.get("uid") and all(s.get("uid") for s in v.get("steps") or [] if isinstance(s, dict))
+                   for v in vulns)
+
+def assign_uids(vulns):
+    """
+    Give every finding and step that lacks one a uid (returns a new list).
+    Missing uids are derived from position and content, so an unsaved list
+    gets the same uids every time it is read.
+    """
+    out = []
+    for i, v in enumerate(vulns):
+        if not v.get("uid"):
+            v = dict(v, uid=_derived_uid(i, v))
+        out.append(_with_step_uids(v, derived=True))
+    return out
+
+def _check_steps(steps):
+    # Exports and the legacy editor call .get() on every step
+    if not isinstance(steps, list) or not all(isinstance(s, dict) for s in steps):
+        raise InvalidOperation("steps must be a list of objects")
+
+def prepare_op(op):
+    """Validate an op from a client and give new findings/steps their uids."""
+    if not isinstance(op, dict) or op.get("op") not in _APPLY:
+        raise InvalidOperation("Unknown operation")
+    op = dict(op)
+    if op["op"] == "add":
+        if not isinstance(op.get("finding"), dict):
+            raise InvalidOperation("finding must be an object")
+        if "steps" in op["finding"]:
+            _check_steps(op["finding"]["steps"])
+        op["finding"] = _with_step_uids(dict(op["finding"], uid=new_uid()))
+    elif op["op"] == "add_step":
+        if not isinstance(op.get("step"), dict):
+            raise InvalidOperation("step must be an object")
+        op["step"] = dict(op["step"], uid=new_uid())
+    elif op["op"] in ("patch", "patch_step"):
+        fields = op.get("fields")
+        if not isinstance(fields, dict) or "uid" in fields:
+            raise InvalidOperation("fields must be an object and cannot change uid")
+        if op["op"] == "patch" and "steps" in fields:
+            _check_steps(fields["steps"])
+            op["fields"] = dict(fields, steps=_with_step_uids({"steps": fields["steps"]})["steps"])
+    return op
+
+def _position(op, length):
+    pos = op.get("position")
+    if pos is None:
+        return length
+    if not isinstance(pos, int) or not 0 <= pos <= length:
+        raise InvalidOperation(f"position must be between 0 and {length}")
+    return pos
+
+def _find(items, uid, what="Finding"):
+    for i, item in enumerate(items):
+        if isinstance(item, dict) and item.get("uid") == uid:
+            return i
+    raise FindingNotFound(f"{what} {uid} not found")
+
+def _reordered(items, uids, what):
+    by_uid = {item.get("uid"): item for item in items if isinstance(item, dict)}
+    if not isinstance(uids, list) or len(uids) != len(items) or set(uids) != set(by_uid):
+        raise InvalidOperation(f"order must list every {what} uid exactly once")
+    return [by_uid[u] for u in uids]
+
+def _steps_of(vulns, op):
+    i = _find(vulns, op.get("uid"))
+    finding = dict(vulns[i])
+    steps = finding.get("steps")
+    finding["steps"] = list(steps) if isinstance(steps, list) else []
+    vulns[i] = finding
+    return finding, finding["steps"]
+
+def _add(vulns, op):
+    vulns.insert(_position(op, len(vulns)), op["finding"])
+    return op["finding"]
+
+def _patch(vulns, op):
+    i = _find(vulns, op.get("uid"))
+    vulns[i] = dict(vulns[i], **op["fields"])
+    return vulns[i]
+
+def _delete(vulns, op):
+    del vulns[_find(vulns, op.get("uid"))]
+
+def _order(vulns, op):
+    vulns[:] = _reordered(vulns, op.get("uids"), "finding")
+
+def _add_step(vulns, op):
+    finding, steps = _steps_of(vulns, op)
+    steps.insert(_position(op, len(steps)), op["step"])
+    return finding
+
+def _patch_step(vulns, op):
+    finding, steps = _steps_of(vulns, op)
+    j = _find(steps, op.get("step_uid"), "Step")
+    steps[j] = dict(steps[j], **op["fields"])
+    return finding
+
+def _delete_step(vulns, op):
+    finding, steps = _steps_of(vulns, op)
+    del steps[_find(steps, op.get("step_uid"), "Step")]
+    return finding
+
+def _order_steps(vulns, op):
+    finding, steps = _steps_of(vulns, op)
+    steps[:] = _reordered(steps, op.get("step_uids"), "step")
+    return finding
+
+_APPLY = {
+    "add": _add, "patch": _patch, "delete": _delete, "order": _order,
+    "add_step": _add_step, "patch_step": _patch_step,
+    "delete_step": _delete_step, "order_steps": _order_steps,
+}
+
+def apply_op(vulns, op):
+    """
+    Apply a prepared op to the list in place (findings that change are
+    replaced, never mutated). Returns the affected finding, or None for
+    delete/order. Raises FindingNotFound or InvalidOperation.
+    """
+    return _APPLY[op["op"]](vulns, op)
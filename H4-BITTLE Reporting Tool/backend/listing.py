@@ -0,0 +1,121 @@
+import json
+import base64
+
+# Cursor pagination for the listing APIs. A listing is sorted by
+# (sort value, tiebreaker) -- the application id, or a finding's position in
+# its list -- and a page starts strictly after the key of the previous
+# page's last item, so a page costs the same however deep it is. The cursor
+# handed to clients is that key plus the sort it belongs to, base64'd.
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+APPLICATION_SORTS = ("name", "start_date", "status", "id")
+VULNERABILITY_SORTS = ("position", "cvss", "severity", "title")
+
+# Same order as models.SEVERITIES; unknown severities sort below "info".
+SEVERITY_RANK = {"info": 0, "low": 1, "medium": 2, "high": 3, "critical": 4}
+
+class InvalidQuery(ValueError):
+    pass
+
+# ------------------------------ PARAMETERS ------------------------------
+
+def parse_sort(value, allowed):
+    """'cvss' / '-cvss' -> ('cvss', descending). Empty means the first allowed sort."""
+    value = (value or "").strip()
+    descending = value.startswith("-")
+    field = value.lstrip("-") or allowed[0]
+    if field not in allowed:
+        raise InvalidQuery(f"sort must be one of {', '.join(allowed)} (prefix '-' for descending)")
+    return field, descending
+
+def parse_limit(value):
+    if value is None or value == "":
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise InvalidQuery("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise InvalidQuery(f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+def parse_fields(value):
+    """'id,name' -> ['id', 'name']; None when every field is wanted."""
+    fields = [f.strip() for f in (value or "").split(",") if f.strip()]
+    return fields or None
+
+def parse_float(value, name):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidQuery(f"{name} must be a number")
+
+def project(doc, fields):
+    if not fields:
+        return doc
+    return {f: doc[f] for f in fields if f in doc}
+
+def encode_cursor(sort, descending, key):
+    raw = json.dumps([("-" if descending else "") + sort, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, sort, descending):
+    """The key a cursor continues after; None for no cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+    except Exception:
+        raise InvalidQuery("Malformed cursor")
+    if cursor_sort != ("-" if descending else "") + sort or not isinstance(key, list) or len(key) != 2:
+        raise InvalidQuery("Cursor does not belong to this sort; start again without it")
+    return tuple(key)
+
+# ------------------------------ SORT KEYS ------------------------------
+# Both storage backends order by these values, so a cursor means the same
+# thing whichever one is configured.
+
+def name_key(app):
+    return (app.get("name") or "").strip().lower()
+
+def cvss_value(v):
+    try:
+        return float(v.get("cvss", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def severity_rank(v):
+    return SEVERITY_RANK.get((v.get("severity") or "").strip().lower(), -1)
+
+def title_key(v):
+    return (v.get("title") or "").strip().lower()
+
+VULNERABILITY_SORT_KEYS = {
+    "position": lambda position, v: position,
+    "cvss": lambda position, v: cvss_value(v),
+    "severity": lambda position, v: severity_rank(v),
+    "title": lambda position, v: title_key(v),
+}
+
+def keyset_page(keyed, after, limit, descending):
+    """
+    keyed is [(key, item)] with unique keys. Returns (items, next key or None)
+    for the page that starts after `after`; limit None returns everything.
+    """
+    keyed.sort(key=lambda pair: pair[0], reverse=descending)
+    start = 0
+    if after is not None:
+        try:
+            start = next((i for i, (k, _) in enumerate(keyed) if (k < after if descending else k > after)),
+                         len(keyed))
+        except TypeError:
+            raise InvalidQuery("Malformed cursor")
+    end = len(keyed) if limit is None else start + limit
+    page = keyed[start:end]
+    next_key = page[-1][0] if end < len(keyed) and page else None
+    return [item for _, item in page], next_key
@@ -0,0 +1,91 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:      # Windows
+    fcntl = None
+    import msvcrt
+
+def _os_lock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:   # LK_LOCK gives up after ~10 s; keep waiting
+            time.sleep(0.05)
+
+def _os_unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+class _NamedLock:
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    _os_lock(fd)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self.thread_lock.release()
+                raise
+            self.fd = fd
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            fd, self.fd = self.fd, None
+            try:
+                _os_unlock(fd)
+            finally:
+                os.close(fd)
+        self.thread_lock.release()
+
+class FileLocks:
+    """
+    Named exclusive locks shared by threads and processes (gunicorn workers,
+    CLI tasks). Each name maps to <directory>/<name>.lock, held with flock
+    (msvcrt.locking on Windows). Re-entrant within a thread.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _named(self, name):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        with self._lock:
+            lock = self._locks.get(safe)
+            if lock is None:
+                lock = self._locks[safe] = _NamedLock(os.path.join(self.directory, f"{safe}.lock"))
+            return lock
+
+    @contextmanager
+    def hold(self, name):
+        lock = self._named(name)
+        lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
@@ -0,0 +1,188 @@
+import time
+import threading
+from bisect import bisect_left
+
+from flask import request
+
+# In-process counters, gauges and histograms rendered in the Prometheus text
+# format by GET /metrics. Recording is a dict update under a per-metric lock;
+# nothing is formatted until someone scrapes. Each worker process keeps its
+# own numbers, so scrape every worker (or run one) when using several.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}   # label values tuple -> value
+        registry.append(self)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, values)} {_number(value)}")
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *values, by=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + by
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def add(self, *values, by=1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + by
+
+class Histogram(_Metric):
+    """Observations in seconds; per label set, one count per bucket plus sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *values, seconds):
+        slot = bisect_left(self.buckets, seconds)   # first bucket with le >= seconds
+        with self._lock:
+            state = self._values.get(values)
+            if state is None:
+                state = self._values[values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += seconds
+            state[2] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((values, ([*counts], total, n)) for values, (counts, total, n) in self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {n}")
+        return lines
+
+registry = []
+
+# ---------------------------- HTTP ----------------------------
+http_requests = Counter("h4_http_requests_total", "HTTP requests by endpoint, method and status.",
+                        ("endpoint", "method", "status"))
+http_latency = Histogram("h4_http_request_duration_seconds",
+                         "Time until the handler returned its response, by endpoint.", ("endpoint", "method"))
+http_in_flight = Gauge("h4_http_requests_in_flight", "Requests being handled right now.")
+http_bytes_in = Counter("h4_http_request_bytes_total", "Request body bytes received, by endpoint.", ("endpoint",))
+http_bytes_out = Counter("h4_http_response_bytes_total",
+                         "Response body bytes sent (Content-Length), by endpoint.", ("endpoint",))
+
+# ---------------------------- STORAGE ----------------------------
+storage_reads = Counter("h4_storage_files_read_total", "JSON files parsed by the storage layer.")
+storage_read_bytes = Counter("h4_storage_read_bytes_total", "Bytes of JSON read by the storage layer.")
+storage_writes = Counter("h4_storage_files_written_total", "Files written or appended to by the storage layer.")
+storage_written_bytes = Counter("h4_storage_written_bytes_total", "Bytes written by the storage layer.")
+cache_lookups = Counter("h4_cache_lookups_total",
+                        "Lookups in the in-process and on-disk caches, by cache and result (hit/miss).",
+                        ("cache", "result"))
+
+# ---------------------------- EXPORTS ----------------------------
+exports = Counter("h4_exports_total", "Report exports by kind and result (rendered, cached, failed).",
+                  ("kind", "result"))
+export_latency = Histogram("h4_export_duration_seconds", "Wall time of report exports, by kind.",
+                           ("kind",), buckets=EXPORT_BUCKETS)
+
+_started = time.time()
+
+def count_cache(cache, hits=0, misses=0):
+    if hits:
+        cache_lookups.inc(cache, "hit", by=hits)
+    if misses:
+        cache_lookups.inc(cache, "miss", by=misses)
+
+def render():
+    """Everything in the registry as a Prometheus text exposition (format 0.0.4)."""
+    lines = ["# HELP h4_process_start_time_seconds Start time of this process since the epoch.",
+             "# TYPE h4_process_start_time_seconds gauge",
+             f"h4_process_start_time_seconds {_started!r}"]
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+ENDPOINT_KEY = "h4.endpoint"
+
+def instrument(app):
+    """Record request metrics for a Flask app (see MetricsMiddleware)."""
+    @app.teardown_request
+    def _tag_endpoint(exc=None):
+        # Teardown runs even when a before_request hook (CSRF, login) aborted
+        request.environ[ENDPOINT_KEY] = request.endpoint
+
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app)
+
+class MetricsMiddleware:
+    """
+    WSGI wrapper that times each request and counts status and bytes. The
+    endpoint label is the matched Flask endpoint, "unmatched" for 404s, so
+    the label set stays bounded no matter which URLs clients try.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        seen = {}
+
+        def _start_response(status, headers, exc_info=None):
+            seen["status"] = status.split(" ", 1)[0]
+            for key, value in headers:
+                if key.lower() == "content-length":
+                    seen["length"] = value
+            return start_response(status, headers, exc_info)
+
+        http_in_flight.add()
+        t0 = time.perf_counter()
+        try:
+            return self.wsgi_app(environ, _start_response)
+        finally:
+            elapsed = time.perf_counter() - t0
+            http_in_flight.add(by=-1)
+            endpoint = environ.get(ENDPOINT_KEY) or "unmatched"
+            method = environ.get("REQUEST_METHOD", "")
+            http_requests.inc(endpoint, method, seen.get("status", "500"))
+            http_latency.observe(endpoint, method, seconds=elapsed)
+            try:
+                received = int(environ.get("CONTENT_LENGTH") or 0)
+                sent = int(seen.get("length") or 0)
+            except ValueError:
+                received = sent = 0
+            if received:
+                http_bytes_in.inc(endpoint, by=received)
+            if sent:
+                http_bytes_out.inc(endpoint, by=sent)
@@ -1,21 +1,656 @@
 import os
 import json
+import copy
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from backend.locks import FileLocks
+from backend.findings import apply_op, assign_uids, missing_uids, prepare_op, FindingNotFound, InvalidOperation
+from backend.config import DATA_DIR, STORAGE_BACKEND, SQLITE_PATH
+from backend.search import get_index as get_search_index
+from backend.screenshots import screenshot_store
+from backend.listing import name_key, cvss_value, keyset_page, VULNERABILITY_SORT_KEYS
+from backend import metrics
+
+log = logging.getLogger(__name__)
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 APPS_DIR = os.path.join(DATA_DIR, 'applications')
 VULNS_DIR = os.path.join(DATA_DIR, 'vulnerabilities')
+LOCK_DIR = os.path.join(DATA_DIR, 'locks')
+GENERATIONS_DIR = os.path.join(DATA_DIR, 'generations')
 
 os.makedirs(APPS_DIR, exist_ok=True)
 os.makedirs(VULNS_DIR, exist_ok=True)
 
-def load_applications():
-    applications = []
-    for filename in os.listdir(APPS_DIR):
-        if filename.endswith('.json'):
-            with open(os.path.join(APPS_DIR, filename), 'r') as f:
-                applications.append(json.load(f))
-    return applications
+JOURNAL_COMPACT_MIN_BYTES = 64 * 1024   # fold a findings journal into its base file past this
+                                        # size (or the base file's size, whichever is larger)
+
+# ----------------------------- WRITE METER -----------------------------
+
+_write_meter = threading.local()
+
+@contextmanager
+def measure_writes():
+    """Count the bytes the storage layer writes from this thread inside the block."""
+    meter = {"bytes": 0}
+    outer = getattr(_write_meter, "current", None)
+    _write_meter.current = meter
+    try:
+        yield meter
+    finally:
+        _write_meter.current = outer
+        if outer is not None:
+            outer["bytes"] += meter["bytes"]
+
+def _count_written(n):
+    meter = getattr(_write_meter, "current", None)
+    if meter is not None:
+        meter["bytes"] += n
+    metrics.storage_writes.inc()
+    metrics.storage_written_bytes.inc(by=n)
+
+def _count_read(n):
+    metrics.storage_reads.inc()
+    metrics.storage_read_bytes.inc(by=n)
+
+# ----------------------------- REPOSITORY -----------------------------
+
+def _file_signature(st):
+    # Every write is a rename onto the path, so the inode changes even when a
+    # rewrite lands in the same mtime tick with the same size.
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _read_json(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    _count_read(len(raw))
+    return json.loads(raw)
+
+def _digest(raw):
+    return hashlib.sha1(raw).hexdigest()
+
+def _replace_bytes(path, raw, durable=False):
+    """Write to a private temp file and rename it over path: readers see old or new, never half."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(raw)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    _count_written(len(raw))
+    return _file_signature(os.stat(path))
+
+def _replace_json(path, payload, indent=None, durable=False):
+    return _replace_bytes(path, json.dumps(payload, indent=indent).encode("utf-8"), durable)
+
+class ConflictError(Exception):
+    """A write named a revision that is no longer the stored one."""
+
+    def __init__(self, message, current_revision):
+        super().__init__(message)
+        self.current_revision = current_revision
+
+def _revision_of(app):
+    try:
+        return int((app or {}).get("revision") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+class JsonRepository:
+    """
+    Process-wide, in-memory view of the applications/vulnerabilities JSON tree.
+
+    Parsed documents are kept keyed by file and re-read only when the file's
+    (mtime, size) signature changes, so a listing costs one directory scan plus
+    O(changed files) parses. Callers get fresh top-level dicts/lists; nested
+    values are shared with the cache and must be replaced, not mutated in place.
+    """
+
+    def __init__(self, apps_dir, vulns_dir):
+        self.apps_dir = apps_dir
+        self.vulns_dir = vulns_dir
+        self._lock = threading.RLock()
+        self._apps = {}    # filename -> (signature, parsed app)
+        self._vulns = {}   # app_id   -> (signature, parsed list)
+
+    def _app_path(self, app_id):
+        return os.path.join(self.apps_dir, f"{app_id}.json")
+
+    def _vuln_path(self, app_id):
+        return os.path.join(self.vulns_dir, f"{app_id}.json")
+
+    def _vuln_revision_path(self, app_id):
+        return os.path.join(self.vulns_dir, f"{app_id}.rev")
+
+    def _vuln_journal_path(self, app_id):
+        return os.path.join(self.vulns_dir, f"{app_id}.journal.jsonl")
+
+    # ---- applications ----
+    def list_applications(self):
+        applications = []
+        seen = set()
+        misses = 0
+        with self._lock:
+            with os.scandir(self.apps_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json'):
+                        continue
+                    try:
+                        sig = _file_signature(entry.stat())
+                    except FileNotFoundError:
+                        continue
+                    cached = self._apps.get(entry.name)
+                    if cached is None or cached[0] != sig:
+                        cached = (sig, _read_json(entry.path))
+                        self._apps[entry.name] = cached
+                        misses += 1
+                    seen.add(entry.name)
+                    applications.append(dict(cached[1]))
+            for stale in self._apps.keys() - seen:
+                del self._apps[stale]
+        metrics.count_cache("applications", len(applications) - misses, misses)
+        return applications
+
+    def load_application_file(self, filename, fresh=False):
+        """fresh=True always re-parses the file (used under the per-app write lock)."""
+        path = os.path.join(self.apps_dir, filename)
+        with self._lock:
+            try:
+                sig = _file_signature(os.stat(path))
+            except FileNotFoundError:
+                self._apps.pop(filename, None)
+                return None
+            cached = self._apps.get(filename)
+            if fresh or cached is None or cached[0] != sig:
+                cached = (sig, _read_json(path))
+                self._apps[filename] = cached
+                metrics.count_cache("applications", misses=1)
+            else:
+                metrics.count_cache("applications", hits=1)
+            return dict(cached[1])
+
+    def application_signature(self, filename):
+        """(mtime_ns, size) of the cached copy of an application file, if any."""
+        cached = self._apps.get(filename)
+        return cached[0] if cached else None
+
+    def save_application(self, app_id, app_data):
+        filepath = self._app_path(app_id)
+        with self._lock:
+            sig = _replace_json(filepath, app_data, indent=2, durable=True)
+            self._apps[os.path.basename(filepath)] = (sig, copy.deepcopy(app_data))
+
+    # ---- vulnerabilities ----
+    # A findings list is its base file plus an optional journal of granular
+    # edits (backend/findings.py ops). Each journal line names the sha1 of
+    # the base it was written against, so after the base is rewritten (or a
+    # crash mid-compaction) older lines are ignored instead of applied twice.
+    def _vuln_signature(self, app_id):
+        st = os.stat(self._vuln_path(app_id))
+        try:
+            journal = _file_signature(os.stat(self._vuln_journal_path(app_id)))
+        except FileNotFoundError:
+            journal = None
+        return (_file_signature(st), journal)
+
+    def _read_vulnerabilities(self, app_id):
+        with open(self._vuln_path(app_id), 'rb') as f:
+            raw = f.read()
+        _count_read(len(raw))
+        base = _digest(raw)
+        data = json.loads(raw)
+        try:
+            with open(self._vuln_journal_path(app_id), 'r') as f:
+                _count_read(os.fstat(f.fileno()).st_size)
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue   # torn last line from a crash
+                    if entry.get("base") != base:
+                        continue
+                    try:
+                        apply_op(data, entry["op"])
+                    except (FindingNotFound, InvalidOperation):
+                        pass
+        except FileNotFoundError:
+            pass
+        return base, data
+
+    def _cached_vulnerabilities(self, app_id, fresh):
+        try:
+            sig = self._vuln_signature(app_id)
+        except FileNotFoundError:
+            self._vulns.pop(app_id, None)
+            return None
+        cached = self._vulns.get(app_id)
+        if fresh or cached is None or cached[0] != sig:
+            base, data = self._read_vulnerabilities(app_id)
+            cached = (sig, data, base)
+            self._vulns[app_id] = cached
+            metrics.count_cache("vulnerabilities", misses=1)
+        else:
+            metrics.count_cache("vulnerabilities", hits=1)
+        return cached
+
+    def load_vulnerabilities(self, app_id, fresh=False):
+        with self._lock:
+            cached = self._cached_vulnerabilities(app_id, fresh)
+            return [dict(v) for v in cached[1]] if cached else []
+
+    def vulnerabilities_revision(self, app_id):
+        """Revision counter of an application's findings list (0 if never saved with one)."""
+        try:
+            with open(self._vuln_revision_path(app_id), 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def save_vulnerabilities(self, app_id, data, revision=None):
+        # The list is replaced before its revision is bumped: a reader that
+        # takes the revision first can only pair an old revision with newer
+        # data, which makes its next write conflict rather than clobber.
+        filepath = self._vuln_path(app_id)
+        journal = self._vuln_journal_path(app_id)
+        raw = json.dumps(data, indent=2).encode("utf-8")
+        with self._lock:
+            if os.path.exists(journal):
+                try:
+                    with open(filepath, 'rb') as f:
+                        same_base = _digest(f.read()) == _digest(raw)
+                except FileNotFoundError:
+                    same_base = False
+                if same_base:
+                    # Old journal lines would still match the new base; drop them first.
+                    os.remove(journal)
+            _replace_bytes(filepath, raw, durable=True)
+            try:
+                os.remove(journal)
+            except FileNotFoundError:
+                pass
+            self._vulns[app_id] = (self._vuln_signature(app_id), copy.deepcopy(data), _digest(raw))
+            if revision is not None:
+                _replace_json(self._vuln_revision_path(app_id), revision, durable=True)
+
+    def apply_vulnerabilities_op(self, app_id, op, revision):
+        """
+        Apply one granular edit: append it to the journal (or fold everything
+        into the base file once the journal outgrows it). Returns the result
+        of apply_op on the updated list. Callers hold the app lock.
+        """
+        with self._lock:
+            # The signature covers the base's inode and the journal's size, so
+            # any write by another process since our last read is detected.
+            cached = self._cached_vulnerabilities(app_id, fresh=False)
+            data = [dict(v) for v in cached[1]] if cached else []
+            result = apply_op(data, op)
+            journal = self._vuln_journal_path(app_id)
+            try:
+                journal_size = os.path.getsize(journal)
+                base_size = cached[0][0][1]
+            except (FileNotFoundError, TypeError):
+                journal_size, base_size = 0, 0
+            if cached is None or journal_size > max(JOURNAL_COMPACT_MIN_BYTES, base_size):
+                self.save_vulnerabilities(app_id, data, revision)
+                return result
+            line = (json.dumps({"base": cached[2], "rev": revision, "op": op}) + "\n").encode("utf-8")
+            fd = os.open(journal, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if journal_size:
+                    os.lseek(fd, journal_size - 1, os.SEEK_SET)
+                    if os.read(fd, 1) != b"\n":
+                        line = b"\n" + line   # never glue an op onto a torn line
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            _count_written(len(line))
+            self._vulns[app_id] = (self._vuln_signature(app_id), data, cached[2])
+            _replace_json(self._vuln_revision_path(app_id), revision, durable=True)
+            return result
+
+    def clear(self):
+        with self._lock:
+            self._apps.clear()
+            self._vulns.clear()
+
+repository = JsonRepository(APPS_DIR, VULNS_DIR)
+locks = FileLocks(LOCK_DIR)
+
+def _app_lock(app_id):
+    return locks.hold(f"app-{app_id}")
+
+# ------------------------------- INDEX -------------------------------
+
+INDEX_FILE = os.path.join(DATA_DIR, 'applications_index.json')
+INDEX_VERSION = 2
+
+START_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d")
+
+def parse_start_date(app):
+    v = (app.get("start_date") or "").strip()
+    for fmt in START_DATE_FORMATS:
+        try:
+            return datetime.strptime(v, fmt)
+        except Exception:
+            pass
+    return None
+
+def _index_entry(filename, app, sig):
+    dt = parse_start_date(app)
+    return {
+        "file": filename,
+        "status": (app.get("status") or "").lower(),
+        "month": dt.strftime("%Y-%m") if dt else "",
+        "day": dt.strftime("%Y-%m-%d") if dt else "",
+        "name": name_key(app),
+        "sig": list(sig) if sig else None,
+    }
+
+class ApplicationIndex:
+    """
+    Persistent secondary index over the applications directory:
+    id -> file, status -> ids and start month (YYYY-MM) -> ids. Entries also
+    carry the start day and sort name, so listings page without parsing files.
+
+    The index records the directory mtime it was built against; if the file is
+    missing, from another version, or the directory changed behind our back
+    (files added/removed outside save_application), it is rebuilt from disk.
+    """
+
+    def __init__(self, repo, index_file):
+        self.repo = repo
+        self.index_file = index_file
+        self._lock = threading.RLock()
+        self._entries = None     # app_id -> entry
+        self._by_status = {}
+        self._by_month = {}
+        self._dir_mtime = None
+        self._file_sig = None
+
+    def _reset_maps(self):
+        self._by_status, self._by_month = {}, {}
+        for app_id, entry in self._entries.items():
+            self._by_status.setdefault(entry["status"], set()).add(app_id)
+            if entry["month"]:
+                self._by_month.setdefault(entry["month"], set()).add(app_id)
+
+    def _dir_mtime_now(self):
+        return os.stat(self.repo.apps_dir).st_mtime_ns
+
+    def _persist(self):
+        payload = {
+            "version": INDEX_VERSION,
+            "dir_mtime_ns": self._dir_mtime,
+            "by_id": self._entries,
+            "by_status": {k: sorted(v) for k, v in self._by_status.items()},
+            "by_month": {k: sorted(v) for k, v in self._by_month.items()},
+        }
+        self._file_sig = _replace_json(self.index_file, payload)
+
+    def rebuild(self):
+        with self._lock, locks.hold("index"):
+            entries = {}
+            dir_mtime = self._dir_mtime_now()
+            with os.scandir(self.repo.apps_dir) as it:
+                names = [e.name for e in it if e.name.endswith('.json')]
+            for name in names:
+                try:
+                    app = self.repo.load_application_file(name)
+                except ValueError:
+                    continue
+                if not app or not app.get("id"):
+                    continue
+                entries[app["id"]] = _index_entry(name, app, self.repo.application_signature(name))
+            self._entries = entries
+            self._dir_mtime = dir_mtime
+            self._reset_maps()
+            self._persist()
+
+    def _load_from_disk(self):
+        try:
+            sig = _file_signature(os.stat(self.index_file))
+            payload = _read_json(self.index_file)
+        except (OSError, ValueError):
+            return False
+        if payload.get("version") != INDEX_VERSION or not isinstance(payload.get("by_id"), dict):
+            return False
+        self._entries = payload["by_id"]
+        self._dir_mtime = payload.get("dir_mtime_ns")
+        self._file_sig = sig
+        self._reset_maps()
+        return True
+
+    def _ensure_fresh(self, check_dir=True):
+        """Reload if another process rewrote the index; rebuild if stale or missing."""
+        try:
+            sig = _file_signature(os.stat(self.index_file))
+        except FileNotFoundError:
+            sig = None
+        if self._entries is None or sig != self._file_sig:
+            if sig is None or not self._load_from_disk():
+                self.rebuild()
+                return
+        if check_dir and self._dir_mtime != self._dir_mtime_now():
+            self.rebuild()
+
+    def update(self, app_id, filename, app):
+        with self._lock, locks.hold("index"):
+            # The caller has just written the file (possibly creating it), so the
+            # directory mtime is expected to move; only pick up foreign index writes.
+            self._ensure_fresh(check_dir=False)
+            old = self._entries.get(app_id)
+            if old:
+                self._by_status.get(old["status"], set()).discard(app_id)
+                if old["month"]:
+                    self._by_month.get(old["month"], set()).discard(app_id)
+            entry = _index_entry(filename, app, self.repo.application_signature(filename))
+            self._entries[app_id] = entry
+            self._by_status.setdefault(entry["status"], set()).add(app_id)
+            if entry["month"]:
+                self._by_month.setdefault(entry["month"], set()).add(app_id)
+            self._dir_mtime = self._dir_mtime_now()
+            self._persist()
+
+    def file_for(self, app_id):
+        with self._lock:
+            self._ensure_fresh()
+            entry = self._entries.get(app_id)
+            return entry["file"] if entry else None
+
+    def ids_for_status(self, status):
+        with self._lock:
+            self._ensure_fresh()
+            return sorted(self._by_status.get((status or "").lower(), ()))
+
+    def ids_for_month(self, month):
+        with self._lock:
+            self._ensure_fresh()
+            return sorted(self._by_month.get(month, ()))
+
+    def entries(self):
+        """Snapshot of app_id -> entry."""
+        with self._lock:
+            self._ensure_fresh()
+            return dict(self._entries)
+
+    def refresh_entry(self, app_id, app):
+        """Re-index a single record whose file changed since it was indexed."""
+        with self._lock:
+            entry = self._entries.get(app_id) if self._entries else None
+            if not entry:
+                return
+            sig = self.repo.application_signature(entry["file"])
+            if sig and entry.get("sig") != list(sig):
+                self.update(app_id, entry["file"], app)
+
+app_index = ApplicationIndex(repository, INDEX_FILE)
+
+# ------------------------------ SUMMARY ------------------------------
+
+SUMMARY_FILE = os.path.join(DATA_DIR, 'summary.json')
+SUMMARY_VERSION = 1
+
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+IN_PROGRESS_STATUSES = ("in-progress", "in progress", "inprogress")
+
+def _app_contribution(app, fallback_mtime=None):
+    dt = parse_start_date(app)
+    if dt is None and fallback_mtime is not None:
+        dt = datetime.fromtimestamp(fallback_mtime)
+    return {"status": (app.get("status") or "").lower(), "month": dt.month if dt else 0}
+
+def _vuln_contribution(vulns):
+    counts = {"total": 0}
+    for v in vulns:
+        sev = (v.get("severity") or '').lower()
+        counts["total"] += 1
+        if sev in SEVERITIES:
+            counts[sev] = counts.get(sev, 0) + 1
+    return counts
+
+class SummaryStore:
+    """
+    Materialized dashboard counters (status counts, Jan..Dec start-month
+    histogram, severity counts) kept in backend/data/summary.json.
+
+    Each write replaces the previous per-application contribution, so the
+    dashboard endpoints never touch the application/vulnerability files.
+    Rebuild from the JSON tree with `python -m backend.tasks rebuild-summary`.
+    """
+
+    def __init__(self, repo, summary_file):
+        self.repo = repo
+        self.summary_file = summary_file
+        self._lock = threading.RLock()
+        self._state = None
+        self._file_sig = None
+
+    @staticmethod
+    def _empty():
+        return {
+            "version": SUMMARY_VERSION,
+            "apps": {},
+            "vulns": {},
+            "status_counts": {},
+            "monthly": [0] * 12,
+            "severity": {"total": 0, **{s: 0 for s in SEVERITIES}},
+        }
+
+    def _apply_app(self, state, contribution, sign):
+        counts = state["status_counts"]
+        counts[contribution["status"]] = counts.get(contribution["status"], 0) + sign
+        if not counts[contribution["status"]]:
+            del counts[contribution["status"]]
+        if contribution["month"]:
+            state["monthly"][contribution["month"] - 1] += sign
+
+    def _apply_vulns(self, state, contribution, sign):
+        for key, n in contribution.items():
+            state["severity"][key] += sign * n
+
+    def rebuild(self):
+        with self._lock, locks.hold("summary"):
+            state = self._empty()
+            for app in self.repo.list_applications():
+                app_id = app.get("id")
+                if not app_id:
+                    continue
+                try:
+                    mtime = os.path.getmtime(self.repo._app_path(app_id))
+                except OSError:
+                    mtime = None
+                contribution = _app_contribution(app, mtime)
+                state["apps"][app_id] = contribution
+                self._apply_app(state, contribution, +1)
+                vulns = _vuln_contribution(self.repo.load_vulnerabilities(app_id))
+                state["vulns"][app_id] = vulns
+                self._apply_vulns(state, vulns, +1)
+            self._state = state
+            self._file_sig = _replace_json(self.summary_file, state)
+            return state
+
+    def _current(self):
+        try:
+            sig = _file_signature(os.stat(self.summary_file))
+        except FileNotFoundError:
+            return self.rebuild()
+        if self._state is None or sig != self._file_sig:
+            try:
+                state = _read_json(self.summary_file)
+            except ValueError:
+                return self.rebuild()
+            if state.get("version") != SUMMARY_VERSION:
+                return self.rebuild()
+            self._state, self._file_sig = state, sig
+        return self._state
+
+    def record_application(self, app):
+        with self._lock, locks.hold("summary"):
+            state = self._current()
+            app_id = app["id"]
+            old = state["apps"].get(app_id)
+            if old:
+                self._apply_app(state, old, -1)
+            new = _app_contribution(app, datetime.now().timestamp())
+            state["apps"][app_id] = new
+            self._apply_app(state, new, +1)
+            self._file_sig = _replace_json(self.summary_file, state)
+
+    def record_vulnerabilities(self, app_id, vulns):
+        with self._lock, locks.hold("summary"):
+            state = self._current()
+            old = state["vulns"].get(app_id)
+            new = _vuln_contribution(vulns)
+            if old == new:
+                return   # e.g. a text edit: counts unchanged, skip rewriting summary.json
+            if old:
+                self._apply_vulns(state, old, -1)
+            state["vulns"][app_id] = new
+            self._apply_vulns(state, new, +1)
+            self._file_sig = _replace_json(self.summary_file, state)
+
+    def applications_summary(self):
+        with self._lock:
+            state = self._current()
+            counts = state["status_counts"]
+            return {
+                "total": len(state["apps"]),
+                "completed": counts.get("completed", 0),
+                "in_progress": sum(counts.get(s, 0) for s in IN_PROGRESS_STATUSES),
+                "monthly": list(state["monthly"]),
+            }
+
+    def vulnerabilities_summary(self):
+        with self._lock:
+            return dict(self._current()["severity"])
+
+summary_store = SummaryStore(repository, SUMMARY_FILE)
+
+# ---------------------------- JSON STORAGE ----------------------------
+
+def _page_vulnerabilities(positioned, severities, cvss_min, cvss_max, sort, descending, after, limit):
+    """Filter/sort/page one findings list given as (position, finding) pairs."""
+    sort_key = VULNERABILITY_SORT_KEYS[sort]
+    keyed = []
+    for position, v in positioned:
+        if severities and (v.get("severity") or "").lower() not in severities:
+            continue
+        cvss = cvss_value(v)
+        if (cvss_min is not None and cvss < cvss_min) or (cvss_max is not None and cvss > cvss_max):
+            continue
+        keyed.append(((sort_key(position, v), position), v))
+    return keyset_page(keyed, after, limit, descending)
 
 def format_ddmmyyyy(date_str):
     try:
@@ -24,7 +659,276 @@ def format_ddmmyyyy(date_str):
     except:
         return date_str
 
-def save_application(app_data):
+class JsonStorage:
+    """
+    The flat-file backend: one JSON file per application and per findings
+    list, with the id/status/month index and the summary store beside them.
+    Writes are serialized per application with cross-process file locks.
+    """
+
+    name = "json"
+
+    def load_applications(self):
+        return repository.list_applications()
+
+    def get_application(self, app_id):
+        """Load a single application by id, reading only its own JSON file."""
+        filename = app_index.file_for(app_id)
+        if not filename:
+            return None
+        app = repository.load_application_file(filename)
+        if app is None or app.get("id") != app_id:
+            # The file moved or was rewritten outside the index; rebuild and retry once.
+            app_index.rebuild()
+            filename = app_index.file_for(app_id)
+            app = repository.load_application_file(filename) if filename else None
+            if app is None or app.get("id") != app_id:
+                return None
+        app_index.refresh_entry(app_id, app)
+        return app
+
+    def _load_indexed(self, ids):
+        applications = []
+        for app_id in ids:
+            app = self.get_application(app_id)
+            if app:
+                applications.append(app)
+        return applications
+
+    def load_applications_by_status(self, status):
+        status = (status or "").lower()
+        return [a for a in self._load_indexed(app_index.ids_for_status(status))
+                if (a.get("status") or "").lower() == status]
+
+    def load_applications_by_month(self, month):
+        return self._load_indexed(app_index.ids_for_month(month))
+
+    def find_applications(self, app_ids=None, status=None, start_from=None, start_to=None):
+        # Ids and status go through the index; only the date range needs the parsed records.
+        if app_ids:
+            apps = self._load_indexed(dict.fromkeys(app_ids))
+            if status:
+                apps = [a for a in apps if (a.get("status") or "").lower() == status.lower()]
+        elif status:
+            apps = self.load_applications_by_status(status)
+        else:
+            apps = self.load_applications()
+
+        if start_from or start_to:
+            selected = []
+            for app in apps:
+                dt = parse_start_date(app)
+                if dt is None:
+                    continue
+                if start_from and dt.date() < start_from:
+                    continue
+                if start_to and dt.date() > start_to:
+                    continue
+                selected.append(app)
+            apps = selected
+        return apps
+
+    def list_applications_page(self, status=None, start_from=None, start_to=None,
+                               sort="name", descending=False, after=None, limit=None):
+        # Filter and sort index entries; only the page's own files are read.
+        sort_field = {"name": "name", "start_date": "day", "status": "status"}.get(sort)
+        start_from = start_from.isoformat() if start_from else None
+        start_to = start_to.isoformat() if start_to else None
+        keyed = []
+        for app_id, entry in app_index.entries().items():
+            if status and entry["status"] != status.lower():
+                continue
+            day = entry.get("day", "")
+            if (start_from or start_to) and not day:
+                continue
+            if (start_from and day < start_from) or (start_to and day > start_to):
+                continue
+            keyed.append(((entry.get(sort_field, "") if sort_field else app_id, app_id), app_id))
+        ids, next_key = keyset_page(keyed, after, limit, descending)
+        return self._load_indexed(ids), next_key
+
+    def save_application(self, app_id, app_data, expected_revision=None):
+        with _app_lock(app_id):
+            current = _revision_of(repository.load_application_file(f"{app_id}.json", fresh=True))
+            if expected_revision is not None and int(expected_revision) != current:
+                raise ConflictError(f"Application {app_id} was changed by someone else", current)
+            app_data["revision"] = current + 1
+            repository.save_application(app_id, app_data)
+            app_index.update(app_id, f"{app_id}.json", app_data)
+            summary_store.record_application(app_data)
+        return app_data["revision"]
+
+    def load_vulnerabilities(self, app_id):
+        return repository.load_vulnerabilities(app_id)
+
+    def load_vulnerabilities_with_revision(self, app_id):
+        revision = repository.vulnerabilities_revision(app_id)
+        return revision, repository.load_vulnerabilities(app_id)
+
+    def list_vulnerabilities_page(self, app_id, severities=None, cvss_min=None, cvss_max=None,
+                                  sort="position", descending=False, after=None, limit=None):
+        return _page_vulnerabilities(enumerate(repository.load_vulnerabilities(app_id)), severities,
+                                     cvss_min, cvss_max, sort, descending, after, limit)
+
+    def _write_vulnerabilities(self, app_id, data, expected_revision=None):
+        # caller holds the app lock
+        current = repository.vulnerabilities_revision(app_id)
+        if expected_revision is not None and int(expected_revision) != current:
+            raise ConflictError(f"Vulnerabilities of {app_id} were changed by someone else", current)
+        repository.save_vulnerabilities(app_id, data, revision=current + 1)
+        summary_store.record_vulnerabilities(app_id, data)
+        return current + 1
+
+    def append_vulnerabilities(self, app_id, new_vulns):
+        with _app_lock(app_id):
+            data = repository.load_vulnerabilities(app_id, fresh=True)
+            data.extend(new_vulns)
+            return self._write_vulnerabilities(app_id, data)
+
+    def save_vulnerabilities(self, app_id, data, expected_revision=None):
+        with _app_lock(app_id):
+            return self._write_vulnerabilities(app_id, data, expected_revision)
+
+    def apply_finding_op(self, app_id, op, expected_revision=None):
+        with _app_lock(app_id):
+            current = repository.vulnerabilities_revision(app_id)
+            if expected_revision is not None and int(expected_revision) != current:
+                raise ConflictError(f"Vulnerabilities of {app_id} were changed by someone else", current)
+            result = repository.apply_vulnerabilities_op(app_id, op, current + 1)
+            summary_store.record_vulnerabilities(app_id, repository.load_vulnerabilities(app_id))
+            return current + 1, result
+
+    def applications_summary(self):
+        return summary_store.applications_summary()
+
+    def vulnerabilities_summary(self):
+        return summary_store.vulnerabilities_summary()
+
+    def rebuild_summary(self):
+        state = summary_store.rebuild()
+        return len(state["apps"]), state["severity"]["total"]
+
+# ---------------------------- GENERATIONS ----------------------------
+# Change counters for caches of derived data (backend/response_cache.py).
+# Every write through the model API below bumps the scopes it affects:
+#   "applications"        any application saved (listings, applications summary)
+#   "findings"            any findings list changed (vulnerabilities summary)
+#   "findings-<app_id>"   that application's findings
+
+APPLICATIONS_SCOPE = "applications"
+FINDINGS_SCOPE = "findings"
+APP_FINDINGS_SCOPE = "findings-{app_id}"
+GENERATION_RESET_BYTES = 64 * 1024
+
+class Generations:
+    """
+    Per-scope generation files shared by every process. A bump appends one
+    byte, which needs no lock and always moves the file's signature
+    forward; reading a scope's token is one stat. Files are started afresh
+    (new inode and mtime) once they reach GENERATION_RESET_BYTES.
+    """
+
+    NEVER_BUMPED = (0, 0, 0)
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._listeners = []
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, scope):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in scope)
+        return os.path.join(self.directory, safe)
+
+    def token(self, scope):
+        """
+        (inode, size, mtime_ns) of the scope, or NEVER_BUMPED when it has no
+        file yet. Only bump creates files, so reads of arbitrary scope names
+        (URL arguments) leave nothing behind.
+        """
+        try:
+            st = os.stat(self._path(scope))
+        except FileNotFoundError:
+            return self.NEVER_BUMPED
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def bump(self, *scopes):
+        for scope in scopes:
+            path = self._path(scope)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                os.write(fd, b".")
+            finally:
+                os.close(fd)
+            if size >= GENERATION_RESET_BYTES:
+                _replace_bytes(path, b".")
+        for listener in self._listeners:
+            listener(scopes)
+
+    def subscribe(self, listener):
+        """Call listener(scopes) after every bump made by this process."""
+        self._listeners.append(listener)
+
+generations = Generations(GENERATIONS_DIR)
+
+# ------------------------------ MODEL API ------------------------------
+# Every caller goes through these functions; config.STORAGE_BACKEND picks
+# the implementation ("json" above, or "sqlite" in backend/sqlite_store.py).
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == "sqlite":
+                    from backend.sqlite_store import SqliteStorage
+                    _storage = SqliteStorage(SQLITE_PATH)
+                elif STORAGE_BACKEND == "json":
+                    _storage = JsonStorage()
+                else:
+                    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return _storage
+
+def load_applications():
+    return get_storage().load_applications()
+
+def get_application(app_id):
+    return get_storage().get_application(app_id)
+
+def load_applications_by_status(status):
+    return get_storage().load_applications_by_status(status)
+
+def load_applications_by_month(month):
+    """month is 'YYYY-MM' of the application's start date."""
+    return get_storage().load_applications_by_month(month)
+
+def find_applications(app_ids=None, status=None, start_from=None, start_to=None):
+    """
+    Select applications by explicit ids and/or status and an inclusive
+    start-date range (datetime.date bounds).
+    """
+    return get_storage().find_applications(app_ids=app_ids, status=status,
+                                           start_from=start_from, start_to=start_to)
+
+def page_applications(status=None, start_from=None, start_to=None,
+                      sort="name", descending=False, after=None, limit=None):
+    """
+    One page of applications, filtered by status and an inclusive start-date
+    range and ordered by name/start_date/status/id (id breaks ties). `after`
+    is the key returned with the previous page. Returns (apps, next key or None).
+    """
+    return get_storage().list_applications_page(status=status, start_from=start_from, start_to=start_to,
+                                                sort=sort, descending=descending, after=after, limit=limit)
+
+def save_application(app_data, expected_revision=None):
+    """
+    Write an application and return its new revision. With expected_revision
+    (the revision the client loaded), a concurrent edit raises ConflictError
+    instead of being silently overwritten.
+    """
     app_id = app_data.get('id')
     if not app_id:
         app_id = f"app_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
@@ -36,34 +940,147 @@ def save_application(app_data):
     if "end_date" in app_data:
         app_data["end_date"] = format_ddmmyyyy(app_data["end_date"])
 
-    filepath = os.path.join(APPS_DIR, f"{app_id}.json")
-    with open(filepath, 'w') as f:
-        json.dump(app_data, f, indent=2)
+    revision = get_storage().save_application(app_id, app_data, expected_revision)
+    generations.bump(APPLICATIONS_SCOPE)
+    return revision
 
 def load_vulnerabilities(app_id):
-    filepath = os.path.join(VULNS_DIR, f"{app_id}.json")
-    if not os.path.exists(filepath):
-        return []
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    return get_storage().load_vulnerabilities(app_id)
 
-def save_vulnerability(app_id, vuln_data, modified_by="system"):
-    filepath = os.path.join(VULNS_DIR, f"{app_id}.json")
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-    else:
-        data = []
+def load_vulnerabilities_with_revision(app_id):
+    """(revision, findings) for an edit form that echoes the revision back on save."""
+    return get_storage().load_vulnerabilities_with_revision(app_id)
+
+def page_vulnerabilities(app_id, severities=None, cvss_min=None, cvss_max=None,
+                         sort="position", descending=False, after=None, limit=None):
+    """
+    One page of an application's findings, filtered by severity (a set of
+    lower-cased names) and an inclusive CVSS range, ordered by
+    position/cvss/severity/title. Returns (findings, next key or None).
+    """
+    return get_storage().list_vulnerabilities_page(app_id, severities=severities, cvss_min=cvss_min,
+                                                   cvss_max=cvss_max, sort=sort, descending=descending,
+                                                   after=after, limit=limit)
 
+def save_vulnerability(app_id, vuln_data, modified_by="system"):
     vuln_data['created_at'] = datetime.utcnow().isoformat()
     vuln_data['modified_by'] = modified_by
-    data.append(vuln_data)
+    return append_vulnerabilities(app_id, [vuln_data])
+
+def append_vulnerabilities(app_id, new_vulns):
+    """Add findings atomically against the stored list, so concurrent adds are kept."""
+    revision = get_storage().append_vulnerabilities(app_id, assign_uids(new_vulns))
+    _findings_written(app_id)
+    return revision
+
+def save_vulnerabilities(app_id, data, expected_revision=None):
+    """Overwrite all vulnerabilities for a given application ID; returns the new revision."""
+    revision = get_storage().save_vulnerabilities(app_id, assign_uids(data), expected_revision)
+    _findings_written(app_id)
+    return revision
+
+_uids_stored = set()   # app ids whose stored findings all have uids (every save assigns them)
+
+def load_findings(app_id):
+    """
+    (revision, findings) for the granular findings API. Lists saved before
+    findings had stable uids are given derived ones in memory only; the
+    first granular edit stores them (see apply_finding_op).
+    """
+    revision, vulns = load_vulnerabilities_with_revision(app_id)
+    return revision, assign_uids(vulns) if missing_uids(vulns) else vulns
+
+def _store_derived_uids(app_id, expected_revision):
+    """
+    Before the first granular edit of a list saved without uids, save the
+    uids load_findings has been handing out. Returns the revision the edit
+    should expect: a client that read the list before this save did not
+    conflict with it.
+    """
+    if app_id in _uids_stored:
+        return expected_revision
+    revision, vulns = load_vulnerabilities_with_revision(app_id)
+    if missing_uids(vulns):
+        try:
+            stored = save_vulnerabilities(app_id, vulns, expected_revision=revision)
+        except ConflictError:
+            return expected_revision   # another write got there first (and assigned the uids)
+        if expected_revision is not None and int(expected_revision) == revision:
+            expected_revision = stored
+    _uids_stored.add(app_id)
+    return expected_revision
+
+def apply_finding_op(app_id, op, expected_revision=None):
+    """
+    Apply one granular edit (see backend/findings.py) and return
+    (revision, affected finding or None). Only the change is written:
+    a journal line for JSON storage, the touched rows for SQLite.
+    """
+    op = prepare_op(op)
+    expected_revision = _store_derived_uids(app_id, expected_revision)
+    revision, result = get_storage().apply_finding_op(app_id, op, expected_revision)
+    _findings_written(app_id)
+    return revision, (dict(result) if result is not None else None)
+
+def applications_summary():
+    return get_storage().applications_summary()
+
+def vulnerabilities_summary():
+    return get_storage().vulnerabilities_summary()
+
+def rebuild_summary():
+    """Recompute the dashboard counters; returns (applications, vulnerabilities)."""
+    counts = get_storage().rebuild_summary()
+    generations.bump(APPLICATIONS_SCOPE, FINDINGS_SCOPE)
+    return counts
+
+# ------------------------------ SEARCH ------------------------------
+# backend/search.py keeps a full-text index beside whichever backend is in
+# use; every findings write above re-indexes the findings that changed and
+# records which screenshot blobs their steps reference.
+
+def _findings_written(app_id):
+    generations.bump(FINDINGS_SCOPE, APP_FINDINGS_SCOPE.format(app_id=app_id))
+    # The write is already committed: nothing below may fail the request,
+    # or the client would retry a save that succeeded.
+    try:
+        revision, vulns = load_vulnerabilities_with_revision(app_id)
+    except Exception:
+        log.exception(f"Search index and screenshot references not updated for {app_id}")
+        return
+    try:
+        get_search_index().index_findings(app_id, revision, vulns)
+    except Exception:
+        # The data is saved; rebuild-search repairs the index later.
+        log.exception(f"Search index not updated for {app_id}")
+    try:
+        screenshot_store.record_references(app_id, revision, vulns)
+    except Exception:
+        # gc-screenshots rescans the findings before deleting anything.
+        log.exception(f"Screenshot references not updated for {app_id}")
+
+def rebuild_search_index():
+    """Re-index every application's findings and the templates; returns findings indexed."""
+    lists = ((app["id"],) + tuple(load_vulnerabilities_with_revision(app["id"]))
+             for app in load_applications() if app.get("id"))
+    return get_search_index().rebuild(lists)
+
+def search_findings(query, kind=None, app_id=None, severities=None, limit=20):
+    """
+    Ranked full-text matches over findings and templates (title, summary,
+    description, impact, recommendation, CWE and URL), each with a snippet.
+    The index is built on first use if it does not exist yet.
+    """
+    index = get_search_index()
+    if not index.is_built():
+        log.info("Building the search index...")
+        rebuild_search_index()
+    return index.search(query, kind=kind, app_id=app_id, severities=severities, limit=limit)
 
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+# ---------------------------- SCREENSHOTS ----------------------------
 
-def save_vulnerabilities(app_id, data):
-    """Overwrite all vulnerabilities for a given application ID."""
-    filepath = os.path.join(VULNS_DIR, f"{app_id}.json")
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=2)
+def rebuild_screenshot_references():
+    """Recount the screenshot blobs every finding step uses; returns blobs referenced."""
+    lists = ((app["id"],) + tuple(load_vulnerabilities_with_revision(app["id"]))
+             for app in load_applications() if app.get("id"))
+    return screenshot_store.rebuild_references(lists)
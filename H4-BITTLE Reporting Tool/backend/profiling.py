@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from backend import metrics
+
+try:
+    import resource      # not on Windows
+except ImportError:
+    resource = None
+
+# Instrumentation for report exports. Every Word/Excel export collects
+# per-stage wall and CPU time, image counts and bytes, memory and output
+# size into an ExportStats, logs it as one JSON line on the "h4.export"
+# logger, and can hand it back to the caller (?stats=1 on the export API).
+# profile=True additionally runs that single export under cProfile and
+# tracemalloc and dumps the profile to exports/profiles/.
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), '..', 'exports', 'profiles')
+PROFILE_TOP = 25            # functions listed in the text summary next to the .prof
+
+# tracemalloc is process-wide: a second profiled export would restart and
+# stop the first one's tracing, so profiled exports take turns
+_profile_lock = threading.Lock()
+
+log = logging.getLogger("h4.export")
+if not log.handlers:
+    # One line per export on stderr unless the deployment configures logging
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class ExportStats:
+    """Wall/CPU milliseconds per named stage plus free-form counters for one export."""
+
+    def __init__(self, kind, app_id):
+        self.kind = kind
+        self.app_id = app_id
+        self.stages = {}      # name -> [wall_ms, cpu_ms]
+        self.counters = {}
+        self.extra = {}
+
+    @contextmanager
+    def stage(self, name):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_stage(name, (time.perf_counter() - wall) * 1000, (time.thread_time() - cpu) * 1000)
+
+    def add_stage(self, name, wall_ms, cpu_ms=0.0):
+        """Record time measured elsewhere, e.g. returned by an image pool worker."""
+        totals = self.stages.setdefault(name, [0.0, 0.0])
+        totals[0] += wall_ms
+        totals[1] += cpu_ms
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name, value):
+        self.extra[name] = value
+
+    def report(self):
+        return dict(
+            self.extra,
+            kind=self.kind,
+            app_id=self.app_id,
+            stages={name: {"wall_ms": round(wall, 1), "cpu_ms": round(cpu, 1)}
+                    for name, (wall, cpu) in self.stages.items()},
+            **self.counters,
+        )
+
+@contextmanager
+def instrument_export(kind, app_id, stats=None, profile=False):
+    """
+    Measure one export. Yields the ExportStats (a new one unless `stats` is
+    passed in); on exit adds totals, memory and output size and logs the
+    report. With profile, the export also runs under cProfile and
+    tracemalloc and the report gains the path of the dumped profile; it
+    waits for any other profiled export in this process to finish first.
+    """
+    with _profile_lock if profile else nullcontext():
+        with _measure_export(kind, app_id, stats, profile) as stats:
+            yield stats
+
+@contextmanager
+def _measure_export(kind, app_id, stats, profile):
+    stats = stats or ExportStats(kind, app_id)
+    rss_before = _max_rss_mb()
+    profiler = None
+    if profile:
+        tracemalloc.start()
+        profiler = cProfile.Profile()
+        profiler.enable()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    ok = False
+    try:
+        yield stats
+        ok = True
+    finally:
+        stats.set("total_ms", round((time.perf_counter() - wall) * 1000, 1))
+        stats.set("cpu_ms", round((time.thread_time() - cpu) * 1000, 1))
+        if profiler is not None:
+            profiler.disable()
+            stats.set("peak_alloc_mb", round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1))
+            tracemalloc.stop()
+            stats.set("profile", _dump_profile(profiler, kind, app_id))
+        rss_after = _max_rss_mb()
+        if rss_after is not None:
+            stats.set("peak_rss_mb", rss_after)
+            stats.set("peak_rss_growth_mb", round(rss_after - rss_before, 1))
+        output = stats.extra.get("output_path")
+        if output and os.path.exists(output):
+            stats.set("output_bytes", os.path.getsize(output))
+        stats.set("ok", ok and bool(output))   # False on errors and when there was nothing to export
+        result = ("cached" if stats.extra.get("cached") else "rendered") if stats.extra["ok"] else "failed"
+        metrics.exports.inc(kind, result)
+        metrics.export_latency.observe(kind, seconds=time.perf_counter() - wall)
+        log.info(json.dumps(dict(stats.report(), event="export",
+                                 timestamp=datetime.utcnow().isoformat()), default=str))
+
+def _dump_profile(profiler, kind, app_id):
+    """Write <kind>_<app>_<time>.prof (for snakeviz/pstats) and a .txt top list beside it."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"{kind}_{app_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}")
+    profiler.dump_stats(f"{base}.prof")
+    with open(f"{base}.txt", "w") as f:
+        pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    return os.path.abspath(f"{base}.prof")
@@ -0,0 +1,121 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, current_app
+
+from backend import metrics
+from backend.models import generations
+
+# Serialized bodies of the read-only JSON APIs, kept in a bounded LRU keyed
+# by path and query string. Each entry remembers the generation tokens
+# (backend/models.py) of the data scopes it was built from. A lookup stats
+# those scopes: unchanged means the stored bytes are served (or a 304),
+# changed means the view runs again. Writes in this process also drop the
+# affected entries at once; other workers see the new tokens on their next
+# lookup. Tokens are read before the view runs, so a write racing with it
+# can only cost a recompute, never a stale body.
+
+RESPONSE_CACHE_ENTRIES = 512
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+KEPT_HEADERS = ("X-Revision",)
+
+class _Entry:
+    __slots__ = ("scopes", "tokens", "body", "etag", "last_modified", "headers")
+
+    def __init__(self, scopes, tokens, body, headers):
+        self.scopes = scopes
+        self.tokens = tokens
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        # The newest write to any of the scopes (generation files are stamped when
+        # bumped); None when none was ever written, so only the ETag applies
+        newest = max(t[2] for t in tokens)
+        self.last_modified = datetime.fromtimestamp(newest / 1e9, tz=timezone.utc) if newest else None
+        self.headers = headers
+
+class ResponseCache:
+    def __init__(self, max_entries=RESPONSE_CACHE_ENTRIES, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> _Entry, least recently used first
+        self._bytes = 0
+
+    def get(self, key, tokens):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.tokens != tokens:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if len(entry.body) > self.max_bytes // 4:
+            return   # one huge listing should not flush everything else
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, scopes):
+        """Drop every entry built from any of these scopes."""
+        scopes = set(scopes)
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if scopes.intersection(e.scopes)]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _drop(self, key):
+        self._bytes -= len(self._entries.pop(key).body)
+
+response_cache = ResponseCache()
+generations.subscribe(response_cache.invalidate)
+
+def _respond(entry, hit):
+    response = current_app.response_class(entry.body, mimetype="application/json")
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers.extend(entry.headers)
+    response.headers["X-Cache"] = "hit" if hit else "miss"
+    return response.make_conditional(request)
+
+def cached_json(*scopes):
+    """
+    Serve a GET view's JSON from response_cache while the given data scopes
+    are unchanged, and answer If-None-Match / If-Modified-Since with 304.
+    Scope names may use the view's URL arguments, e.g. "findings-{app_id}".
+    Only 200 responses are stored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            names = tuple(scope.format(**kwargs) for scope in scopes)
+            tokens = tuple(generations.token(name) for name in names)
+            key = request.full_path
+            entry = response_cache.get(key, tokens)
+            metrics.count_cache("responses", hits=1 if entry else 0, misses=0 if entry else 1)
+            if entry is not None:
+                return _respond(entry, hit=True)
+            response = current_app.make_response(view(**kwargs))
+            if response.status_code != 200 or response.mimetype != "application/json":
+                return response
+            headers = [(h, response.headers[h]) for h in KEPT_HEADERS if h in response.headers]
+            entry = _Entry(names, tokens, response.get_data(), headers)
+            response_cache.put(key, entry)
+            return _respond(entry, hit=False)
+        return wrapper
+    return decorator
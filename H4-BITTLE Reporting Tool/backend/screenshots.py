@@ -0,0 +1,288 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from collections import Counter
+from backend.config import DATA_DIR, SCREENSHOT_DIR
+from backend.locks import FileLocks
+
+# Content-addressed screenshot storage. An upload is streamed to a temp file
+# in static/screenshots/.incoming while it is hashed, then hard-linked to
+# <sha256>.<ext>; if that blob already exists the upload is simply dropped,
+# so identical images are stored once and never overwrite each other.
+# Findings keep the blob name in step["screenshot"] as before, and every
+# findings write records how many steps of that application reference each
+# blob (data/screenshot_refs/<app_id>.json). `gc-screenshots` deletes blobs
+# no step references any more, with their derivatives (thumbnail, export
+# rendition) from static/screenshots/derived/<sha256>.<kind>.
+
+INCOMING_DIR = os.path.join(SCREENSHOT_DIR, '.incoming')
+DERIVED_DIR = os.path.join(SCREENSHOT_DIR, 'derived')
+REFS_DIR = os.path.join(DATA_DIR, 'screenshot_refs')
+
+CHUNK_SIZE = 256 * 1024
+GC_GRACE_S = 24 * 3600     # uploads not yet saved into a finding are kept this long
+
+BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]{1,5})$")
+
+# Leading bytes -> extension. The extension is part of the content address,
+# so it is taken from the content, never from the client's filename.
+MAGIC = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+)
+
+def sniff_extension(head):
+    for magic, ext in MAGIC:
+        if head.startswith(magic):
+            return ext
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return "bin"
+
+def is_blob(name):
+    return bool(name) and BLOB_NAME.match(name) is not None
+
+class HashingUpload:
+    """
+    Writable temp file that hashes what is written to it. Used as the
+    multipart stream factory, so each uploaded part goes to disk and through
+    sha256 in a single pass. The temp file is removed on close.
+    """
+
+    def __init__(self, directory=INCOMING_DIR):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix=".part")
+        self._file = os.fdopen(fd, "w+b")
+        self._hash = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+
+    def write(self, data):
+        self._hash.update(data)
+        if len(self.head) < 16:
+            self.head += bytes(data[:16 - len(self.head)])
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        # read, readline, seek, tell, flush, ... straight from the file
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def close(self):
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _write_json(path, payload):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+def step_references(vulns):
+    """Counter of blob name -> number of steps in this findings list that use it."""
+    refs = Counter()
+    for v in vulns:
+        for s in v.get("steps") or []:
+            name = (s.get("screenshot") or "").strip() if isinstance(s, dict) else ""
+            if is_blob(name):
+                refs[name] += 1
+    return refs
+
+class ScreenshotStore:
+
+    def __init__(self, directory=SCREENSHOT_DIR, refs_dir=REFS_DIR):
+        self.directory = directory
+        self.incoming = os.path.join(directory, '.incoming')
+        self.derived = os.path.join(directory, 'derived')
+        self.refs_dir = refs_dir
+        self.locks = FileLocks(os.path.join(refs_dir, 'locks'))
+        os.makedirs(self.incoming, exist_ok=True)
+        os.makedirs(self.derived, exist_ok=True)
+
+    # ------------------------------ UPLOADS ------------------------------
+
+    def new_upload(self):
+        return HashingUpload(self.incoming)
+
+    def ingest(self, file_storage):
+        """
+        Store an uploaded file (a werkzeug FileStorage) and return its blob
+        name. Parts received through HashingUpload are already on disk and
+        hashed; anything else is streamed through one here.
+        """
+        stream = file_storage.stream
+        if isinstance(stream, HashingUpload) and stream.size:
+            stream.flush()
+            return self._commit(stream)
+        with self.new_upload() as upload:
+            stream.seek(0)
+            shutil.copyfileobj(stream, upload, CHUNK_SIZE)
+            upload.flush()
+            return self._commit(upload)
+
+    def ingest_path(self, path):
+        """Store an existing file (e.g. a legacy screenshot); returns its blob name."""
+        with open(path, "rb") as src, self.new_upload() as upload:
+            shutil.copyfileobj(src, upload, CHUNK_SIZE)
+            upload.flush()
+            return self._commit(upload)
+
+    def _commit(self, upload):
+        name = f"{upload.hexdigest()}.{sniff_extension(upload.head)}"
+        target = os.path.join(self.directory, name)
+        if os.path.exists(target):
+            # Already stored: nothing to write. Touch it so a collection
+            # running before this upload is saved into a finding keeps it.
+            os.utime(target)
+            return name
+        os.chmod(upload.path, 0o644)
+        try:
+            os.link(upload.path, target)
+        except FileExistsError:
+            os.utime(target)
+        except OSError:
+            # No hard links here (some network or FAT file systems): copy.
+            tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.copyfile(upload.path, tmp)
+            os.replace(tmp, target)
+        return name
+
+    def path_for(self, name):
+        return os.path.join(self.directory, name) if is_blob(name) else None
+
+    def derived_path(self, name, kind):
+        """Where the `kind` derivative (e.g. "thumb.webp") of blob `name` lives."""
+        blob = BLOB_NAME.match(name or "")
+        return os.path.join(self.derived, f"{blob.group(1)}.{kind}") if blob else None
+
+    # ---------------------------- REFERENCES ----------------------------
+
+    def _refs_path(self, app_id):
+        return os.path.join(self.refs_dir, f"{app_id}.json")
+
+    def _read_refs(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def record_references(self, app_id, revision, vulns):
+        """
+        Store the per-blob step counts of an application's findings. Older
+        revisions than the one recorded are ignored, and the file is only
+        rewritten when the counts change.
+        """
+        refs = dict(step_references(vulns))
+        path = self._refs_path(app_id)
+        with self.locks.hold(f"refs-{app_id}"):
+            current = self._read_refs(path)
+            if current is not None:
+                if revision is not None and (current.get("revision") or 0) > revision:
+                    return
+                if current.get("refs") == refs:
+                    return
+            elif not refs:
+                return
+            os.makedirs(self.refs_dir, exist_ok=True)
+            _write_json(path, {"revision": revision, "refs": refs})
+
+    def reference_counts(self):
+        """Counter of blob name -> steps referencing it, over all applications."""
+        total = Counter()
+        try:
+            names = os.listdir(self.refs_dir)
+        except FileNotFoundError:
+            return total
+        for filename in names:
+            if filename.endswith(".json"):
+                entry = self._read_refs(os.path.join(self.refs_dir, filename)) or {}
+                total.update(entry.get("refs") or {})
+        return total
+
+    def rebuild_references(self, lists):
+        """Re-record every application from (app_id, revision, vulns); returns blobs referenced."""
+        seen = set()
+        for app_id, revision, vulns in lists:
+            seen.add(f"{app_id}.json")
+            path = self._refs_path(app_id)
+            with self.locks.hold(f"refs-{app_id}"):
+                os.makedirs(self.refs_dir, exist_ok=True)
+                _write_json(path, {"revision": revision, "refs": dict(step_references(vulns))})
+        for filename in os.listdir(self.refs_dir) if os.path.isdir(self.refs_dir) else ():
+            if filename.endswith(".json") and filename not in seen:
+                os.remove(os.path.join(self.refs_dir, filename))
+        return len(self.reference_counts())
+
+    # ------------------------------ CLEANUP ------------------------------
+
+    def collect_garbage(self, grace_s=GC_GRACE_S, dry_run=False):
+        """
+        Delete blobs no finding step references and abandoned upload temp
+        files, if older than grace_s, and the derivatives of blobs that are
+        gone. Returns (paths removed, bytes freed); with dry_run nothing is
+        deleted and the paths are those that would be.
+        """
+        referenced = self.reference_counts()
+        cutoff = time.time() - grace_s
+        removed, freed = [], 0
+        candidates = [(self.directory, n) for n in os.listdir(self.directory)
+                      if is_blob(n) and not referenced.get(n)]
+        candidates += [(self.incoming, n) for n in os.listdir(self.incoming)]
+        doomed = set()
+        for directory, name in candidates:
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if st.st_mtime > cutoff:
+                continue
+            doomed.add(name.split(".")[0])
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+            removed.append(path)
+            freed += st.st_size
+        blobs = {n.split(".")[0] for n in os.listdir(self.directory) if is_blob(n)}
+        for name in os.listdir(self.derived):
+            sha = name.split(".")[0]
+            if sha in blobs and not (dry_run and sha in doomed):
+                continue
+            path = os.path.join(self.derived, name)
+            try:
+                size = os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+            except OSError:
+                continue
+            removed.append(path)
+            freed += size
+        return removed, freed
+
+screenshot_store = ScreenshotStore()
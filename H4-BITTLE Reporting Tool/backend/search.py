@@ -0,0 +1,305 @@
+import os
+import re
+import html
+import json
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from backend.config import SEARCH_PATH, TEMPLATES_FILE
+
+# Full-text search over findings and vulnerability templates.
+#
+# The index is its own SQLite FTS5 database (H4_SEARCH_PATH), whichever
+# storage backend holds the data. `entries` maps each indexed document to
+# its owner plus the content digest it was indexed with; `docs` is the FTS5
+# table sharing its rowid. Saving a findings list re-indexes only the
+# findings whose digest changed, and a list is never replaced by an older
+# revision of itself, so concurrent workers cannot regress it.
+
+SCHEMA_VERSION = 1
+BUSY_TIMEOUT_S = 30
+
+FIELDS = ("title", "summary", "description", "impact", "recommendation", "cwe", "url")
+# bm25 weight per column, in FIELDS order: a hit in the title counts most
+WEIGHTS = (10.0, 4.0, 1.0, 1.0, 2.0, 5.0, 2.0)
+
+KINDS = ("finding", "template")
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SNIPPET_TOKENS = 16
+RANK_WINDOW = 2000   # broad queries rank the newest this many matches
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS entries (
+    rowid     INTEGER PRIMARY KEY,
+    kind      TEXT NOT NULL,              -- finding | template
+    app_id    TEXT NOT NULL DEFAULT '',
+    uid       TEXT,
+    title     TEXT NOT NULL DEFAULT '',
+    severity  TEXT NOT NULL DEFAULT '',
+    cvss      TEXT NOT NULL DEFAULT '',
+    digest    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_owner ON entries(kind, app_id);
+
+-- owner holds one token naming the application (or "templates") so a
+-- scoped search is an FTS intersection instead of a join over every match
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5({', '.join(FIELDS)}, owner, tokenize = 'porter unicode61', prefix = '2 3');
+
+CREATE TABLE IF NOT EXISTS lists (
+    kind      TEXT NOT NULL,
+    app_id    TEXT NOT NULL,
+    revision  INTEGER NOT NULL,           -- findings revision; templates file mtime_ns
+    PRIMARY KEY (kind, app_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key       TEXT PRIMARY KEY,
+    value     TEXT
+);
+"""
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+def _digest(kind, doc):
+    payload = [kind, doc.get("uid")] + [_text(doc.get(f)) for f in FIELDS + ("severity", "cvss")]
+    return hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest()
+
+def owner_token(kind, app_id):
+    if kind == "template":
+        return "templates"
+    return "app" + hashlib.sha1(app_id.encode("utf-8")).hexdigest()[:20]
+
+def match_expression(query, owner=None):
+    """
+    User text -> FTS5 query over the searchable fields: every word must
+    match, the last one as a prefix so results follow typing. Operators and
+    quotes are not passed through, so any input is a valid query. None when
+    there are no words.
+    """
+    tokens = _TOKEN.findall(query or "")
+    if not tokens:
+        return None
+    terms = [f'"{t}"' for t in tokens]
+    terms[-1] += "*"
+    expression = "{%s} : (%s)" % (" ".join(FIELDS), " ".join(terms))
+    if owner:
+        expression += f' AND owner : "{owner}"'
+    return expression
+
+def _highlighter(query):
+    # Words starting with a query word cut back towards its stem, so "limiting"
+    # also marks "limit" (the index matches with the porter stemmer).
+    stems = sorted({t.lower()[:max(4, len(t) - 3)] for t in _TOKEN.findall(query or "")}, key=len, reverse=True)
+    return re.compile(r"\b(?:%s)\w*" % "|".join(re.escape(t) for t in stems), re.IGNORECASE)
+
+def _snippet(texts, hit):
+    """
+    ~SNIPPET_TOKENS words of the body field (not the title, which results
+    carry anyway) with the most weighted hits, starting just before the
+    first one. HTML-escaped; hits in <mark>.
+    """
+    best, best_score = None, 0
+    for text, weight in zip(texts[1:], WEIGHTS[1:]):
+        score = len(hit.findall(text)) * weight
+        if score > best_score:
+            best, best_score = text, score
+    if best is None:
+        best = next((t for t in texts[1:] if t), "")
+    first = hit.search(best)
+    before = best[:first.start()].split() if first else []
+    start = max(0, len(before) - 3)
+    words = before[start:] + best[first.start() if first else 0:].split()
+    window = words[:SNIPPET_TOKENS]
+    marked = []
+    pos = 0
+    text = " ".join(window)
+    for m in hit.finditer(text):
+        marked.append(html.escape(text[pos:m.start()]) + f"<mark>{html.escape(m.group(0))}</mark>")
+        pos = m.end()
+    marked.append(html.escape(text[pos:]))
+    return ("… " if start else "") + "".join(marked) + (" …" if len(words) > SNIPPET_TOKENS else "")
+
+class SearchIndex:
+    """FTS5 index of findings (per application) and vulnerability templates."""
+
+    def __init__(self, path, templates_file=TEMPLATES_FILE):
+        self.path = path
+        self.templates_file = templates_file
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # ---- updates ----
+    def _sync(self, conn, kind, app_id, docs):
+        """Make the indexed documents of one owner match `docs`, touching only changes."""
+        existing = {}
+        for rowid, digest in conn.execute("SELECT rowid, digest FROM entries WHERE kind = ? AND app_id = ?",
+                                          (kind, app_id)):
+            existing.setdefault(digest, []).append(rowid)
+        added = removed = 0
+        for doc in docs:
+            if not isinstance(doc, dict):
+                continue
+            digest = _digest(kind, doc)
+            if existing.get(digest):
+                existing[digest].pop()
+                continue
+            cur = conn.execute("INSERT INTO entries (kind, app_id, uid, title, severity, cvss, digest) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (kind, app_id, doc.get("uid"), _text(doc.get("title")),
+                                _text(doc.get("severity")), _text(doc.get("cvss")), digest))
+            conn.execute(f"INSERT INTO docs (rowid, {', '.join(FIELDS)}, owner) VALUES (?{', ?' * len(FIELDS)}, ?)",
+                         [cur.lastrowid] + [_text(doc.get(f)) for f in FIELDS] + [owner_token(kind, app_id)])
+            added += 1
+        for rowids in existing.values():
+            for rowid in rowids:
+                conn.execute("DELETE FROM docs WHERE rowid = ?", (rowid,))
+                conn.execute("DELETE FROM entries WHERE rowid = ?", (rowid,))
+                removed += 1
+        return added, removed
+
+    def index_findings(self, app_id, revision, vulns):
+        """Re-index one application's findings; a write older than the indexed revision is ignored."""
+        with self._write() as conn:
+            row = conn.execute("SELECT revision FROM lists WHERE kind = 'finding' AND app_id = ?",
+                               (app_id,)).fetchone()
+            if row and revision is not None and row[0] > revision:
+                return 0, 0
+            changes = self._sync(conn, "finding", app_id, vulns)
+            conn.execute("INSERT OR REPLACE INTO lists VALUES ('finding', ?, ?)", (app_id, revision or 0))
+            return changes
+
+    def _templates_signature(self):
+        try:
+            return os.stat(self.templates_file).st_mtime_ns
+        except OSError:
+            return 0
+
+    def refresh_templates(self):
+        """Re-index vuln_templates.json if it changed since it was indexed."""
+        sig = self._templates_signature()
+        row = self._conn().execute("SELECT revision FROM lists WHERE kind = 'template' AND app_id = ''").fetchone()
+        if row and row[0] == sig:
+            return
+        try:
+            with open(self.templates_file, encoding="utf-8") as f:
+                templates = json.load(f)
+        except (OSError, ValueError):
+            templates = []
+        docs = [dict(t, uid=str(i)) for i, t in enumerate(templates) if isinstance(t, dict)]
+        with self._write() as conn:
+            self._sync(conn, "template", "", docs)
+            conn.execute("INSERT OR REPLACE INTO lists VALUES ('template', '', ?)", (sig,))
+
+    def rebuild(self, lists):
+        """Re-index everything from (app_id, revision, findings) triples; returns findings indexed."""
+        total = 0
+        with self._write() as conn:
+            conn.execute("DELETE FROM docs")
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM lists")
+            for app_id, revision, vulns in lists:
+                total += self._sync(conn, "finding", app_id, vulns)[0]
+                conn.execute("INSERT OR REPLACE INTO lists VALUES ('finding', ?, ?)", (app_id, revision or 0))
+            conn.execute("INSERT OR REPLACE INTO meta VALUES ('built', '1')")
+        self.refresh_templates()
+        return total
+
+    def is_built(self):
+        return self._conn().execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is not None
+
+    # ---- queries ----
+    def search(self, query, kind=None, app_id=None, severities=None, limit=DEFAULT_LIMIT):
+        """
+        Ranked matches (best first) with an HTML-escaped snippet of the best
+        matching field, hits wrapped in <mark>.
+        """
+        owner = None
+        if app_id:
+            owner = owner_token("finding", app_id)
+        elif kind == "template":
+            owner = owner_token("template", "")
+        expression = match_expression(query, owner)
+        if expression is None:
+            return []
+        if kind in (None, "template"):
+            self.refresh_templates()
+        where, params = ["docs MATCH ?"], [expression]
+        if kind or app_id:
+            where.append("e.kind = ?")
+            params.append(kind or "finding")
+        if app_id:
+            where.append("e.app_id = ?")   # the owner token is a hash; confirm
+            params.append(app_id)
+        if severities:
+            where.append(f"lower(e.severity) IN ({','.join('?' * len(severities))})")
+            params.extend(sorted(severities))
+        # Score only the newest RANK_WINDOW matches: FTS5 walks matches in rowid
+        # order, so this bounds the work for words that occur everywhere.
+        sql = (f"SELECT rowid, score FROM ("
+               f"SELECT docs.rowid AS rowid, bm25(docs, {', '.join(str(w) for w in WEIGHTS)}, 0) AS score "
+               f"FROM docs JOIN entries e ON e.rowid = docs.rowid "
+               f"WHERE {' AND '.join(where)} ORDER BY docs.rowid DESC LIMIT {RANK_WINDOW}"
+               f") ORDER BY score LIMIT ?")
+        conn = self._conn()
+        ranked = conn.execute(sql, params + [limit]).fetchall()
+        if not ranked:
+            return []
+        # Snippets come from the stored text by rowid; FTS5's snippet() would
+        # re-read the whole match list once per hit.
+        rows = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT e.rowid, e.kind, e.app_id, e.uid, e.title, e.severity, e.cvss, {', '.join('d.' + f for f in FIELDS)} "
+            f"FROM entries e JOIN docs d ON d.rowid = e.rowid WHERE e.rowid IN ({','.join('?' * len(ranked))})",
+            [rowid for rowid, _ in ranked])}
+        hit = _highlighter(query)
+        results = []
+        for rowid, score in ranked:
+            kind_, app_id_, uid, title, severity, cvss = rows[rowid][:6]
+            results.append({
+                "kind": kind_, "app_id": app_id_ or None, "uid": uid, "title": title,
+                "severity": severity, "cvss": cvss, "score": round(-score, 3),
+                "snippet": _snippet(rows[rowid][6:], hit),
+            })
+        return results
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SearchIndex(SEARCH_PATH)
+    return _index
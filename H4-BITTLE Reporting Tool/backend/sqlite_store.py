@@ -0,0 +1,369 @@
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from backend.models import (
+    ConflictError, parse_start_date, _app_contribution, _revision_of, _count_written,
+    SEVERITIES, IN_PROGRESS_STATUSES, repository,
+)
+from backend.models import _page_vulnerabilities
+from backend.findings import apply_op
+from backend.listing import name_key, cvss_value
+
+SCHEMA_VERSION = 2
+BUSY_TIMEOUT_S = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    id            TEXT PRIMARY KEY,
+    status        TEXT NOT NULL DEFAULT '',   -- lower-cased
+    start_day     TEXT,                       -- YYYY-MM-DD, NULL when unparseable
+    start_month   TEXT,                       -- YYYY-MM of start_day
+    summary_month INTEGER NOT NULL DEFAULT 0, -- 1..12 for the dashboard histogram
+    revision      INTEGER NOT NULL DEFAULT 0,
+    doc           TEXT NOT NULL,
+    name_key      TEXT NOT NULL DEFAULT ''    -- listing.name_key(), added in v2
+);
+CREATE INDEX IF NOT EXISTS applications_status ON applications(status);
+CREATE INDEX IF NOT EXISTS applications_start_day ON applications(start_day);
+CREATE INDEX IF NOT EXISTS applications_start_month ON applications(start_month);
+-- keyset pagination: (sort value, id) for every sort of the listing API
+CREATE INDEX IF NOT EXISTS applications_page_name ON applications(name_key, id);
+CREATE INDEX IF NOT EXISTS applications_page_start ON applications(COALESCE(start_day, ''), id);
+CREATE INDEX IF NOT EXISTS applications_page_status ON applications(status, id);
+-- ... and the same under the status filter the applications page uses
+CREATE INDEX IF NOT EXISTS applications_page_status_name ON applications(status, name_key, id);
+CREATE INDEX IF NOT EXISTS applications_page_status_start ON applications(status, COALESCE(start_day, ''), id);
+
+CREATE TABLE IF NOT EXISTS vulnerabilities (
+    app_id    TEXT NOT NULL,
+    position  INTEGER NOT NULL,
+    severity  TEXT NOT NULL DEFAULT '',       -- lower-cased
+    cvss      REAL NOT NULL DEFAULT 0,
+    doc       TEXT NOT NULL,
+    PRIMARY KEY (app_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS vulnerabilities_severity ON vulnerabilities(severity);
+CREATE INDEX IF NOT EXISTS vulnerabilities_cvss ON vulnerabilities(app_id, cvss DESC);
+
+CREATE TABLE IF NOT EXISTS vulnerability_lists (
+    app_id    TEXT PRIMARY KEY,
+    revision  INTEGER NOT NULL
+);
+"""
+
+# Listing sorts -> the indexed expression they order by.
+APPLICATION_SORT_COLUMNS = {
+    "name": "name_key", "start_date": "COALESCE(start_day, '')", "status": "status", "id": "id",
+}
+
+APP_INSERT = "INSERT OR REPLACE INTO applications VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+def _app_row(app, fallback_mtime=None):
+    dt = parse_start_date(app)
+    contribution = _app_contribution(app, fallback_mtime)
+    doc = json.dumps(app)
+    _count_written(len(doc))
+    return (
+        app["id"], contribution["status"],
+        dt.strftime("%Y-%m-%d") if dt else None,
+        dt.strftime("%Y-%m") if dt else None,
+        contribution["month"], _revision_of(app), doc, name_key(app),
+    )
+
+def _vuln_row(app_id, position, v):
+    doc = json.dumps(v)
+    _count_written(len(doc))
+    return (app_id, position, (v.get("severity") or '').lower(), cvss_value(v), doc)
+
+def _vuln_rows(app_id, vulns):
+    return [_vuln_row(app_id, i, v) for i, v in enumerate(vulns)]
+
+class SqliteStorage:
+    """
+    SQLite backend for backend.models (H4_STORAGE_BACKEND=sqlite).
+
+    Each application and finding is stored as its JSON document next to the
+    indexed columns the listings, filters and summaries query: status, start
+    date, severity and CVSS. The database runs in WAL mode so readers never
+    block the writer. Every write is a BEGIN IMMEDIATE transaction, which
+    serializes writers across processes, and the revision check runs inside
+    it. Import an existing JSON tree with `python -m backend.tasks migrate-sqlite`.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._upgrade(conn)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _upgrade(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]   # another process may have won
+            if version == 1:
+                conn.execute("ALTER TABLE applications ADD COLUMN name_key TEXT NOT NULL DEFAULT ''")
+                conn.executemany("UPDATE applications SET name_key = ? WHERE id = ?",
+                                 [(name_key(json.loads(doc)), app_id)
+                                  for app_id, doc in conn.execute("SELECT id, doc FROM applications").fetchall()])
+            if version < SCHEMA_VERSION:
+                for statement in SCHEMA.split(";"):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _docs(self, sql, params=()):
+        return [json.loads(doc) for (doc,) in self._conn().execute(sql, params)]
+
+    # ---- applications ----
+    def load_applications(self):
+        return self._docs("SELECT doc FROM applications ORDER BY id")
+
+    def get_application(self, app_id):
+        row = self._conn().execute("SELECT doc FROM applications WHERE id = ?", (app_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_applications_by_status(self, status):
+        return self._docs("SELECT doc FROM applications WHERE status = ? ORDER BY id",
+                          ((status or "").lower(),))
+
+    def load_applications_by_month(self, month):
+        return self._docs("SELECT doc FROM applications WHERE start_month = ? ORDER BY id", (month,))
+
+    def find_applications(self, app_ids=None, status=None, start_from=None, start_to=None):
+        where, params = [], []
+        if app_ids:
+            app_ids = list(dict.fromkeys(app_ids))
+            where.append(f"id IN ({','.join('?' * len(app_ids))})")
+            params.extend(app_ids)
+        if status:
+            where.append("status = ?")
+            params.append(status.lower())
+        if start_from:
+            where.append("start_day >= ?")
+            params.append(start_from.isoformat())
+        if start_to:
+            where.append("start_day <= ?")
+            params.append(start_to.isoformat())
+        sql = "SELECT id, doc FROM applications"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._conn().execute(sql + " ORDER BY id", params).fetchall()
+        if app_ids:
+            order = {app_id: i for i, app_id in enumerate(app_ids)}
+            rows.sort(key=lambda row: order[row[0]])
+        return [json.loads(doc) for _, doc in rows]
+
+    def list_applications_page(self, status=None, start_from=None, start_to=None,
+                               sort="name", descending=False, after=None, limit=None):
+        """Keyset page over the (sort value, id) indexes: cost depends on the page, not the table."""
+        column = APPLICATION_SORT_COLUMNS[sort]
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status.lower())
+        if start_from:
+            where.append("start_day >= ?")
+            params.append(start_from.isoformat())
+        if start_to:
+            where.append("start_day <= ?")
+            params.append(start_to.isoformat())
+        if after is not None:
+            where.append(f"({column}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(after)
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {column}, id, doc FROM applications"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {column} {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self._conn().execute(sql, params).fetchall()
+        next_key = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_key = tuple(rows[-1][:2])
+        return [json.loads(doc) for _, _, doc in rows], next_key
+
+    def save_application(self, app_id, app_data, expected_revision=None):
+        with self._write() as conn:
+            row = conn.execute("SELECT revision FROM applications WHERE id = ?", (app_id,)).fetchone()
+            current = row[0] if row else 0
+            if expected_revision is not None and int(expected_revision) != current:
+                raise ConflictError(f"Application {app_id} was changed by someone else", current)
+            app_data["revision"] = current + 1
+            conn.execute(APP_INSERT, _app_row(app_data, datetime.now().timestamp()))
+        return app_data["revision"]
+
+    # ---- vulnerabilities ----
+    def load_vulnerabilities(self, app_id):
+        return self._docs("SELECT doc FROM vulnerabilities WHERE app_id = ? ORDER BY position", (app_id,))
+
+    def list_vulnerabilities_page(self, app_id, severities=None, cvss_min=None, cvss_max=None,
+                                  sort="position", descending=False, after=None, limit=None):
+        # Filters run in SQL; one list is small, so it is ordered the same way as the JSON backend.
+        where, params = ["app_id = ?"], [app_id]
+        if severities:
+            where.append(f"severity IN ({','.join('?' * len(severities))})")
+            params.extend(sorted(severities))
+        if cvss_min is not None:
+            where.append("cvss >= ?")
+            params.append(cvss_min)
+        if cvss_max is not None:
+            where.append("cvss <= ?")
+            params.append(cvss_max)
+        rows = self._conn().execute(f"SELECT position, doc FROM vulnerabilities WHERE {' AND '.join(where)}",
+                                    params).fetchall()
+        return _page_vulnerabilities(((position, json.loads(doc)) for position, doc in rows),
+                                     None, None, None, sort, descending, after, limit)
+
+    def _revision(self, conn, app_id):
+        row = conn.execute("SELECT revision FROM vulnerability_lists WHERE app_id = ?", (app_id,)).fetchone()
+        return row[0] if row else 0
+
+    def load_vulnerabilities_with_revision(self, app_id):
+        conn = self._conn()
+        conn.execute("BEGIN")   # one snapshot for both reads
+        try:
+            return self._revision(conn, app_id), self.load_vulnerabilities(app_id)
+        finally:
+            conn.execute("COMMIT")
+
+    def _replace_vulnerabilities(self, conn, app_id, data, revision):
+        conn.execute("DELETE FROM vulnerabilities WHERE app_id = ?", (app_id,))
+        conn.executemany("INSERT INTO vulnerabilities VALUES (?, ?, ?, ?, ?)", _vuln_rows(app_id, data))
+        conn.execute("INSERT OR REPLACE INTO vulnerability_lists VALUES (?, ?)", (app_id, revision))
+
+    def append_vulnerabilities(self, app_id, new_vulns):
+        with self._write() as conn:
+            current = self._revision(conn, app_id)
+            start = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM vulnerabilities WHERE app_id = ?",
+                                 (app_id,)).fetchone()[0]
+            rows = [_vuln_row(app_id, start + i, v) for i, v in enumerate(new_vulns)]
+            conn.executemany("INSERT INTO vulnerabilities VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO vulnerability_lists VALUES (?, ?)", (app_id, current + 1))
+        return current + 1
+
+    def save_vulnerabilities(self, app_id, data, expected_revision=None):
+        with self._write() as conn:
+            current = self._revision(conn, app_id)
+            if expected_revision is not None and int(expected_revision) != current:
+                raise ConflictError(f"Vulnerabilities of {app_id} were changed by someone else", current)
+            self._replace_vulnerabilities(conn, app_id, data, current + 1)
+        return current + 1
+
+    def apply_finding_op(self, app_id, op, expected_revision=None):
+        """Apply a granular edit, rewriting only rows that were added, changed or moved."""
+        with self._write() as conn:
+            current = self._revision(conn, app_id)
+            if expected_revision is not None and int(expected_revision) != current:
+                raise ConflictError(f"Vulnerabilities of {app_id} were changed by someone else", current)
+            rows = conn.execute("SELECT position, doc FROM vulnerabilities WHERE app_id = ? ORDER BY position",
+                                (app_id,)).fetchall()
+            old = [json.loads(doc) for _, doc in rows]
+            new = list(old)
+            result = apply_op(new, op)
+
+            # apply_op replaces changed findings with new objects, so identity tells
+            # unchanged (possibly moved) findings from added or edited ones.
+            old_pos = {id(v): i for i, v in enumerate(old)}
+            kept = {id(v) for v in new}
+            for i, v in enumerate(old):
+                if id(v) not in kept:
+                    conn.execute("DELETE FROM vulnerabilities WHERE app_id = ? AND position = ?", (app_id, i))
+            inserts = []
+            for j, v in enumerate(new):
+                i = old_pos.get(id(v))
+                if i is None:
+                    inserts.append(_vuln_row(app_id, j, v))
+                elif i != j:
+                    # park at a unique negative slot until every move is done
+                    _count_written(len(rows[i][1]))
+                    conn.execute("UPDATE vulnerabilities SET position = ? WHERE app_id = ? AND position = ?",
+                                 (-1 - j, app_id, i))
+            conn.executemany("INSERT INTO vulnerabilities VALUES (?, ?, ?, ?, ?)", inserts)
+            conn.execute("UPDATE vulnerabilities SET position = -1 - position WHERE app_id = ? AND position < 0",
+                         (app_id,))
+            conn.execute("INSERT OR REPLACE INTO vulnerability_lists VALUES (?, ?)", (app_id, current + 1))
+        return current + 1, result
+
+    # ---- summaries ----
+    def applications_summary(self):
+        conn = self._conn()
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM applications GROUP BY status"))
+        monthly = [0] * 12
+        for month, n in conn.execute("SELECT summary_month, COUNT(*) FROM applications "
+                                     "WHERE summary_month > 0 GROUP BY summary_month"):
+            monthly[month - 1] = n
+        return {
+            "total": sum(counts.values()),
+            "completed": counts.get("completed", 0),
+            "in_progress": sum(counts.get(s, 0) for s in IN_PROGRESS_STATUSES),
+            "monthly": monthly,
+        }
+
+    def vulnerabilities_summary(self):
+        counts = dict(self._conn().execute("SELECT severity, COUNT(*) FROM vulnerabilities GROUP BY severity"))
+        summary = {"total": sum(counts.values())}
+        summary.update({s: counts.get(s, 0) for s in SEVERITIES})
+        return summary
+
+    def rebuild_summary(self):
+        # Summaries are live indexed queries; nothing is materialized.
+        conn = self._conn()
+        return (conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0],
+                conn.execute("SELECT COUNT(*) FROM vulnerabilities").fetchone()[0])
+
+    # ---- migration ----
+    def import_json_tree(self, repo=repository):
+        """
+        Copy every application and findings list (with revisions) from the
+        JSON tree, replacing rows with the same ids. Runs in one transaction.
+        """
+        apps = vulns = 0
+        with self._write() as conn:
+            for app in repo.list_applications():
+                if not app.get("id"):
+                    continue
+                try:
+                    mtime = os.path.getmtime(repo._app_path(app["id"]))
+                except OSError:
+                    mtime = None
+                conn.execute(APP_INSERT, _app_row(app, mtime))
+                apps += 1
+            with os.scandir(repo.vulns_dir) as it:
+                app_ids = [e.name[:-len(".json")] for e in it if e.name.endswith(".json")]
+            for app_id in app_ids:
+                data = repo.load_vulnerabilities(app_id)
+                self._replace_vulnerabilities(conn, app_id, data, repo.vulnerabilities_revision(app_id))
+                vulns += len(data)
+        return apps, vulns
@@ -1,11 +1,75 @@
 # Optional background or utility tasks (e.g., scheduled backup)
+#
+#   python -m backend.tasks backup
+#   python -m backend.tasks rebuild-summary
+#   python -m backend.tasks migrate-sqlite [--db PATH]
+#   python -m backend.tasks rebuild-search
+#   python -m backend.tasks gc-screenshots [--dry-run] [--grace-hours 24] [--no-rescan]
+#   python -m backend.tasks dedupe-screenshots [--delete-legacy]
+#   python -m backend.tasks prepare-screenshots
+#   python -m backend.tasks audit-migrate
+#   python -m backend.tasks audit-tail [-n 50]
+#   python -m backend.tasks export-batch [--app-id ID ...] [--status S] [--from D] [--to D] [--layout L] [--word]
 import os
 import json
-from datetime import datetime
-from models import load_applications, load_vulnerabilities
+import uuid
+import hashlib
+import argparse
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from backend import models
+from backend.models import load_applications, load_vulnerabilities, find_applications
+from backend.screenshots import screenshot_store, is_blob, GC_GRACE_S
+from backend.audit import audit_log
+from backend.locks import FileLocks
+from backend.profiling import ExportStats
+from backend.utils import (
+    generate_word_report, generate_excel_report, generate_batch_export,
+    log_action, BATCH_LAYOUTS, prepare_uploaded_screenshot, screenshot_derivatives_ready,
+    shutdown_export_pool
+)
 
 BACKUP_DIR = os.path.join(os.path.dirname(__file__), '..', 'exports', 'json_backups')
+JOBS_DIR = os.path.join(os.path.dirname(__file__), '..', 'exports', 'jobs')
 os.makedirs(BACKUP_DIR, exist_ok=True)
+os.makedirs(JOBS_DIR, exist_ok=True)
+
+EXPORT_WORKERS = 2          # concurrent report renders per process
+SCREENSHOT_WORKERS = 1      # background thumbnail/rendition builders per process
+EXPORT_JOB_TTL_S = 24 * 3600
+EXPORT_JOB_STALE_S = 3600   # Windows: an unfinished job with no progress for this long is abandoned
+
+JOB_QUEUED = "queued"
+JOB_PROCESSING_IMAGES = "processing images"
+JOB_RENDERING = "rendering"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+
+def _parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+
+def export_batch(batch_key=None, progress=None, app_ids=None, status=None,
+                 start_from=None, start_to=None, layout="per_app", word=False):
+    """
+    Export every selected application in one pass (see generate_batch_export).
+    Selection is explicit app_ids and/or status and a YYYY-MM-DD start-date range.
+    """
+    apps = find_applications(app_ids=app_ids, status=status,
+                             start_from=_parse_day(start_from), start_to=_parse_day(start_to))
+    if not apps:
+        raise ValueError("No applications match the batch selection")
+    return generate_batch_export(apps, layout=layout, include_word=word, progress=progress)
+
+EXPORTERS = {
+    "word": generate_word_report,
+    "excel": generate_excel_report,
+    "batch": export_batch,
+}
+INSTRUMENTED_EXPORTS = ("word", "excel")   # take stats=/profile= (see backend/profiling.py)
 
 def backup_all_data():
     backup = {
@@ -24,3 +88,382 @@ def backup_all_data():
         json.dump(backup, f, indent=2)
 
     return filepath
+
+def rebuild_summary():
+    """Recompute the dashboard summary (a no-op count on the sqlite backend)."""
+    return models.rebuild_summary()
+
+def migrate_to_sqlite(db_path=None):
+    """Import the JSON tree into the SQLite database; safe to re-run."""
+    from backend.sqlite_store import SqliteStorage
+    return SqliteStorage(db_path or models.SQLITE_PATH).import_json_tree()
+
+# ========== SCREENSHOTS =============================
+
+def gc_screenshots(grace_s=GC_GRACE_S, dry_run=False, rescan=True):
+    """
+    Delete screenshot blobs no finding step references. The recorded
+    reference counts are rebuilt from the stored findings first unless
+    rescan is False. Returns (paths removed, bytes freed).
+    """
+    if rescan:
+        print("Screenshot blobs referenced:", models.rebuild_screenshot_references())
+    return screenshot_store.collect_garbage(grace_s=grace_s, dry_run=dry_run)
+
+def dedupe_screenshots(delete_legacy=False):
+    """
+    Move screenshots saved under client-chosen names (before uploads were
+    content-addressed) into the blob store and point their steps at the
+    blob. With delete_legacy, the old files no step uses any more are
+    removed. Returns (steps rewritten, legacy files removed).
+    """
+    rewritten = 0
+    converted, still_used = set(), set()
+    for app in load_applications():
+        app_id = app.get("id")
+        if not app_id:
+            continue
+        revision, vulns = models.load_vulnerabilities_with_revision(app_id)
+        names, steps = set(), 0
+        for v in vulns:
+            for s in v.get("steps") or []:
+                name = (s.get("screenshot") or "").strip() if isinstance(s, dict) else ""
+                if not name or is_blob(name):
+                    continue
+                path = os.path.join(screenshot_store.directory, os.path.basename(name))
+                if not os.path.isfile(path):
+                    continue
+                s["screenshot"] = screenshot_store.ingest_path(path)
+                names.add(os.path.basename(name))
+                steps += 1
+        if not names:
+            continue
+        converted.update(names)
+        try:
+            models.save_vulnerabilities(app_id, vulns, expected_revision=revision)
+            rewritten += steps
+        except models.ConflictError:
+            print(f"Skipped {app_id}: its findings changed meanwhile, run again")
+            still_used.update(names)   # this list still points at the old names
+    removed = 0
+    if delete_legacy:
+        for name in sorted(converted - still_used):
+            os.remove(os.path.join(screenshot_store.directory, name))
+            removed += 1
+    return rewritten, removed
+
+def prepare_screenshots():
+    """Build missing derivatives for every uploaded screenshot; returns (prepared, rejected)."""
+    prepared = rejected = 0
+    for name in sorted(screenshot_store.reference_counts()):
+        if screenshot_derivatives_ready(name):
+            continue
+        if prepare_uploaded_screenshot(name):
+            prepared += 1
+        else:
+            rejected += 1
+    return prepared, rejected
+
+class ScreenshotQueue:
+    """
+    Builds the derivatives of new uploads (validation, export rendition,
+    thumbnail) on a background thread, so upload requests return as soon as
+    the file is stored. A screenshot already prepared or queued is skipped.
+    """
+
+    def __init__(self, max_workers=SCREENSHOT_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="screenshots")
+        return self._executor
+
+    def submit(self, name):
+        if not is_blob(name) or screenshot_derivatives_ready(name):
+            return None
+        with self._lock:
+            if name in self._pending:
+                return None
+            self._pending.add(name)
+            return self._pool().submit(self._run, name)
+
+    def _run(self, name):
+        try:
+            return prepare_uploaded_screenshot(name)
+        except Exception:
+            traceback.print_exc()
+            return False
+        finally:
+            with self._lock:
+                self._pending.discard(name)
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        # Skipped derivatives are rebuilt on demand (thumbnail route, exports)
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+
+screenshot_jobs = ScreenshotQueue()
+
+# ========== EXPORT JOBS =============================
+
+class ExportJobQueue:
+    """
+    Background Word/Excel export queue.
+
+    Jobs run on a small thread pool and move through queued -> processing
+    images -> rendering -> done/failed. Each state change is mirrored to
+    exports/jobs/<job_id>.json so any worker process can answer a status
+    poll. Submitting the same (kind, app_id) while a job for it is still
+    unfinished, in this or any other worker process, returns that job
+    instead of starting another render: the running job is recorded in
+    exports/jobs/active/, checked and created under a shared file lock.
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR, max_workers=EXPORT_WORKERS):
+        self.jobs_dir = jobs_dir
+        self.active_dir = os.path.join(jobs_dir, 'active')
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._jobs = {}      # job_id -> job dict
+        self.locks = FileLocks(os.path.join(jobs_dir, 'locks'))
+        os.makedirs(self.active_dir, exist_ok=True)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export")
+        return self._executor
+
+    def _job_file(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        tmp = f"{self._job_file(job['id'])}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, self._job_file(job['id']))
+
+    def _active_file(self, kind, app_id):
+        key = hashlib.sha1(json.dumps([kind, app_id]).encode()).hexdigest()[:20]
+        return os.path.join(self.active_dir, f"{key}.json")
+
+    def _owner_alive(self, owner, job):
+        pid = owner.get("pid")
+        if pid == os.getpid():
+            with self._lock:
+                return job["id"] in self._jobs
+        if os.name == "nt" or not isinstance(pid, int):   # no cheap liveness probe
+            stale = (datetime.utcnow() - timedelta(seconds=EXPORT_JOB_STALE_S)).isoformat()
+            return job["updated_at"] >= stale
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _running(self, kind, app_id):
+        """The unfinished job recorded for (kind, app_id), dropping a record left by a dead worker."""
+        path = self._active_file(kind, app_id)
+        try:
+            with open(path) as f:
+                owner = json.load(f)
+        except (OSError, ValueError):
+            owner = None
+        job = self.get(owner.get("job_id")) if isinstance(owner, dict) else None
+        if job and job["state"] not in FINISHED_STATES and self._owner_alive(owner, job):
+            return job
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    def _set_state(self, job, state, **fields):
+        with self._lock:
+            job.update(fields, state=state, updated_at=datetime.utcnow().isoformat())
+            snapshot = dict(job)
+        self._persist(snapshot)
+        if state in FINISHED_STATES:
+            with self.locks.hold("active"):
+                self._running(job["kind"], job["app_id"])   # drops the record of a finished job
+
+    def submit(self, kind, app_id, options=None):
+        if kind not in EXPORTERS:
+            raise ValueError(f"Unknown export kind: {kind}")
+        options = options or {}
+        now = datetime.utcnow().isoformat()
+        job = {
+            "id": uuid.uuid4().hex, "kind": kind, "app_id": app_id, "state": JOB_QUEUED,
+            "options": options, "path": None, "error": None, "created_at": now, "updated_at": now,
+        }
+        with self.locks.hold("active"):
+            for _ in range(2):
+                existing = self._running(kind, app_id)
+                if existing:
+                    return existing
+                try:
+                    fd = os.open(self._active_file(kind, app_id), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                    break
+                except FileExistsError:
+                    continue    # claimed between the check and the create; look again
+            else:
+                job.update(state=JOB_FAILED, error="Another export for this application is starting, try again")
+                self._persist(job)
+                return dict(job)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"job_id": job["id"], "pid": os.getpid()}, f)
+            with self._lock:
+                self._jobs[job["id"]] = job
+                snapshot = dict(job)
+            self._persist(snapshot)
+        self._pool().submit(self._run, job)
+        self.prune()
+        return snapshot
+
+    def submit_batch(self, options):
+        """Batch jobs are de-duplicated on their normalized selection/options."""
+        key = hashlib.sha1(json.dumps(options, sort_keys=True).encode()).hexdigest()[:16]
+        return self.submit("batch", f"batch-{key}", options)
+
+    def _run(self, job):
+        options = dict(job["options"])
+        stats = None
+        if job["kind"] in INSTRUMENTED_EXPORTS:
+            stats = options["stats"] = ExportStats(job["kind"], job["app_id"])
+        try:
+            progress = lambda state: self._set_state(job, state)
+            path = EXPORTERS[job["kind"]](job["app_id"], progress=progress, **options)
+            report = {"stats": stats.report()} if stats else {}
+            if path:
+                self._set_state(job, JOB_DONE, path=path, **report)
+                log_action(f"{job['kind'].title()} export finished for app {job['app_id']}")
+            else:
+                self._set_state(job, JOB_FAILED, error="Application or template not found", **report)
+        except Exception as e:
+            traceback.print_exc()
+            self._set_state(job, JOB_FAILED, error=str(e), **({"stats": stats.report()} if stats else {}))
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        try:
+            with open(self._job_file(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def prune(self, ttl=EXPORT_JOB_TTL_S):
+        """Forget finished jobs (and their status files) older than ttl seconds."""
+        cutoff = time.time() - ttl
+        cutoff_iso = (datetime.utcnow() - timedelta(seconds=ttl)).isoformat()
+        with self._lock:
+            for job_id, job in list(self._jobs.items()):
+                if job["state"] in FINISHED_STATES and job["updated_at"] < cutoff_iso:
+                    del self._jobs[job_id]
+        for name in os.listdir(self.jobs_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.jobs_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+        if cancel_pending:
+            with self._lock:
+                queued = [job for job in self._jobs.values() if job["state"] == JOB_QUEUED]
+            for job in queued:
+                self._set_state(job, JOB_FAILED, error="Server restarted before the export started; export again")
+
+export_jobs = ExportJobQueue()
+
+def shutdown(wait=True):
+    """
+    Graceful stop for a server worker: let running exports and screenshot
+    jobs finish, fail exports that never started (so pollers are not left
+    waiting on a job nobody will run), stop the export process pool, then
+    flush the audit log.
+    """
+    export_jobs.shutdown(wait=wait, cancel_pending=True)
+    screenshot_jobs.shutdown(wait=wait, cancel_pending=True)
+    shutdown_export_pool(wait=wait)
+    audit_log.flush()
+
+def print_audit_tail(n=50):
+    for entry in audit_log.tail(n):
+        print(entry.get("timestamp", ""), entry.get("action", ""))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m backend.tasks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("backup", help="write a JSON backup of all applications and findings")
+    sub.add_parser("rebuild-summary", help="recompute the dashboard summary store")
+    migrate = sub.add_parser("migrate-sqlite", help="import the JSON tree into the SQLite backend")
+    migrate.add_argument("--db", help="database file (default H4_SQLITE_PATH or backend/data/h4.sqlite3)")
+    sub.add_parser("rebuild-search", help="re-index all findings and templates for /api/search")
+    gc = sub.add_parser("gc-screenshots", help="delete screenshot blobs no finding references")
+    gc.add_argument("--dry-run", action="store_true", help="only list what would be deleted")
+    gc.add_argument("--grace-hours", type=float, default=GC_GRACE_S / 3600,
+                    help="keep unreferenced blobs newer than this (uploads not saved yet)")
+    gc.add_argument("--no-rescan", action="store_true",
+                    help="trust the recorded reference counts instead of rereading every finding")
+    dedupe = sub.add_parser("dedupe-screenshots", help="move legacy named screenshots into the blob store")
+    dedupe.add_argument("--delete-legacy", action="store_true", help="remove the old files afterwards")
+    sub.add_parser("prepare-screenshots", help="build missing thumbnails and export renditions")
+    sub.add_parser("audit-migrate", help="import the legacy audit_logs.json array")
+    tail = sub.add_parser("audit-tail", help="print the newest audit entries")
+    tail.add_argument("-n", type=int, default=50)
+    batch = sub.add_parser("export-batch", help="export many applications in one pass")
+    batch.add_argument("--app-id", dest="app_ids", action="append", help="repeat for several applications")
+    batch.add_argument("--status")
+    batch.add_argument("--from", dest="start_from", help="start date lower bound, YYYY-MM-DD")
+    batch.add_argument("--to", dest="start_to", help="start date upper bound, YYYY-MM-DD")
+    batch.add_argument("--layout", choices=BATCH_LAYOUTS, default="per_app")
+    batch.add_argument("--word", action="store_true", help="also render every Word report into a zip")
+    args = parser.parse_args(argv)
+
+    if args.command == "backup":
+        print("Backup written:", backup_all_data())
+    elif args.command == "rebuild-summary":
+        print("Summary rebuilt: %d applications, %d vulnerabilities" % rebuild_summary())
+    elif args.command == "migrate-sqlite":
+        apps, vulns = migrate_to_sqlite(args.db)
+        print("Imported %d applications, %d vulnerabilities" % (apps, vulns))
+        print("Start the app with H4_STORAGE_BACKEND=sqlite to use it")
+    elif args.command == "rebuild-search":
+        print("Search index rebuilt: %d findings" % models.rebuild_search_index())
+    elif args.command == "gc-screenshots":
+        removed, freed = gc_screenshots(grace_s=args.grace_hours * 3600, dry_run=args.dry_run,
+                                        rescan=not args.no_rescan)
+        for path in removed:
+            print("Would remove" if args.dry_run else "Removed", path)
+        print("%s %d files, %.1f KB" % ("Would remove" if args.dry_run else "Removed", len(removed), freed / 1024))
+    elif args.command == "dedupe-screenshots":
+        print("Steps rewritten: %d, legacy files removed: %d" % dedupe_screenshots(args.delete_legacy))
+    elif args.command == "prepare-screenshots":
+        print("Screenshots prepared: %d, rejected: %d" % prepare_screenshots())
+    elif args.command == "audit-migrate":
+        print("Audit entries migrated:", audit_log.migrate_legacy())
+    elif args.command == "audit-tail":
+        print_audit_tail(args.n)
+    elif args.command == "export-batch":
+        print("Batch export written:", export_batch(
+            app_ids=args.app_ids, status=args.status, start_from=args.start_from,
+            start_to=args.start_to, layout=args.layout, word=args.word,
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,27 @@ import os
 import json
 import io
 import uuid
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import threading
+import multiprocessing
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
 from docx.shared import Inches, Pt
-from openpyxl import load_workbook
-from backend.models import load_applications, load_vulnerabilities
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from backend.models import get_application, load_vulnerabilities
+from backend.audit import audit_log
+from backend.artifacts import artifact_store
+from backend.config import SCREENSHOT_DIR
+from backend.screenshots import BLOB_NAME, screenshot_store
+from backend.profiling import ExportStats, instrument_export, log
+from backend import metrics
 from docxtpl import DocxTemplate, InlineImage
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -18,7 +34,7 @@ from openpyxl.cell.rich_text import CellRichText, TextBlock
 from openpyxl.cell.text import InlineFont as XLInlineFont
 from openpyxl.styles import Alignment
 
-from PIL import Image, ImageChops, ImageOps, ImageDraw
+from PIL import Image, ImageChops, ImageOps, ImageDraw, features
 
 # ------------------------- CONFIG TOGGLES -------------------------
 # Flip these without changing any logic below.
@@ -35,25 +51,23 @@ PICTURE_OUTLINE_PT      = 0.25    # used only if ADD_PICTURE_OUTLINE_XML = True
 ADD_PARAGRAPH_BORDER    = False   # optional: border around the image paragraph
 # ------------------------------------------------------------------
 
-LOG_FILE = os.path.join(os.path.dirname(__file__), 'data', 'audit_logs.json')
 WORD_TEMPLATE = os.path.join(os.path.dirname(__file__), 'templates', 'report_template.docx')
 EXCEL_TEMPLATE = os.path.join(os.path.dirname(__file__), 'templates', 'excel_template.xlsx')
 DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
-SCREENSHOT_DIR = os.path.join(os.path.dirname(__file__), '..', 'static', 'screenshots')
 
 TMP_IMG_DIR = os.path.join(os.path.dirname(__file__), '.export_image_cache')
+EXPORT_IMAGE_WORKERS = os.cpu_count() or 1  # process pool bound for screenshot preprocessing
+EXPORT_POOL_START = "spawn" if os.name == "nt" else "forkserver"   # never fork the threaded server
+EXPORT_POOL_MIN_BATCH = 3                   # fewer images than this are processed in-process
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024   # LRU bound for processed screenshots
+IMAGE_PIPELINE_VERSION = 1                  # bump when trim/border code changes output
+THUMBNAIL_PX = 320                          # longest side of the edit page previews
+THUMBNAIL_FORMAT, THUMBNAIL_EXT = ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 os.makedirs(TMP_IMG_DIR, exist_ok=True)
 
 def log_action(message):
-    log_entry = {"timestamp": datetime.utcnow().isoformat(), "action": message}
-    logs = []
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, 'r') as f:
-            logs = json.load(f)
-    logs.append(log_entry)
-    with open(LOG_FILE, 'w') as f:
-        json.dump(logs, f, indent=2)
+    audit_log.append({"timestamp": datetime.utcnow().isoformat(), "action": message})
 
 def get_color(severity):
     return {
@@ -93,6 +107,78 @@ def _resolve_screenshot_path(raw_value: str) -> str | None:
 def _png_temp_path():
     return os.path.join(TMP_IMG_DIR, f"{uuid.uuid4().hex}.png")
 
+_source_digests = {}  # (path, mtime_ns, size) -> sha256 of file content
+
+def _file_digest(path: str) -> str:
+    blob = BLOB_NAME.match(os.path.basename(path))
+    if blob:
+        return blob.group(1)   # content-addressed upload: the name is the sha256
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    digest = _source_digests.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        digest = _source_digests[key] = h.hexdigest()
+    return digest
+
+def _image_config() -> dict:
+    """Snapshot of the border/trim toggles, passed explicitly to pool workers."""
+    return {
+        "version": IMAGE_PIPELINE_VERSION,
+        "bake_border": BAKE_BITMAP_BORDER,
+        "border_mode": BITMAP_BORDER_MODE.lower(),
+        "border_px": BITMAP_BORDER_PX,
+        "border_color": tuple(BORDER_COLOR_RGB),
+        "fade_strength": AA_FADE_STRENGTH,
+    }
+
+def _image_config_key() -> str:
+    return json.dumps(list(_image_config().values()))
+
+def _layout_config() -> list:
+    """The toggles applied while placing pictures in the document (not baked into pixels)."""
+    return [ADD_PICTURE_OUTLINE_XML, PICTURE_OUTLINE_PT, ADD_PARAGRAPH_BORDER]
+
+def _cached_image_path(abs_path: str) -> str:
+    """
+    Location of the processed rendition of abs_path under the current config.
+    Uploaded (content-addressed) screenshots keep theirs beside the blob, built
+    at upload time; anything else goes to the LRU cache.
+    """
+    config_key = hashlib.sha256(_image_config_key().encode()).hexdigest()[:12]
+    name = os.path.basename(abs_path)
+    if BLOB_NAME.match(name):
+        return screenshot_store.derived_path(name, f"export-{config_key}.png")
+    key = hashlib.sha256(f"{_file_digest(abs_path)}|{_image_config_key()}".encode()).hexdigest()
+    return os.path.join(TMP_IMG_DIR, f"{key}.png")
+
+def _invalid_marker(abs_path: str) -> str | None:
+    """Set for uploaded screenshots that failed validation; holds the reason."""
+    return screenshot_store.derived_path(os.path.basename(abs_path), "invalid")
+
+def _evict_image_cache(max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+    """Drop least recently used renditions until the cache fits in max_bytes."""
+    entries, total = [], 0
+    with os.scandir(TMP_IMG_DIR) as it:
+        for e in it:
+            if e.is_file():
+                st = e.stat()
+                entries.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+    if total <= max_bytes:
+        return
+    for _, size, path in sorted(entries):
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= max_bytes:
+            break
+
 def _trim_transparent_or_white(im: Image.Image, white_tol: int = 10) -> Image.Image:
     """
     Trim fully transparent edges (RGBA) and near-white matte (RGB).
@@ -161,26 +247,231 @@ def _add_bitmap_border_expand(im: Image.Image, border_px: int = 1, color=(0, 0,
     border_px = max(1, int(border_px))
     return ImageOps.expand(im.convert("RGB"), border=border_px, fill=color)
 
-def _inline_image_force_png_path(doc_tpl, abs_path: str, width_in: float = 6.48):
+def _render_processed_png(abs_path: str, out_path: str, config: dict, stats: ExportStats):
+    """Load with Pillow, trim edges, add bitmap border (inset/expand) and save as PNG."""
+    with Image.open(abs_path) as im:
+        with stats.stage("image.decode"):
+            im.load()
+        with stats.stage("image.trim"):
+            im = _trim_transparent_or_white(im)
+        if config["bake_border"]:
+            with stats.stage("image.border"):
+                if config["border_mode"] == "inset":
+                    im = _add_bitmap_border_inset(
+                        im, border_px=config["border_px"], color=config["border_color"],
+                        fade_strength=config["fade_strength"]
+                    )
+                else:
+                    im = _add_bitmap_border_expand(im, border_px=config["border_px"], color=config["border_color"])
+        with stats.stage("image.encode"):
+            if im.mode not in ("RGB", "RGBA"):
+                im = im.convert("RGB")
+            im.save(out_path, format="PNG")
+
+def _process_screenshot(abs_path: str, out_path: str, config: dict):
     """
-    Load with Pillow, trim edges, add bitmap border (inset/expand), save to PNG on disk,
-    and return InlineImage(path,...). File path is most stable for docxtpl/python-docx.
+    Verify, render and atomically publish one rendition (also the pool
+    worker). Returns (out_path, {image stage: [wall_ms, cpu_ms]}).
     """
-    out_path = _png_temp_path()
-    with Image.open(abs_path) as im:
-        im.load()
-        im = _trim_transparent_or_white(im)
-        if BAKE_BITMAP_BORDER:
-            if BITMAP_BORDER_MODE.lower() == "inset":
-                im = _add_bitmap_border_inset(
-                    im, border_px=BITMAP_BORDER_PX, color=BORDER_COLOR_RGB, fade_strength=AA_FADE_STRENGTH
-                )
-            else:
-                im = _add_bitmap_border_expand(im, border_px=BITMAP_BORDER_PX, color=BORDER_COLOR_RGB)
-        if im.mode not in ("RGB", "RGBA"):
-            im = im.convert("RGB")
-        im.save(out_path, format="PNG")
-    return InlineImage(doc_tpl, out_path, width=Inches(width_in))
+    stats = ExportStats("image", abs_path)
+    try:
+        with stats.stage("image.verify"), Image.open(abs_path) as im:
+            im.verify()
+    except Exception as ex:
+        marker = _invalid_marker(abs_path)
+        if marker:
+            with open(marker, "w") as f:
+                f.write(str(ex))
+        raise
+    tmp_path = os.path.join(os.path.dirname(out_path), f"{uuid.uuid4().hex}.png")
+    _render_processed_png(abs_path, tmp_path, config, stats)
+    os.replace(tmp_path, out_path)
+    return out_path, stats.stages
+
+def _known_invalid(abs_path: str) -> Exception | None:
+    marker = _invalid_marker(abs_path)
+    if not marker or not os.path.exists(marker):
+        return None
+    with open(marker) as f:
+        return ValueError(f"Rejected at upload: {f.read()}")
+
+def _processed_image_path(abs_path: str) -> str:
+    """
+    Return the processed PNG for abs_path from the content-addressed cache,
+    rendering it on a miss. Hits only bump the file's mtime (LRU order), so
+    unchanged or duplicate screenshots are never decoded twice.
+    """
+    out_path = _cached_image_path(abs_path)
+    if os.path.exists(out_path):
+        os.utime(out_path)
+        return out_path
+    invalid = _known_invalid(abs_path)
+    if invalid:
+        raise invalid
+    _process_screenshot(abs_path, out_path, _image_config())
+    if os.path.dirname(out_path) == TMP_IMG_DIR:
+        _evict_image_cache()
+    return out_path
+
+# ---------------------- UPLOADED SCREENSHOTS ----------------------
+# Run once per distinct upload, off the request path (ScreenshotQueue in
+# backend/tasks.py): validate the image, build its export rendition and a
+# small preview for the edit page. Exports and page loads then only read
+# these files.
+
+def screenshot_thumbnail_path(name: str) -> str | None:
+    """The ready-made preview of an uploaded screenshot, or None."""
+    path = screenshot_store.derived_path(name, f"thumb.{THUMBNAIL_EXT}")
+    return path if path and os.path.exists(path) else None
+
+def screenshot_derivatives_ready(name: str) -> bool:
+    abs_path = screenshot_store.path_for(name)
+    if not abs_path:
+        return True   # legacy named file: rendered on export as before
+    if _known_invalid(abs_path):
+        return True
+    return bool(screenshot_thumbnail_path(name)) and os.path.exists(_cached_image_path(abs_path))
+
+def prepare_uploaded_screenshot(name: str) -> bool:
+    """Validate an uploaded screenshot and write its derivatives; False if it is not a usable image."""
+    abs_path = screenshot_store.path_for(name)
+    if not abs_path or not os.path.exists(abs_path):
+        return False
+    try:
+        _processed_image_path(abs_path)
+    except Exception as ex:
+        log.warning(f"Screenshot {name} rejected: {ex}")
+        return False
+    thumb_path = screenshot_store.derived_path(name, f"thumb.{THUMBNAIL_EXT}")
+    if not os.path.exists(thumb_path):
+        tmp_path = f"{thumb_path}.{uuid.uuid4().hex}.tmp"
+        with Image.open(abs_path) as im:
+            im.draft("RGB", (THUMBNAIL_PX, THUMBNAIL_PX))   # JPEG: decode at reduced scale
+            im.thumbnail((THUMBNAIL_PX, THUMBNAIL_PX))
+            if im.mode not in ("RGB", "RGBA") or THUMBNAIL_FORMAT == "JPEG":
+                im = im.convert("RGB")
+            im.save(tmp_path, format=THUMBNAIL_FORMAT, quality=80)
+        os.replace(tmp_path, thumb_path)
+    return True
+
+_export_pool = None
+_export_pool_lock = threading.Lock()
+
+def export_pool() -> ProcessPoolExecutor:
+    """
+    The process pool shared by every export in this process, started on
+    first use and kept for the next one. Workers come from a fork server
+    (spawn on Windows), never from forking the threaded server itself.
+    """
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is None:
+            context = multiprocessing.get_context(EXPORT_POOL_START)
+            if EXPORT_POOL_START == "forkserver":
+                # Import the export code once in the (thread-free) server rather
+                # than re-running the launching script there
+                context.set_forkserver_preload(["backend.utils"])
+            _export_pool = ProcessPoolExecutor(max_workers=EXPORT_IMAGE_WORKERS, mp_context=context)
+        return _export_pool
+
+def _discard_export_pool(pool):
+    """Forget a broken pool so the next export starts a fresh one."""
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is pool:
+            _export_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_export_pool(wait=True):
+    global _export_pool
+    with _export_pool_lock:
+        pool, _export_pool = _export_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+def _prepare_screenshots(paths, max_workers: int | None = None, stats: ExportStats | None = None) -> dict:
+    """
+    Bring every referenced screenshot into the rendition cache before rendering.
+
+    Cache misses are processed concurrently on export_pool() (at most
+    EXPORT_IMAGE_WORKERS), or in this process when there are fewer than
+    EXPORT_POOL_MIN_BATCH of them or max_workers is 1; identical content is
+    processed once. Returns
+    {abs_path: processed_png_path or the Exception that rejected it}.
+    With stats, counts renditions reused/rendered/rejected and adds the
+    workers' per-image stage times.
+    """
+    stats = stats or ExportStats("images", None)
+    results, todo = {}, {}
+    for abs_path in dict.fromkeys(paths):
+        try:
+            out_path = _cached_image_path(abs_path)
+            invalid = None if os.path.exists(out_path) else _known_invalid(abs_path)
+        except OSError as ex:
+            results[abs_path] = ex
+            continue
+        if invalid:
+            results[abs_path] = invalid
+        elif os.path.exists(out_path):
+            os.utime(out_path)
+            results[abs_path] = out_path
+        else:
+            todo.setdefault(out_path, []).append(abs_path)
+    stats.count("images_reused", len(results))
+    metrics.count_cache("screenshot_renditions", len(results), sum(len(v) for v in todo.values()))
+    if not todo:
+        return results
+
+    config = _image_config()
+    workers = min(len(todo), max_workers or EXPORT_IMAGE_WORKERS)
+    outcomes = {}
+    if workers > 1 and len(todo) >= EXPORT_POOL_MIN_BATCH:
+        pool = None
+        try:
+            pool = export_pool()
+            futures = {
+                pool.submit(_process_screenshot, sources[0], out_path, config): out_path
+                for out_path, sources in todo.items()
+            }
+            for fut in as_completed(futures):
+                try:
+                    outcomes[futures[fut]] = fut.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as ex:
+                    outcomes[futures[fut]] = ex
+        except (OSError, RuntimeError, BrokenProcessPool) as ex:
+            # RuntimeError: the pool was shut down (server stopping)
+            log.warning(f"Screenshot pool unavailable, processing serially: {ex}")
+            if pool is not None and isinstance(ex, BrokenProcessPool):
+                _discard_export_pool(pool)
+            outcomes = {}
+    for out_path, sources in todo.items():
+        if out_path not in outcomes:
+            try:
+                outcomes[out_path] = _process_screenshot(sources[0], out_path, config)
+            except Exception as ex:
+                outcomes[out_path] = ex
+        outcome = outcomes[out_path]
+        if isinstance(outcome, Exception):
+            stats.count("images_rejected")
+        else:
+            outcome, image_stages = outcome
+            stats.count("images_rendered")
+            for name, (wall_ms, cpu_ms) in image_stages.items():
+                stats.add_stage(name, wall_ms, cpu_ms)
+        for abs_path in sources:
+            results[abs_path] = outcome
+
+    _evict_image_cache()
+    return results
+
+def _inline_image_force_png_path(doc_tpl, abs_path: str, width_in: float = 6.48, processed_path: str | None = None):
+    """
+    Return InlineImage(path,...) for the processed rendition of abs_path.
+    File path is most stable for docxtpl/python-docx.
+    """
+    return InlineImage(doc_tpl, processed_path or _processed_image_path(abs_path), width=Inches(width_in))
 
 def _set_paragraph_border(paragraph, size_pt=0.5, color_hex="000000"):
     p = paragraph._element
@@ -207,36 +498,76 @@ def _style_image_paragraph(paragraph):
     if ADD_PARAGRAPH_BORDER:
         _set_paragraph_border(paragraph, size_pt=0.5, color_hex="000000")
 
-def _postprocess_outline_and_layout(docx_path: str):
-    """
-    After rendering:
-      - center-align image paragraphs and zero their spacing
-      - optionally add picture outline via DrawingML
-    """
-    d = Document(docx_path)
+def _has_drawing(paragraph) -> bool:
+    return bool(paragraph._element.xpath('.//w:drawing'))
 
-    for p in d.paragraphs:
-        if p._element.xpath('.//w:drawing'):
-            _style_image_paragraph(p)
+def _shade_cell(cell, sev: str):
+    tc_pr = cell._tc.get_or_add_tcPr()
+    tc_pr.append(parse_xml(
+        f'<w:shd xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+        f'w:val="clear" w:color="auto" w:fill="{get_color(sev)}"/>'
+    ))
 
-    for tbl in d.tables:
-        for row in tbl.rows:
-            for cell in row.cells:
+SHADED_SEVERITIES = ("critical", "high", "medium", "low", "info")
+
+def _postprocess_table(table, style_images: bool = True, shade: bool = True):
+    """
+    One walk over a rendered table:
+      - center-align image paragraphs in its cells and zero their spacing
+      - shade the 'Risk Rating'/'Severity' column below the header row
+      - shade the value cell of 'Severity | <value>' label rows
+    """
+    rows = [row.cells for row in table.rows]   # row.cells is costly; compute once
+    if style_images:
+        for cells in rows:
+            for cell in cells:
                 for p in cell.paragraphs:
-                    if p._element.xpath('.//w:drawing'):
+                    if _has_drawing(p):
                         _style_image_paragraph(p)
+    if not shade or not rows:
+        return
+
+    headers = [c.text.strip().lower() for c in rows[0]]
+    if "risk rating" in headers: idx = headers.index("risk rating")
+    elif "severity" in headers: idx = headers.index("severity")
+    else: idx = None
+    if idx is not None:
+        for cells in rows[1:]:
+            sev = cells[idx].text.strip().lower()
+            if sev in SHADED_SEVERITIES:
+                _shade_cell(cells[idx], sev)
+
+    for cells in rows:
+        if len(cells) >= 2 and cells[0].text.strip().lower() == "severity":
+            sev = cells[1].text.strip().lower()
+            if sev in SHADED_SEVERITIES:
+                _shade_cell(cells[1], sev)
+
+def _postprocess_document(d, style_images: bool = True, shade: bool = True):
+    """
+    Single in-memory pass over the rendered document (no save/reload):
+      - image paragraph layout in the body, tables, headers and footers
+      - severity cell shading
+      - optional picture outline via DrawingML
+    """
+    if style_images:
+        for p in d.paragraphs:
+            if _has_drawing(p):
+                _style_image_paragraph(p)
 
-    for sec in d.sections:
-        for container in (sec.header, sec.footer):
-            if container:
-                for p in container.paragraphs:
-                    if p._element.xpath('.//w:drawing'):
-                        _style_image_paragraph(p)
+    for tbl in d.tables:
+        _postprocess_table(tbl, style_images=style_images, shade=shade)
 
-    if ADD_PICTURE_OUTLINE_XML:
-        _add_picture_outline_xml(d, PICTURE_OUTLINE_PT)
+    if style_images:
+        for sec in d.sections:
+            for container in (sec.header, sec.footer):
+                if container:
+                    for p in container.paragraphs:
+                        if _has_drawing(p):
+                            _style_image_paragraph(p)
 
-    d.save(docx_path)
+        if ADD_PICTURE_OUTLINE_XML:
+            _add_picture_outline_xml(d, PICTURE_OUTLINE_PT)
 
 def _add_picture_outline_xml(doc: Document, line_pt: float = 0.5):
     """
@@ -272,74 +603,258 @@ def _add_picture_outline_xml(doc: Document, line_pt: float = 0.5):
             )
             spPr.append(parse_xml(ln_xml))
 
-# ----------------------------- MAIN API -----------------------------
+REPORT_FORMAT_VERSION = 1   # bump when report layout/code changes so cached artifacts are not reused
 
-def generate_word_report(app_id):
-    template_path = WORD_TEMPLATE
-    app_file = os.path.join(os.path.dirname(__file__), 'data', 'applications', f'{app_id}.json')
-    vuln_file = os.path.join(os.path.dirname(__file__), 'data', 'vulnerabilities', f'{app_id}.json')
-    if not all(os.path.exists(p) for p in [template_path, app_file, vuln_file]):
-        return None
+def _report_fingerprint(kind: str, template_path: str, app_data, vulnerabilities,
+                        include_screenshots: bool = True) -> str:
+    """
+    Hash of everything an export depends on: app and vulnerability JSON, the
+    content of every referenced screenshot (Word only), the template file, the
+    image/layout toggles and the image/report pipeline versions.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([kind, REPORT_FORMAT_VERSION, _image_config_key(), _layout_config()]).encode())
+    h.update(_file_digest(template_path).encode())
+    h.update(json.dumps(app_data, sort_keys=True).encode())
+    h.update(json.dumps(vulnerabilities, sort_keys=True).encode())
+    for vuln in (vulnerabilities if include_screenshots else ()):
+        for step in vuln.get("steps", []):
+            resolved = _resolve_screenshot_path((step.get("screenshot") or "").strip())
+            h.update((_file_digest(resolved) if resolved else "-").encode())
+    return h.hexdigest()
+
+def _description_rich_text(v) -> CellRichText:
+    """Rich text for the Description column: bold headings, summary, description, steps."""
+    # helper for rich text blocks (bold or normal)
+    def tb(text, bold=False):
+        return TextBlock(text=text, font=XLInlineFont(b=bool(bold)))
 
-    doc = DocxTemplate(template_path)
-    with open(app_file) as f: app_data = json.load(f)
-    with open(vuln_file) as f: vulnerabilities = json.load(f)
-    vulnerabilities.sort(key=lambda x: float(x.get("cvss", 0)), reverse=True)
-
-    vuln_summary, vuln_details = [], []
-
-    for vuln in vulnerabilities:
-        vuln_summary.append({
-            "vulnerability_id": vuln.get("id", ""),
-            "title": vuln.get("title", ""),
-            "cvss_score": str(vuln.get("cvss", "")),
-            "severity": vuln.get("severity", "")
-        })
-        step_entries = []
-        for idx, step in enumerate(vuln.get("steps", []), 1):
-            image_filename = (step.get("screenshot") or "").strip()
-            resolved_path = _resolve_screenshot_path(image_filename)
-            exists = os.path.exists(resolved_path) if resolved_path else False
-            is_valid = False
-            if exists and image_filename:
-                try:
-                    with Image.open(resolved_path) as im:
-                        im.verify()
-                    is_valid = True
-                except Exception as ex:
-                    print(f"Invalid image file: {resolved_path} | Error: {ex}")
-            else:
-                print(f"Image file missing or no filename: {os.path.join(SCREENSHOT_DIR, image_filename)}")
+    redacted_summary = v.get("summary", "") or ""
+    long_description = v.get("description", "") or ""
+    steps_block = "\n".join(
+        [f"Step {i+1}: {s.get('description','')}" for i, s in enumerate(v.get("steps", []))]
+    )
 
-            print(f"Screenshot for step {idx}: {resolved_path}, exists: {exists}, valid: {is_valid}, screenshot val: {image_filename}")
-            screenshot_obj = ""
-            if is_valid and resolved_path:
-                try:
-                    screenshot_obj = _inline_image_force_png_path(doc, resolved_path, width_in=6.48)
-                except Exception as ex:
-                    print(f"Failed to embed screenshot for {resolved_path}: {ex}")
+    rt = CellRichText()
+    rt.append(tb("Redacted Summary:\n", bold=True))
+    rt.append(tb(f"{redacted_summary}\n\n", bold=False))
+
+    rt.append(tb("Description:\n", bold=True))
+    rt.append(tb(f"{long_description}\n", bold=False))
+
+    if steps_block.strip():
+        rt.append(tb("\nSteps to Reproduce:\n", bold=True))
+        rt.append(tb(steps_block, bold=False))
+    return rt
+
+def _finding_row(app, v, description=None, finding_tag=None) -> list:
+    """Columns A..L of one finding, in template order."""
+    return [
+        app.get("name", ""),            # A: App Name
+        v.get("url", ""),               # B: Affected URL
+        v.get("id", ""),                # C: Vulnerability ID
+        v.get("cvss", 0),               # D: CVSS Score (numeric)
+        "",                             # E: placeholder (match template)
+        v.get("title", ""),             # F: Title
+        description,                    # G: Description (rich text)
+        v.get("impact", ""),            # H: Business Impact
+        "",                             # I: placeholder
+        v.get("recommendation", ""),    # J: Recommendation
+        v.get("reference", ""),         # K: Reference
+        finding_tag,                    # L: Finding Tag (formula)
+    ]
+
+def _finding_tag_formula(row: int) -> str:
+    return f'=A{row}&", "&C{row}&", "&F{row}'
+
+def _write_findings_rows(ws, app, vulns_sorted):
+    """Append one template-formatted row per finding (rich-text G, formula L)."""
+    # ws.max_row rescans every cell, so count rows instead of asking per row
+    last_row = ws.max_row
+    for v in vulns_sorted:
+        # Append a row. Description and Finding Tag are set below.
+        ws.append(_finding_row(app, v))
+        last_row += 1
 
-            step_entries.append({
-                "index": idx,
-                "description": step.get("description", ""),
-                "screenshot": screenshot_obj
-            })
+        # Set Description rich text (column 7 → "G")
+        desc_cell = ws.cell(row=last_row, column=7)
+        desc_cell.value = _description_rich_text(v)
+        desc_cell.alignment = Alignment(wrap_text=True)
+
+        # Set Finding Tag formula in column L (12)
+        ws.cell(row=last_row, column=12).value = _finding_tag_formula(last_row)
+
+# ----------------------------- STREAMING EXCEL -----------------------------
+# Write-only workbooks keep memory flat for very large exports: rows go
+# straight to a temporary sheet file instead of living as Cell objects.
+
+EXCEL_STREAMING_MIN_ROWS = 5000   # exports with at least this many findings are streamed
+
+def _open_streaming_workbook():
+    """A write-only workbook plus the (tiny) template sheet to copy headers/styles from."""
+    template_ws = load_workbook(EXCEL_TEMPLATE).active
+    return Workbook(write_only=True), template_ws
+
+def _copy_to_write_only(ws, src):
+    cell = WriteOnlyCell(ws, value=src.value)
+    if src.has_style:
+        cell.font = copy(src.font)
+        cell.fill = copy(src.fill)
+        cell.border = copy(src.border)
+        cell.alignment = copy(src.alignment)
+        cell.number_format = src.number_format
+        cell.protection = copy(src.protection)
+    return cell
+
+def _streaming_findings_sheet(wb, template_ws, title):
+    """
+    Create a write-only sheet carrying the template's column widths, frozen
+    panes and styled header rows. Returns (sheet, next free row number).
+    """
+    ws = wb.create_sheet(title=title)
+    for key, dim in template_ws.column_dimensions.items():
+        if dim.width:
+            ws.column_dimensions[key].width = dim.width
+    if template_ws.freeze_panes:
+        ws.freeze_panes = template_ws.freeze_panes
+    for row in template_ws.iter_rows():
+        height = template_ws.row_dimensions[row[0].row].height
+        if height:
+            ws.row_dimensions[row[0].row].height = height
+        ws.append([_copy_to_write_only(ws, c) for c in row])
+    return ws, template_ws.max_row + 1
+
+def _stream_findings_rows(ws, app, vulns_sorted, next_row: int) -> int:
+    """Streaming twin of _write_findings_rows; returns the next free row number."""
+    wrap = Alignment(wrap_text=True)
+    for v in vulns_sorted:
+        desc_cell = WriteOnlyCell(ws, value=_description_rich_text(v))
+        desc_cell.alignment = wrap
+        ws.append(_finding_row(app, v, desc_cell, _finding_tag_formula(next_row)))
+        next_row += 1
+    return next_row
+
+# ----------------------------- MAIN API -----------------------------
+
+def word_report_filename(app_data) -> str:
+    safe_name = app_data.get("name", "Report").replace("/", "_").replace("\\", "_").replace(" ", "_")
+    return f"GW_{safe_name}_Penetration_Test_Report.docx"
 
-        vuln_details.append({
-            "title": vuln.get("title", ""),
-            "vulnerability_id": vuln.get("id", ""),
-            "summary": vuln.get("summary", ""),
-            "description": vuln.get("description", ""),
-            "business_impact": vuln.get("impact", ""),
-            "severity": vuln.get("severity", ""),
-            "cvss_score": str(vuln.get("cvss", "")),
-            "cvss_vector": str(vuln.get("cvss_vector", "")),
-            "affected_url": vuln.get("url", ""),
-            "recommendation": vuln.get("recommendation", ""),
-            "cwe_id": vuln.get("cwe", ""),
-            "reference": vuln.get("reference", ""),
-            "step_entries": step_entries
-        })
+def generate_word_report(app_id, progress=None, stats=None, profile=False, output_path=None):
+    """
+    Render the Word report for app_id. Every export logs one JSON line of
+    per-stage timings and counters (see backend/profiling.py); pass an
+    ExportStats as `stats` to read them afterwards, and profile=True to also
+    dump a cProfile of this export. `progress`, if given, is called with
+    "processing images" and "rendering". The report goes to output_path, by
+    default the Downloads folder under the application's name.
+    """
+    with instrument_export("word", app_id, stats, profile) as stats:
+        template_path = WORD_TEMPLATE
+        with stats.stage("load"):
+            app_data = get_application(app_id)
+            vulnerabilities = load_vulnerabilities(app_id) if app_data else []
+        if not app_data or not os.path.exists(template_path):
+            return None
+        output_path = output_path or os.path.join(DOWNLOAD_DIR, word_report_filename(app_data))
+        return _word_report_from(app_data, vulnerabilities, output_path, stats, progress,
+                                 image_workers=1 if profile else None)
+
+def _word_report_from(app_data, vulnerabilities, output_path, stats, progress=None, image_workers=None):
+    """Reuse the stored artifact for this exact input, or render and store it."""
+    template_path = WORD_TEMPLATE
+    stats.count("findings", len(vulnerabilities))
+    with stats.stage("fingerprint"):
+        fingerprint = _report_fingerprint("word", template_path, app_data, vulnerabilities)
+        cached = artifact_store.fetch(fingerprint, ".docx", output_path)
+    stats.set("cached", bool(cached))
+    if not cached:
+        render_word_report(template_path, app_data, vulnerabilities, output_path, stats, progress,
+                           image_workers=image_workers)
+        with stats.stage("store"):
+            artifact_store.store(fingerprint, ".docx", output_path)
+    stats.set("output_path", output_path)
+    return output_path
+
+def render_word_report(template_path, app_data, vulnerabilities, output_path, stats=None, progress=None,
+                       image_workers=None):
+    """
+    Fill the Word template from already-loaded app/vulnerability data and save
+    it to output_path: images -> context -> render -> single post-process -> save.
+    image_workers=1 keeps screenshot processing in this process (profiling).
+    """
+    stats = stats or ExportStats("word", app_data.get("id"))
+    progress = progress or (lambda state: None)
+    with stats.stage("template"):
+        doc = DocxTemplate(template_path)
+    vulnerabilities = sorted(vulnerabilities, key=lambda x: float(x.get("cvss", 0)), reverse=True)
+
+    # Stage 1: resolve and preprocess every referenced screenshot up front
+    progress("processing images")
+    with stats.stage("images"):
+        step_images = {}
+        for vuln in vulnerabilities:
+            for step in vuln.get("steps", []):
+                image_filename = (step.get("screenshot") or "").strip()
+                resolved_path = _resolve_screenshot_path(image_filename)
+                exists = os.path.exists(resolved_path) if resolved_path else False
+                step_images[id(step)] = (image_filename, resolved_path, exists)
+                if image_filename and not exists:
+                    stats.count("images_missing")
+        sources = {p for name, p, exists in step_images.values() if exists and name}
+        stats.count("images", len(sources))
+        stats.count("image_bytes", sum(os.path.getsize(p) for p in sources))
+        prepared = _prepare_screenshots(sources, max_workers=image_workers, stats=stats)
+
+    # Stage 2: assemble the render context once all images are ready
+    with stats.stage("context"):
+        vuln_summary, vuln_details = [], []
+
+        for vuln in vulnerabilities:
+            vuln_summary.append({
+                "vulnerability_id": vuln.get("id", ""),
+                "title": vuln.get("title", ""),
+                "cvss_score": str(vuln.get("cvss", "")),
+                "severity": vuln.get("severity", "")
+            })
+            step_entries = []
+            for idx, step in enumerate(vuln.get("steps", []), 1):
+                image_filename, resolved_path, exists = step_images[id(step)]
+                screenshot_obj = ""
+                if exists and image_filename:
+                    outcome = prepared.get(resolved_path)
+                    if isinstance(outcome, str):
+                        screenshot_obj = _inline_image_force_png_path(
+                            doc, resolved_path, width_in=6.48, processed_path=outcome
+                        )
+                        stats.count("images_embedded")
+                        stats.count("embedded_bytes", os.path.getsize(outcome))
+                    else:
+                        log.warning(f"Invalid image file: {resolved_path} | Error: {outcome}")
+                elif image_filename:
+                    log.warning(f"Image file missing: {os.path.join(SCREENSHOT_DIR, image_filename)}")
+
+                step_entries.append({
+                    "index": idx,
+                    "description": step.get("description", ""),
+                    "screenshot": screenshot_obj
+                })
+
+            vuln_details.append({
+                "title": vuln.get("title", ""),
+                "vulnerability_id": vuln.get("id", ""),
+                "summary": vuln.get("summary", ""),
+                "description": vuln.get("description", ""),
+                "business_impact": vuln.get("impact", ""),
+                "severity": vuln.get("severity", ""),
+                "cvss_score": str(vuln.get("cvss", "")),
+                "cvss_vector": str(vuln.get("cvss_vector", "")),
+                "affected_url": vuln.get("url", ""),
+                "recommendation": vuln.get("recommendation", ""),
+                "cwe_id": vuln.get("cwe", ""),
+                "reference": vuln.get("reference", ""),
+                "step_entries": step_entries
+            })
 
     app_details = [{
         "index": i+1, "app_name": a.get("name", ""), "app_version": a.get("version", ""), "app_url": a.get("url", "")
@@ -360,124 +875,214 @@ def generate_word_report(app_id):
         "test_credentials": app_data.get("test_credentials", [])
     }
 
-    safe_name = app_data.get("name", "Report").replace("/", "_").replace("\\", "_").replace(" ", "_")
-    filename = f"GW_{safe_name}_Penetration_Test_Report.docx"
-    output_path = os.path.join(DOWNLOAD_DIR, filename)
-
-    print("START DATE:", context["start_date"])
-    print("END DATE:", context["end_date"])
-    doc.render(context)
-    doc.save(output_path)
-
-    _postprocess_outline_and_layout(output_path)
-
-    d = Document(output_path)
-    for table in d.tables:
-        headers = [c.text.strip().lower() for c in table.rows[0].cells]
-        if "risk rating" in headers: idx = headers.index("risk rating")
-        elif "severity" in headers: idx = headers.index("severity")
-        else: continue
-        for row in table.rows[1:]:
-            sev = row.cells[idx].text.strip().lower()
-            if sev in ["critical", "high", "medium", "low", "info"]:
-                tc_pr = row.cells[idx]._tc.get_or_add_tcPr()
-                tc_pr.append(parse_xml(
-                    f'<w:shd xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
-                    f'w:val="clear" w:color="auto" w:fill="{get_color(sev)}"/>'
-                ))
-
-    for table in d.tables:
-        for row in table.rows:
-            if len(row.cells) >= 2 and row.cells[0].text.strip().lower() == "severity":
-                sev = row.cells[1].text.strip().lower()
-                if sev in ["critical", "high", "medium", "low", "info"]:
-                    tc_pr = row.cells[1]._tc.get_or_add_tcPr()
-                    tc_pr.append(parse_xml(
-                        f'<w:shd xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
-                        f'w:val="clear" w:color="auto" w:fill="{get_color(sev)}"/>'
-                    ))
-
-    d.save(output_path)
-    return output_path
+    progress("rendering")
+    with stats.stage("render"):
+        doc.render(context)
 
-def generate_excel_report(app_id):
-    # Load the Excel template
-    wb = load_workbook(EXCEL_TEMPLATE)
-    ws = wb.active
+    with stats.stage("postprocess"):
+        _postprocess_document(doc.docx)
 
-    # Get app and its vulnerabilities
-    app = next((a for a in load_applications() if a['id'] == app_id), None)
-    if not app:
-        return None
+    with stats.stage("save"):
+        doc.save(output_path)
+    return output_path
 
-    vulns = load_vulnerabilities(app_id)
+def generate_excel_report(app_id, progress=None, streaming=None, stats=None, profile=False):
+    """
+    streaming=None picks write-only mode automatically for exports of
+    EXCEL_STREAMING_MIN_ROWS findings or more; True/False forces a mode.
+    stats/profile as for generate_word_report.
+    """
+    with instrument_export("excel", app_id, stats, profile) as stats:
+        # Get app and its vulnerabilities
+        with stats.stage("load"):
+            app = get_application(app_id)
+            vulns = load_vulnerabilities(app_id) if app else []
+        if not app:
+            return None
+        stats.count("findings", len(vulns))
+
+        if streaming is None:
+            streaming = len(vulns) >= EXCEL_STREAMING_MIN_ROWS
+        stats.set("streaming", streaming)
+
+        # Build filename: GW_<App_Name>_Excel_Findings_<Count>.xlsx
+        safe_name = (app.get("name", "Report")
+                     .replace("/", "_").replace("\\", "_").replace(" ", "_"))
+        filename = f"GW_{safe_name}_Excel_Findings_{len(vulns)}.xlsx"
+        output_path = os.path.join(DOWNLOAD_DIR, filename)
+        stats.set("output_path", output_path)
+
+        # Unchanged inputs -> hand back the previously generated workbook
+        kind = "excel-stream" if streaming else "excel"
+        with stats.stage("fingerprint"):
+            fingerprint = _report_fingerprint(kind, EXCEL_TEMPLATE, app, vulns, include_screenshots=False)
+            cached = artifact_store.fetch(fingerprint, ".xlsx", output_path)
+        stats.set("cached", bool(cached))
+        if cached:
+            return output_path
+
+        if progress:
+            progress("rendering")
+
+        # Sort by highest CVSS first (descending)
+        vulns_sorted = sorted(
+            vulns,
+            key=lambda v: float(v.get("cvss", 0) or 0),
+            reverse=True
+        )
 
-    # Sort by highest CVSS first (descending)
-    vulns_sorted = sorted(
-        vulns,
-        key=lambda v: float(v.get("cvss", 0) or 0),
-        reverse=True
-    )
+        with stats.stage("template"):
+            if streaming:
+                wb, template_ws = _open_streaming_workbook()
+                ws, next_row = _streaming_findings_sheet(wb, template_ws, template_ws.title)
+            else:
+                # Load the Excel template
+                wb = load_workbook(EXCEL_TEMPLATE)
+        with stats.stage("rows"):
+            if streaming:
+                _stream_findings_rows(ws, app, vulns_sorted, next_row)
+            else:
+                _write_findings_rows(wb.active, app, vulns_sorted)
 
-    # helper for rich text blocks (bold or normal)
-    def tb(text, bold=False):
-        return TextBlock(text=text, font=XLInlineFont(b=bool(bold)))
+        with stats.stage("save"):
+            wb.save(output_path)
+        with stats.stage("store"):
+            artifact_store.store(fingerprint, ".xlsx", output_path)
+        return output_path
 
-    # Write rows to the sheet
-    for v in vulns_sorted:
-        redacted_summary = v.get("summary", "") or ""
-        long_description = v.get("description", "") or ""
-        steps_block = "\n".join(
-            [f"Step {i+1}: {s.get('description','')}" for i, s in enumerate(v.get("steps", []))]
-        )
+# ----------------------------- BATCH EXPORT -----------------------------
 
-        # Append a row. Put None in the Description and Finding Tag columns for now.
-        ws.append([
-            app.get("name", ""),            # A: App Name
-            v.get("url", ""),               # B: Affected URL
-            v.get("id", ""),                # C: Vulnerability ID
-            v.get("cvss", 0),               # D: CVSS Score (numeric)
-            "",                             # E: placeholder (match template)
-            v.get("title", ""),             # F: Title
-            None,                           # G: Description (rich text inserted below)
-            v.get("impact", ""),            # H: Business Impact
-            "",                             # I: placeholder
-            v.get("recommendation", ""),    # J: Recommendation
-            v.get("reference", ""),         # K: Reference
-            None                            # L: Finding Tag (formula set below)
-        ])
-
-        # Build rich text for the Description cell (column 7 → "G")
-        rt = CellRichText()
-        rt.append(tb("Redacted Summary:\n", bold=True))
-        rt.append(tb(f"{redacted_summary}\n\n", bold=False))
-
-        rt.append(tb("Description:\n", bold=True))
-        rt.append(tb(f"{long_description}\n", bold=False))
-
-        if steps_block.strip():
-            rt.append(tb("\nSteps to Reproduce:\n", bold=True))
-            rt.append(tb(steps_block, bold=False))
-
-        last_row = ws.max_row
-
-        # Set Description rich text
-        desc_cell = ws.cell(row=last_row, column=7)  # G
-        desc_cell.value = rt
-        desc_cell.alignment = Alignment(wrap_text=True)
+BATCH_LAYOUTS = ("per_app", "consolidated")
 
-        # Set Finding Tag formula in column L (12)
-        ws.cell(
-     row=last_row,
-   column=12
-).value = f'=A{last_row}&", "&C{last_row}&", "&F{last_row}'
-
-    # Build filename: GW_<App_Name>_Excel_Findings_<Count>.xlsx
-    safe_name = (app.get("name", "Report")
-                 .replace("/", "_").replace("\\", "_").replace(" ", "_"))
-    findings_count = len(vulns_sorted)
-    filename = f"GW_{safe_name}_Excel_Findings_{findings_count}.xlsx"
-    output_path = os.path.join(DOWNLOAD_DIR, filename)
+def _sheet_title(name: str, used: set) -> str:
+    """Excel sheet names: max 31 chars, no []:*?/\\ and unique per workbook."""
+    base = "".join("_" if c in '[]:*?/\\' else c for c in (name or "Application")).strip() or "Application"
+    title, n = base[:31], 2
+    while title.lower() in used:
+        suffix = f" ({n})"
+        title, n = base[:31 - len(suffix)] + suffix, n + 1
+    used.add(title.lower())
+    return title
 
+def generate_batch_excel_report(apps_with_vulns, layout="per_app", output_path=None, streaming=None):
+    """
+    Write the findings of several applications into one workbook, loading the
+    template once: one template-styled sheet per application ("per_app") or
+    every finding on the template sheet ("consolidated"). Large batches are
+    written in write-only mode (see generate_excel_report for streaming).
+    """
+    if layout not in BATCH_LAYOUTS:
+        raise ValueError(f"Unknown batch layout: {layout}")
+    if streaming is None:
+        streaming = sum(len(vulns) for _, vulns in apps_with_vulns) >= EXCEL_STREAMING_MIN_ROWS
+    if streaming:
+        wb, template_ws = _open_streaming_workbook()
+    else:
+        wb = load_workbook(EXCEL_TEMPLATE)
+        template_ws = wb.active
+    used_titles = set()
+    ws, next_row = None, None
+
+    for app, vulns in apps_with_vulns:
+        vulns_sorted = sorted(vulns, key=lambda v: float(v.get("cvss", 0) or 0), reverse=True)
+        if streaming:
+            if layout == "per_app" or ws is None:
+                title = template_ws.title if layout == "consolidated" else _sheet_title(app.get("name", ""), used_titles)
+                ws, next_row = _streaming_findings_sheet(wb, template_ws, title)
+            next_row = _stream_findings_rows(ws, app, vulns_sorted, next_row)
+            continue
+        if layout == "consolidated":
+            ws = template_ws
+        else:
+            ws = wb.copy_worksheet(template_ws)
+            ws.title = _sheet_title(app.get("name", ""), used_titles)
+        _write_findings_rows(ws, app, vulns_sorted)
+
+    if streaming and ws is None:
+        _streaming_findings_sheet(wb, template_ws, template_ws.title)
+    if not streaming and layout == "per_app" and len(wb.worksheets) > 1:
+        wb.remove(template_ws)
+
+    if not output_path:
+        stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        output_path = os.path.join(DOWNLOAD_DIR, f"GW_Batch_Excel_Findings_{len(apps_with_vulns)}_apps_{stamp}.xlsx")
     wb.save(output_path)
     return output_path
+
+def _batch_word_report(app_data, vulnerabilities, output_path):
+    # Runs in a pool worker: renders the data the batch loaded, and its
+    # screenshots are already prepared, so no storage reads and no nested pool
+    if not os.path.exists(WORD_TEMPLATE):
+        return None
+    with instrument_export("word", app_data.get("id")) as stats:
+        return _word_report_from(app_data, vulnerabilities, output_path, stats, image_workers=1)
+
+def generate_batch_word_reports(apps_with_vulns, output_dir, max_workers: int | None = None) -> dict:
+    """
+    Render the Word report of every (app, vulns) pair into output_dir on
+    export_pool(), from exactly the data passed in, so the reports match the
+    workbook built from the same load. All screenshots of the batch are
+    preprocessed once up front, so the per-report workers only read finished
+    renditions. Each report gets its own file (applications may share a
+    name, e.g. re-tests). Returns {app_id: path}.
+    """
+    paths = []
+    for _, vulns in apps_with_vulns:
+        for vuln in vulns:
+            for step in vuln.get("steps", []):
+                resolved = _resolve_screenshot_path((step.get("screenshot") or "").strip())
+                if resolved:
+                    paths.append(resolved)
+    _prepare_screenshots(paths)
+
+    app_ids = [app["id"] for app, _ in apps_with_vulns]
+    outputs = [os.path.join(output_dir, f"{i:03d}_" + "".join(c if c.isalnum() or c in "-_" else "_"
+                                                             for c in str(app_id)) + ".docx")
+               for i, app_id in enumerate(app_ids, 1)]
+    workers = min(len(app_ids), max_workers or EXPORT_IMAGE_WORKERS)
+    if workers > 1:
+        pool = None
+        try:
+            pool = export_pool()
+            apps, vulns = zip(*apps_with_vulns)
+            return dict(zip(app_ids, pool.map(_batch_word_report, apps, vulns, outputs)))
+        except (OSError, RuntimeError) as ex:
+            # RuntimeError covers BrokenProcessPool and a pool shut down meanwhile
+            log.warning(f"Export pool unavailable, rendering the batch serially: {ex}")
+            if pool is not None and isinstance(ex, BrokenProcessPool):
+                _discard_export_pool(pool)
+    return {app["id"]: _batch_word_report(app, vulns, out)
+            for (app, vulns), out in zip(apps_with_vulns, outputs)}
+
+def generate_batch_export(apps, layout="per_app", include_word=False, progress=None):
+    """
+    One-pass export for many applications: a combined workbook and, with
+    include_word, every Word report as well, all packed into a single zip.
+    Returns the path of the workbook (or of the zip when Word is included).
+    """
+    progress = progress or (lambda state: None)
+    apps_with_vulns = [(app, load_vulnerabilities(app["id"])) for app in apps]
+
+    progress("rendering")
+    workbook_path = generate_batch_excel_report(apps_with_vulns, layout=layout)
+    if not include_word:
+        return workbook_path
+
+    word_dir = tempfile.mkdtemp(prefix="h4_batch_", dir=DOWNLOAD_DIR)
+    try:
+        progress("processing images")
+        word_paths = generate_batch_word_reports(apps_with_vulns, word_dir)
+
+        progress("rendering")
+        zip_path = os.path.splitext(workbook_path)[0].replace("_Excel_Findings_", "_Reports_") + ".zip"
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.write(workbook_path, arcname=os.path.basename(workbook_path))
+            for i, (app, _) in enumerate(apps_with_vulns, 1):
+                path = word_paths.get(app["id"])
+                if path and os.path.exists(path):
+                    zf.write(path, arcname=f"{i:03d}_{word_report_filename(app)}")
+                else:
+                    log.warning(f"Word report missing from batch for app {app['id']}")
+    finally:
+        shutil.rmtree(word_dir, ignore_errors=True)
+    return zip_path
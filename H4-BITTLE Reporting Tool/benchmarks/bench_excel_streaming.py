@@ -0,0 +1,96 @@
+"""
+Excel findings export: rows/sec and peak RSS, in-memory vs write-only streaming.
+
+    python -m benchmarks.bench_excel_streaming [--sizes 1000,10000,100000] [--modes memory,streaming]
+
+Each (mode, size) runs in a fresh interpreter so its peak RSS is its own.
+Findings are generated lazily, so the reported memory is the workbook's,
+not the synthetic corpus'. Peak RSS comes from getrusage (Unix only).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import argparse
+import tempfile
+import subprocess
+
+MODES = ("memory", "streaming")
+
+
+def iter_findings(count):
+    for i in range(count):
+        yield {
+            "id": f"V{i + 1}", "title": f"Finding {i + 1}", "cvss": str(round(10 - (i % 100) / 10, 1)),
+            "url": f"http://bench.example.com/{i}", "summary": "Summary " * 20,
+            "description": "Description " * 60, "impact": "Impact " * 20, "recommendation": "Fix " * 20,
+            "reference": "https://owasp.org",
+            "steps": [{"description": f"Step {s + 1}"} for s in range(3)],
+        }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_one(mode, size, output_path):
+    """Child process: export `size` findings with `mode`, print a JSON result line."""
+    from openpyxl import load_workbook
+    from backend import utils
+
+    app = {"name": "Benchmark Engagement"}
+    baseline_mb = peak_rss_mb()
+    t0 = time.perf_counter()
+    if mode == "streaming":
+        wb, template_ws = utils._open_streaming_workbook()
+        ws, next_row = utils._streaming_findings_sheet(wb, template_ws, template_ws.title)
+        utils._stream_findings_rows(ws, app, iter_findings(size), next_row)
+    else:
+        wb = load_workbook(utils.EXCEL_TEMPLATE)
+        utils._write_findings_rows(wb.active, app, iter_findings(size))
+    wb.save(output_path)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({
+        "mode": mode, "rows": size, "seconds": elapsed, "rows_per_s": size / elapsed,
+        "baseline_mb": baseline_mb, "peak_mb": peak_rss_mb(),
+        "file_mb": os.path.getsize(output_path) / (1024 * 1024),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "SIZE", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, size, output_path = args.child
+        run_one(mode, int(size), output_path)
+        return
+
+    root = tempfile.mkdtemp(prefix="h4_bench_")
+    try:
+        print(f"{'mode':<10} {'rows':>8} {'seconds':>9} {'rows/s':>9} {'peak RSS':>10} {'+ over base':>12} {'file':>8}")
+        for size in [int(s) for s in args.sizes.split(",")]:
+            for mode in args.modes.split(","):
+                if mode not in MODES:
+                    parser.error(f"unknown mode: {mode}")
+                output_path = os.path.join(root, f"{mode}_{size}.xlsx")
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_excel_streaming", "--child", mode, str(size), output_path],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{mode:<10} {size:>8} {r['seconds']:>9.2f} {r['rows_per_s']:>9.0f} "
+                      f"{r['peak_mb']:>7.1f} MB {r['peak_mb'] - r['baseline_mb']:>9.1f} MB {r['file_mb']:>5.1f} MB")
+                os.remove(output_path)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
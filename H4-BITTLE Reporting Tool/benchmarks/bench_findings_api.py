@@ -0,0 +1,98 @@
+"""
+Bytes written and latency: whole-list save vs granular finding edits.
+
+    python -m benchmarks.bench_findings_api [--findings 500] [--repeat 20]
+
+For each storage backend, fixes one typo in one finding the old way
+(save_vulnerabilities with the full list) and through apply_finding_op, and
+times add/delete/reorder as well. Bytes are what the storage layer wrote
+(measure_writes), including summary/revision files.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+
+def run_backend(findings, repeat):
+    from backend import models
+
+    vulns = [{
+        "id": f"V{i + 1}", "title": f"Finding {i + 1}", "severity": "Medium", "cvss": "5.4",
+        "url": f"http://bench.example.com/{i}", "summary": "Summary " * 20,
+        "description": "Description " * 80, "impact": "Impact " * 20, "recommendation": "Fix " * 20,
+        "reference": "https://owasp.org", "steps": [{"description": f"Step {s + 1}", "screenshot": ""} for s in range(3)],
+    } for i in range(findings)]
+    models.save_application({"id": "bench", "name": "Bench"})
+    models.save_vulnerabilities("bench", vulns)
+    _, vulns = models.load_findings("bench")
+    target = vulns[len(vulns) // 2]["uid"]
+
+    def measure(fn):
+        samples, written = [], []
+        for i in range(repeat):
+            with models.measure_writes() as meter:
+                t0 = time.perf_counter()
+                fn(i)
+                samples.append((time.perf_counter() - t0) * 1000)
+            written.append(meter["bytes"])
+        return statistics.median(samples), statistics.median(written)
+
+    def whole_list(i):
+        _, current = models.load_vulnerabilities_with_revision("bench")
+        current[len(current) // 2] = dict(current[len(current) // 2], title=f"Typo fix {i}")
+        models.save_vulnerabilities("bench", current)
+
+    added = []
+
+    def add(i):
+        _, finding = models.apply_finding_op("bench", {"op": "add", "finding": dict(vulns[0], id=f"N{i}")})
+        added.append(finding["uid"])
+
+    def reorder(i):
+        _, current = models.load_vulnerabilities_with_revision("bench")
+        uids = [v["uid"] for v in current]
+        uids[0], uids[-1] = uids[-1], uids[0]
+        models.apply_finding_op("bench", {"op": "order", "uids": uids})
+
+    rows = [
+        ("whole-list save (1 typo)", measure(whole_list)),
+        ("patch one finding", measure(lambda i: models.apply_finding_op(
+            "bench", {"op": "patch", "uid": target, "fields": {"title": f"Typo fix {i}"}}))),
+        ("add finding (end)", measure(add)),
+        ("delete finding", measure(lambda i: models.apply_finding_op("bench", {"op": "delete", "uid": added[i]}))),
+        ("swap first/last", measure(reorder)),
+    ]
+    for name, (ms, written) in rows:
+        print(f"  {name:<26} {ms:>8.2f} ms {written:>10.0f} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--findings", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_backend(args.findings, args.repeat)
+        return
+
+    for backend in ("json", "sqlite"):
+        root = tempfile.mkdtemp(prefix="h4_bench_")
+        try:
+            print(f"{backend} backend, {args.findings} findings:")
+            sys.stdout.flush()
+            env = dict(os.environ, H4_DATA_DIR=root, H4_STORAGE_BACKEND=backend)
+            subprocess.run([sys.executable, "-m", "benchmarks.bench_findings_api", "--child",
+                            "--findings", str(args.findings), "--repeat", str(args.repeat)], env=env, check=True)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
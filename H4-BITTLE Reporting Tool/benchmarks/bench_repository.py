@@ -0,0 +1,104 @@
+"""
+Latency of backend.models.load_applications at 10k applications.
+
+    python -m benchmarks.bench_repository [--apps 10000] [--repeat 5]
+
+Compares the previous listdir + json.load scan with the JsonRepository
+cache (cold, warm, and warm with a handful of files touched).
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from backend.models import JsonRepository
+
+
+def make_corpus(apps_dir, vulns_dir, count):
+    for i in range(count):
+        app_id = str(uuid.uuid4())
+        app = {
+            "id": app_id,
+            "name": f"Benchmark Application {i}",
+            "description": "",
+            "start_date": f"{(i % 28) + 1:02d}-{(i % 12) + 1:02d}-2025",
+            "end_date": f"{(i % 28) + 1:02d}-{(i % 12) + 1:02d}-2025",
+            "status": ("in-progress", "completed", "on-hold")[i % 3],
+            "app_details": [{"url": f"http://app{i}.example.com", "version": "1", "name": f"app{i}"}],
+            "pentesters": [{"name": "pen", "role": "tester", "email": "pen@example.com"}],
+            "test_credentials": [],
+        }
+        with open(os.path.join(apps_dir, f"{app_id}.json"), 'w') as f:
+            json.dump(app, f, indent=2)
+
+
+def legacy_load(apps_dir):
+    applications = []
+    for filename in os.listdir(apps_dir):
+        if filename.endswith('.json'):
+            with open(os.path.join(apps_dir, filename), 'r') as f:
+                applications.append(json.load(f))
+    return applications
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--touch", type=int, default=10, help="files modified between warm reads")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="h4_bench_")
+    try:
+        apps_dir = os.path.join(root, "applications")
+        vulns_dir = os.path.join(root, "vulnerabilities")
+        os.makedirs(apps_dir)
+        os.makedirs(vulns_dir)
+        make_corpus(apps_dir, vulns_dir, args.apps)
+
+        repo = JsonRepository(apps_dir, vulns_dir)
+        legacy_ms = timed(lambda: legacy_load(apps_dir), args.repeat)
+
+        t0 = time.perf_counter()
+        repo.list_applications()
+        cold_ms = (time.perf_counter() - t0) * 1000
+        warm_ms = timed(repo.list_applications, args.repeat)
+
+        files = sorted(os.listdir(apps_dir))[:args.touch]
+
+        def touch_and_load():
+            for name in files:
+                path = os.path.join(apps_dir, name)
+                with open(path) as f:
+                    data = json.load(f)
+                data["description"] = str(time.time_ns())
+                with open(path, 'w') as f:
+                    json.dump(data, f, indent=2)
+            repo.list_applications()
+
+        touched_ms = timed(touch_and_load, args.repeat)
+
+        print(f"applications: {args.apps}")
+        print(f"legacy listdir+json.load : {legacy_ms:9.1f} ms")
+        print(f"repository cold          : {cold_ms:9.1f} ms")
+        print(f"repository warm          : {warm_ms:9.1f} ms")
+        print(f"repository warm, {args.touch:>3} dirty: {touched_ms:9.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Full-text search over a synthetic corpus (default 10k applications x 20
+findings = 200k findings).
+
+    python -m benchmarks.bench_search [--apps 10000] [--findings 20] [--repeat 20]
+
+Indexes the corpus into a throwaway FTS5 database through the same
+index_findings call every save makes, then times typical /api/search
+queries and a one-finding incremental update. Text is drawn from a Zipf
+distribution over a 20k-word vocabulary with the security terms spread
+through it, so some words are everywhere and most are rare, as in real
+reports; "worst case" searches the word that is in every finding.
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+
+DOMAIN = ("injection sql xss csrf header cookie session token password rate limiting upload file path "
+         "traversal redirect cors tls certificate cipher jwt signature authorization bypass idor "
+         "enumeration disclosure stack trace verbose error clickjacking frame cache deserialization "
+         "ssrf xxe template race condition brute force lockout otp captcha").split()
+SEVERITIES = ("Critical", "High", "Medium", "Low", "Info")
+VOCABULARY = 20000
+
+
+def make_vocabulary():
+    words = [f"w{i:x}" for i in range(VOCABULARY)]
+    for i, term in enumerate(DOMAIN):
+        words.insert(10 + i * 40, term)   # ranks 10 .. ~1800: common to fairly rare
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+    cumulative, total = [], 0.0
+    for w in weights:
+        total += w
+        cumulative.append(total)
+    return words, cumulative
+
+
+def make_finding(rnd, n, vocabulary):
+    words, cumulative = vocabulary
+
+    def text(k):
+        return " ".join(rnd.choices(words, cum_weights=cumulative, k=k))
+    return {
+        "uid": f"{n:012x}", "title": text(3).title(), "severity": rnd.choice(SEVERITIES),
+        "cvss": f"{rnd.uniform(0, 10):.1f}", "url": f"https://app{n % 997}.example.com/{rnd.choice(DOMAIN)}",
+        "summary": text(20), "description": text(60), "impact": text(20),
+        "recommendation": text(20), "cwe": f"CWE-{rnd.randint(1, 1000)}",
+    }
+
+
+def timed(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), max(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", type=int, default=10000)
+    parser.add_argument("--findings", type=int, default=20, help="findings per application")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="h4_search_")
+    try:
+        from backend.search import SearchIndex
+        index = SearchIndex(os.path.join(root, "search.sqlite3"), os.path.join(root, "none.json"))
+        rnd = random.Random(11)
+        vocabulary = make_vocabulary()
+        lists = []
+        n = 0
+        for a in range(args.apps):
+            vulns = []
+            for _ in range(args.findings):
+                vulns.append(make_finding(rnd, n, vocabulary))
+                n += 1
+            lists.append((f"app-{a}", 1, vulns))
+
+        t0 = time.perf_counter()
+        index.rebuild(lists)
+        print(f"indexed {n} findings in {time.perf_counter() - t0:.1f} s, "
+              f"{os.path.getsize(index.path) / 1e6:.0f} MB")
+
+        queries = [
+            ("rare word", dict(query="captcha")),
+            ("common word", dict(query="injection")),
+            ("two words", dict(query="clickjacking frame")),
+            ("three words", dict(query="sql injection bypass")),
+            ("prefix while typing", dict(query="deseri")),
+            ("cwe", dict(query="CWE-79")),
+            ("url", dict(query="app42 example")),
+            ("common + severity filter", dict(query="token", severities={"critical"})),
+            ("one application", dict(query="xss", app_id="app-1234")),
+            ("worst case: in every finding", dict(query="w0")),
+        ]
+        print(f"{'query':<30} {'median ms':>10} {'max ms':>8} {'hits':>5}")
+        for name, kwargs in queries:
+            median, worst, hits = timed(lambda: index.search(limit=20, **kwargs), args.repeat)
+            print(f"{name:<30} {median:>10.1f} {worst:>8.1f} {len(hits):>5}")
+
+        app_id, revision, vulns = lists[len(lists) // 2]
+        changed = list(vulns)
+        changed[3] = dict(changed[3], title="Renamed finding")
+        median, worst, _ = timed(lambda: index.index_findings(app_id, revision, changed), args.repeat)
+        print(f"incremental update (1 of {len(vulns)} findings changed): {median:.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
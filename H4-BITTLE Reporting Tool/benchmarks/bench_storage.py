@@ -0,0 +1,148 @@
+"""
+JSON vs SQLite storage backends at 10k applications / 200k findings.
+
+    python -m benchmarks.bench_storage [--apps 10000] [--findings 20] [--repeat 5]
+
+Builds a synthetic JSON tree in a throwaway H4_DATA_DIR, imports it with the
+migrate-sqlite code path, then times the model operations on both backends.
+Each operation's results are compared between the backends, so the run also
+checks that they agree.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from datetime import date
+
+STATUSES = ("in-progress", "completed", "on-hold", "in-pipeline", "cancelled")
+SEVERITIES = (("Critical", 9.6), ("High", 7.5), ("Medium", 5.3), ("Low", 3.1), ("Info", 0.0))
+
+
+def make_corpus(apps_dir, vulns_dir, apps, findings):
+    ids = []
+    for i in range(apps):
+        app_id = str(uuid.uuid4())
+        ids.append(app_id)
+        day = f"{(i % 28) + 1:02d}-{(i % 12) + 1:02d}-{2023 + i % 3}"
+        app = {
+            "id": app_id, "name": f"Benchmark Application {i}", "description": "",
+            "start_date": day, "end_date": day, "status": STATUSES[i % len(STATUSES)],
+            "app_details": [{"url": f"http://app{i}.example.com", "version": "1", "name": f"app{i}"}],
+            "pentesters": [{"name": "pen", "role": "tester", "email": "pen@example.com"}],
+            "test_credentials": [],
+        }
+        with open(os.path.join(apps_dir, f"{app_id}.json"), 'w') as f:
+            json.dump(app, f, indent=2)
+        vulns = []
+        for n in range(findings):
+            severity, cvss = SEVERITIES[(i + n) % len(SEVERITIES)]
+            vulns.append({
+                "id": f"V{n + 1}", "title": f"Finding {n + 1}", "severity": severity, "cvss": str(cvss),
+                "url": f"http://app{i}.example.com/{n}", "summary": "Summary " * 10,
+                "description": "Description " * 30, "impact": "Impact " * 10,
+                "recommendation": "Fix " * 10, "reference": "https://owasp.org",
+                "steps": [{"description": "Step 1", "screenshot": ""}],
+            })
+        with open(os.path.join(vulns_dir, f"{app_id}.json"), 'w') as f:
+            json.dump(vulns, f, indent=2)
+    return ids
+
+
+def timed(fn, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), result
+
+
+def ids_of(apps):
+    return sorted(a["id"] for a in apps)
+
+
+def page_ids(page):
+    items, next_key = page
+    return [v.get("id") for v in items], next_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apps", type=int, default=10000)
+    parser.add_argument("--findings", type=int, default=20, help="findings per application")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="h4_bench_")
+    os.environ["H4_DATA_DIR"] = root
+    try:
+        from backend import models
+        from backend import listing
+        from backend.sqlite_store import SqliteStorage
+
+        t0 = time.perf_counter()
+        ids = make_corpus(models.APPS_DIR, models.VULNS_DIR, args.apps, args.findings)
+        print(f"corpus: {args.apps} applications, {args.apps * args.findings} findings "
+              f"({time.perf_counter() - t0:.1f} s to write)")
+
+        json_store = models.JsonStorage()
+        sqlite_store = SqliteStorage(models.SQLITE_PATH)
+        t0 = time.perf_counter()
+        sqlite_store.import_json_tree()
+        print(f"migrate-sqlite: {time.perf_counter() - t0:.1f} s, "
+              f"{os.path.getsize(models.SQLITE_PATH) / 1e6:.0f} MB")
+
+        rnd = random.Random(7)
+        sample = rnd.sample(ids, min(200, len(ids)))
+        middle = json_store.get_application(sorted(ids)[len(ids) // 2])
+        deep = (listing.name_key(middle), middle["id"])   # a cursor halfway through the name order
+        ops = [
+            ("load_applications", lambda s: ids_of(s.load_applications())),
+            ("get_application x200", lambda s: [s.get_application(i)["id"] for i in sample]),
+            ("by status", lambda s: ids_of(s.load_applications_by_status("completed"))),
+            ("by month", lambda s: ids_of(s.load_applications_by_month("2024-05"))),
+            ("find: status + date range", lambda s: ids_of(s.find_applications(
+                status="in-progress", start_from=date(2024, 3, 1), start_to=date(2024, 6, 30)))),
+            ("applications_summary", lambda s: s.applications_summary()),
+            ("vulnerabilities_summary", lambda s: s.vulnerabilities_summary()),
+            ("load_vulnerabilities x200", lambda s: sum(len(s.load_vulnerabilities(i)) for i in sample)),
+            ("page 50 by name", lambda s: page_ids(s.list_applications_page(limit=50))),
+            ("page 50 by name, deep", lambda s: page_ids(s.list_applications_page(after=deep, limit=50))),
+            ("page 50 status, -start", lambda s: page_ids(s.list_applications_page(
+                status="completed", sort="start_date", descending=True, limit=50))),
+            ("findings page x200", lambda s: [page_ids(s.list_vulnerabilities_page(
+                i, severities={"high", "critical"}, sort="cvss", descending=True, limit=5)) for i in sample]),
+        ]
+
+        # Warm both (JSON parse cache/index/summary; SQLite page cache) before timing.
+        for _, fn in ops:
+            fn(json_store)
+            fn(sqlite_store)
+
+        print(f"{'operation':<28} {'json ms':>10} {'sqlite ms':>10}  same")
+        mismatched = False
+        for name, fn in ops:
+            json_ms, json_result = timed(lambda: fn(json_store), args.repeat)
+            sqlite_ms, sqlite_result = timed(lambda: fn(sqlite_store), args.repeat)
+            same = json_result == sqlite_result
+            mismatched |= not same
+            print(f"{name:<28} {json_ms:>10.1f} {sqlite_ms:>10.1f}  {'yes' if same else 'NO'}")
+
+        target = sample[0]
+        vulns = json_store.load_vulnerabilities(target)
+        for label, store in (("json", json_store), ("sqlite", sqlite_store)):
+            ms, _ = timed(lambda: store.save_vulnerabilities(target, vulns), args.repeat)
+            print(f"save_vulnerabilities ({label}): {ms:.1f} ms")
+        sys.exit(1 if mismatched else 0)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Word export time: three save/reload post-processing cycles vs one in-memory pass.
+
+    python -m benchmarks.bench_word_export [--findings 200] [--steps 2] [--repeat 3]
+
+Builds a synthetic engagement (findings with screenshot steps) and renders it
+through backend.utils.render_word_report. The legacy variant reproduces the
+old flow: render+save, reopen to style image paragraphs and save, reopen to
+shade severity cells and save. Screenshots are pre-warmed in the rendition
+cache so both variants measure only rendering and post-processing.
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from contextlib import contextmanager
+
+from PIL import Image
+from docx import Document
+
+from backend import utils
+
+SEVERITIES = [("Critical", 9.5), ("High", 8.1), ("Medium", 5.4), ("Low", 3.1), ("Info", 0.0)]
+
+
+def make_screenshots(directory, count, size=(1280, 720)):
+    paths = []
+    rnd = random.Random(42)
+    for i in range(count):
+        im = Image.new("RGB", size, (255, 255, 255))
+        for _ in range(40):
+            x, y = rnd.randrange(size[0] - 200), rnd.randrange(size[1] - 50)
+            im.paste((rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)), (x, y, x + 200, y + 50))
+        path = os.path.join(directory, f"shot_{i}.png")
+        im.save(path)
+        paths.append(path)
+    return paths
+
+
+def make_engagement(findings, steps, screenshots):
+    app = {
+        "id": "bench", "name": "Benchmark Engagement", "start_date": "01-01-2025", "end_date": "31-01-2025",
+        "status": "in-progress",
+        "app_details": [{"name": "bench", "version": "1", "url": "http://bench.example.com"}],
+        "pentesters": [{"name": "pen", "role": "tester", "email": "pen@example.com"}],
+        "test_credentials": [],
+    }
+    vulns = []
+    for i in range(findings):
+        severity, cvss = SEVERITIES[i % len(SEVERITIES)]
+        vulns.append({
+            "id": f"V{i + 1}", "title": f"Finding {i + 1}", "cvss": str(cvss), "cvss_vector": "AV:N/AC:L",
+            "severity": severity, "url": f"http://bench.example.com/{i}", "summary": "Summary " * 20,
+            "description": "Description " * 60, "impact": "Impact " * 20, "recommendation": "Fix " * 20,
+            "cwe": "CWE-79", "reference": "https://owasp.org",
+            "steps": [{"description": f"Step {s + 1}", "screenshot": screenshots[(i + s) % len(screenshots)]}
+                      for s in range(steps)],
+        })
+    return app, vulns
+
+
+@contextmanager
+def legacy_postprocess():
+    """Swap the single pass for the previous reopen/save cycles."""
+    single_pass = utils._postprocess_document
+    utils._postprocess_document = lambda d: None
+    original_save = utils.DocxTemplate.save
+
+    def save_then_reprocess(self, path, *args, **kwargs):
+        original_save(self, path, *args, **kwargs)
+        d = Document(path)
+        single_pass(d, shade=False)
+        d.save(path)
+        d = Document(path)
+        single_pass(d, style_images=False)
+        d.save(path)
+
+    utils.DocxTemplate.save = save_then_reprocess
+    try:
+        yield
+    finally:
+        utils._postprocess_document = single_pass
+        utils.DocxTemplate.save = original_save
+
+
+def run(app, vulns, out_path, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        utils.render_word_report(utils.WORD_TEMPLATE, app, vulns, out_path)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), os.path.getsize(out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--findings", type=int, default=200)
+    parser.add_argument("--steps", type=int, default=2)
+    parser.add_argument("--screenshots", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="h4_bench_word_")
+    try:
+        shots = make_screenshots(root, args.screenshots)
+        app, vulns = make_engagement(args.findings, args.steps, shots)
+        utils._prepare_screenshots(shots)
+
+        with legacy_postprocess():
+            legacy_s, legacy_size = run(app, vulns, os.path.join(root, "legacy.docx"), args.repeat)
+        single_s, single_size = run(app, vulns, os.path.join(root, "single.docx"), args.repeat)
+
+        print(f"findings: {args.findings}, screenshots/finding: {args.steps}")
+        print(f"legacy (3 save/reload cycles): {legacy_s:7.2f} s  {legacy_size / 1e6:6.1f} MB")
+        print(f"single in-memory pass        : {single_s:7.2f} s  {single_size / 1e6:6.1f} MB")
+        print(f"speedup                      : {legacy_s / single_s:7.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Synthetic engagement corpus: N applications, M findings each, K screenshots.
+
+    python -m benchmarks.corpus --out DIR [--apps 50] [--findings 20] [--screenshots 40] [--seed 1]
+
+Writes a complete data tree under DIR, laid out like a real install:
+DIR/data (point H4_DATA_DIR at it) and DIR/screenshots (H4_SCREENSHOT_DIR).
+Everything goes through the models API and the screenshot store, so the
+indexes, summary, search index and screenshot references are built exactly
+as uploads would build them. The same seed gives the same corpus.
+"""
+import os
+import sys
+import random
+import argparse
+from datetime import date, timedelta
+
+STATUSES = ("in-progress", "completed", "on-hold", "in-pipeline", "cancelled")
+SEVERITIES = (("Critical", 9.6), ("High", 7.5), ("Medium", 5.3), ("Low", 3.1), ("Info", 0.0))
+TITLES = (
+    "Reflected Cross-Site Scripting", "SQL Injection", "Server-Side Request Forgery",
+    "Insecure Direct Object Reference", "Missing Security Headers", "Weak Password Policy",
+    "Open Redirect", "Sensitive Data in Logs", "Outdated Component", "CSRF on State Change",
+)
+# (width, height) ranges of generated screenshots: small crops to full 1440p captures
+SCREENSHOT_SIZES = ((320, 200), (800, 600), (1280, 720), (1920, 1080), (2560, 1440))
+
+TEXT = ("the application fails to validate user supplied input before it is used in a query "
+        "which allows an attacker to read or modify data belonging to other users").split()
+
+
+def corpus_dirs(root):
+    return os.path.join(root, "data"), os.path.join(root, "screenshots")
+
+
+def use_corpus(root):
+    """Point the backend at a corpus. Must run before anything imports backend.config."""
+    data_dir, screenshot_dir = corpus_dirs(root)
+    os.environ["H4_DATA_DIR"] = data_dir
+    os.environ["H4_SCREENSHOT_DIR"] = screenshot_dir
+    os.makedirs(screenshot_dir, exist_ok=True)
+
+
+def sentence(rnd, words):
+    return " ".join(rnd.choice(TEXT) for _ in range(words)).capitalize() + "."
+
+
+def make_screenshot(rnd, path):
+    """A PNG of random size with flat UI-like blocks and a noisy region, so file sizes vary."""
+    from PIL import Image
+    w, h = rnd.choice(SCREENSHOT_SIZES)
+    im = Image.new("RGB", (w, h), (255, 255, 255))
+    for _ in range(rnd.randrange(10, 60)):
+        x, y = rnd.randrange(w - 40), rnd.randrange(h - 20)
+        bw, bh = rnd.randrange(20, max(21, w // 3)), rnd.randrange(10, max(11, h // 6))
+        im.paste((rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)), (x, y, min(w, x + bw), min(h, y + bh)))
+    noise_w, noise_h = rnd.randrange(w // 8, w // 2), rnd.randrange(h // 8, h // 2)
+    im.paste(Image.frombytes("RGB", (noise_w, noise_h), rnd.randbytes(noise_w * noise_h * 3)),
+             (rnd.randrange(w - noise_w), rnd.randrange(h - noise_h)))
+    im.save(path, format="PNG")
+
+
+def make_finding(rnd, n, screenshots):
+    severity, cvss = rnd.choice(SEVERITIES)
+    steps = [{"description": sentence(rnd, 12),
+              "screenshot": rnd.choice(screenshots) if screenshots and rnd.random() < 0.8 else ""}
+             for _ in range(rnd.randrange(1, 4))]
+    return {
+        "id": f"VULN-{n:04d}",
+        "title": rnd.choice(TITLES),
+        "severity": severity,
+        "cvss": cvss,
+        "cvss_vector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H",
+        "summary": sentence(rnd, 20),
+        "description": " ".join(sentence(rnd, 25) for _ in range(3)),
+        "impact": sentence(rnd, 30),
+        "recommendation": sentence(rnd, 25),
+        "cwe": f"CWE-{rnd.randrange(20, 1000)}",
+        "url": f"https://app.example.com/{rnd.choice(TEXT)}/{n}",
+        "reference": "https://owasp.org/www-project-top-ten/",
+        "steps": steps,
+    }
+
+
+def generate(apps=50, findings=20, screenshots=40, seed=1):
+    """Fill the corpus the backend is pointed at (see use_corpus); returns the application ids."""
+    from backend.models import save_application, save_vulnerabilities
+    from backend.screenshots import screenshot_store
+    from backend.utils import prepare_uploaded_screenshot
+
+    rnd = random.Random(seed)
+    names = []
+    for i in range(screenshots):
+        raw = os.path.join(screenshot_store.incoming, f"corpus_{i}.png")
+        make_screenshot(rnd, raw)
+        names.append(screenshot_store.ingest_path(raw))   # same path as an upload
+        os.remove(raw)
+        prepare_uploaded_screenshot(names[-1])
+
+    ids = []
+    start = date(2024, 1, 1)
+    for i in range(apps):
+        app_id = f"bench-{seed}-{i:05d}"
+        day = start + timedelta(days=rnd.randrange(700))
+        save_application({
+            "id": app_id,
+            "name": f"Application {i:05d}",
+            "status": rnd.choice(STATUSES),
+            "start_date": day.isoformat(),
+            "end_date": (day + timedelta(days=14)).isoformat(),
+            "app_details": [{"name": f"Application {i:05d}", "version": "1.0", "url": "https://app.example.com"}],
+            "pentesters": [{"name": "Tester", "email": "tester@example.com"}],
+        })
+        save_vulnerabilities(app_id, [make_finding(rnd, n, names) for n in range(findings)])
+        ids.append(app_id)
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", required=True, help="directory to create the corpus in")
+    parser.add_argument("--apps", type=int, default=50)
+    parser.add_argument("--findings", type=int, default=20, help="findings per application")
+    parser.add_argument("--screenshots", type=int, default=40, help="distinct screenshots shared by the steps")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if "backend.config" in sys.modules:
+        sys.exit("backend was imported before the corpus directory was set")
+    use_corpus(args.out)
+    ids = generate(args.apps, args.findings, args.screenshots, args.seed)
+    data_dir, screenshot_dir = corpus_dirs(args.out)
+    print(f"{len(ids)} applications x {args.findings} findings, {args.screenshots} screenshots")
+    print(f"H4_DATA_DIR={data_dir} H4_SCREENSHOT_DIR={screenshot_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+HTTP load test: the development server against the production servers.
+
+    python -m benchmarks.load_test [--servers dev,gunicorn,waitress] [--clients 16] [--seconds 15]
+                                   [--apps 200] [--findings 20] [--out results.json]
+
+Builds a throwaway corpus with a benchmark login, starts each server as it
+is started in practice (python run.py; gunicorn -c gunicorn.conf.py;
+python serve.py) against it, logs in once and then has --clients
+processes request /api/applications and /dashboard over keep-alive
+connections for --seconds each. Reports requests/sec, p50/p99 latency and
+errors. Client and server share the machine, so run it on an otherwise
+idle host and compare numbers from the same host only.
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import http.client
+import subprocess
+import multiprocessing
+from urllib.parse import urlencode
+
+from benchmarks.corpus import use_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERNAME, PASSWORD = "loadtest", "loadtest-password"
+PATHS = ("/api/applications", "/dashboard")
+SERVERS = {
+    # name -> (command, port)
+    "dev": ([sys.executable, "run.py"], 5000),
+    "gunicorn": ([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"], 8001),
+    "waitress": ([sys.executable, "serve.py"], 8002),
+}
+
+
+def build_corpus(root, apps, findings):
+    """Generate the corpus in a child process so this one never imports the backend."""
+    code = ("import sys, json, bcrypt\n"
+            "from benchmarks.corpus import use_corpus, generate, corpus_dirs\n"
+            "root, apps, findings = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])\n"
+            "use_corpus(root)\n"
+            "generate(apps, findings, screenshots=5)\n"
+            "hashed = bcrypt.hashpw(sys.argv[5].encode(), bcrypt.gensalt()).decode()\n"
+            "with open(corpus_dirs(root)[0] + '/users.json', 'w') as f:\n"
+            "    json.dump({sys.argv[4]: {'username': sys.argv[4], 'password': hashed}}, f)\n")
+    subprocess.run([sys.executable, "-c", code, root, str(apps), str(findings), USERNAME, PASSWORD],
+                   cwd=ROOT, check=True)
+
+
+def start_server(name, root):
+    command, port = SERVERS[name]
+    env = dict(os.environ, H4_BIND=f"127.0.0.1:{port}")
+    use_corpus(root)   # sets H4_DATA_DIR / H4_SCREENSHOT_DIR for the child
+    env.update(H4_DATA_DIR=os.environ["H4_DATA_DIR"], H4_SCREENSHOT_DIR=os.environ["H4_SCREENSHOT_DIR"])
+    log = open(os.path.join(root, f"{name}.log"), "w")
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{name} exited with {proc.returncode}; see {log.name}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/login")
+            if conn.getresponse().status == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    stop_server(proc)
+    raise RuntimeError(f"{name} did not come up on port {port}")
+
+
+def stop_server(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=90)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def login(port):
+    """Session cookie for the benchmark user."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("GET", "/login")
+    response = conn.getresponse()
+    page = response.read().decode()
+    cookie = response.getheader("Set-Cookie").split(";", 1)[0]
+    token = re.search(r'name="csrf_token"[^>]*value="([^"]+)"', page).group(1)
+    body = urlencode({"csrf_token": token, "username": USERNAME, "password": PASSWORD})
+    conn.request("POST", "/login", body=body, headers={
+        "Cookie": cookie, "Content-Type": "application/x-www-form-urlencoded"})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 302:
+        raise RuntimeError(f"login failed with HTTP {response.status}")
+    return response.getheader("Set-Cookie").split(";", 1)[0]
+
+
+def client(port, path, cookie, seconds):
+    """One keep-alive client hammering path; returns (latencies in ms, errors)."""
+    latencies, errors = [], 0
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path, headers={"Cookie": cookie})
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                latencies.append((time.perf_counter() - t0) * 1000)
+            else:
+                errors += 1
+            if response.will_close:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+    return latencies, errors
+
+
+def load(port, path, cookie, clients, seconds):
+    with multiprocessing.Pool(clients) as pool:
+        t0 = time.perf_counter()
+        outcomes = pool.starmap(client, [(port, path, cookie, seconds)] * clients)
+        elapsed = time.perf_counter() - t0
+    latencies = sorted(ms for lat, _ in outcomes for ms in lat)
+    errors = sum(e for _, e in outcomes)
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 2) if latencies else None
+    return {"requests": len(latencies), "errors": errors, "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": pick(0.50), "p99_ms": pick(0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--servers", default="dev,gunicorn,waitress")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent keep-alive clients")
+    parser.add_argument("--seconds", type=float, default=15, help="duration per server and path")
+    parser.add_argument("--apps", type=int, default=200)
+    parser.add_argument("--findings", type=int, default=20)
+    parser.add_argument("--out", help="write the results as JSON here")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="h4_load_")
+    results = {"meta": {"clients": args.clients, "seconds": args.seconds, "apps": args.apps,
+                        "findings": args.findings, "cpus": os.cpu_count()}, "results": {}}
+    try:
+        build_corpus(root, args.apps, args.findings)
+        for name in args.servers.split(","):
+            proc, port = start_server(name, root)
+            try:
+                cookie = login(port)
+                for path in PATHS:
+                    load(port, path, cookie, args.clients, min(2.0, args.seconds))   # warm-up
+                    outcome = results["results"].setdefault(name, {})[path] = load(
+                        port, path, cookie, args.clients, args.seconds)
+                    print(f"{name:<10} {path:<20} {outcome['rps']:>8.1f} req/s   p50 {outcome['p50_ms']} ms"
+                          f"   p99 {outcome['p99_ms']} ms   errors {outcome['errors']}")
+            finally:
+                stop_server(proc)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
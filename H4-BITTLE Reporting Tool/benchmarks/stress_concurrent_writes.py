@@ -0,0 +1,124 @@
+"""
+Multi-process stress test for the models write path: no lost updates.
+
+    python -m benchmarks.stress_concurrent_writes [--procs 8] [--ops 50] [--backend json|sqlite]
+
+Runs against a throwaway data tree (H4_DATA_DIR). Every process, at once:
+  - appends --ops findings with save_vulnerability (no revision, must all survive),
+  - adds --ops findings through the granular apply_finding_op path,
+  - increments a counter on the application with optimistic revisions,
+    retrying on ConflictError,
+  - increments a counter inside the findings list the same way.
+Afterwards every counter and every appended finding must be present, the
+revisions must add up, and the dashboard summary and the search index
+must match the stored list.
+Exits non-zero on any lost update.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+APP_ID = "stress-app"
+
+
+def worker(proc, ops, result_queue):
+    from backend.models import (
+        get_application, save_application, save_vulnerability, save_vulnerabilities,
+        load_vulnerabilities_with_revision, apply_finding_op, ConflictError,
+    )
+    conflicts = 0
+    for i in range(ops):
+        save_vulnerability(APP_ID, {"id": f"P{proc}-{i}", "title": f"Finding {proc}/{i}", "severity": "Low"})
+        apply_finding_op(APP_ID, {"op": "add", "finding": {"id": f"G{proc}-{i}", "title": "Granular", "severity": "Info"}})
+
+        while True:
+            app = get_application(APP_ID)
+            app["counter"] = app.get("counter", 0) + 1
+            try:
+                save_application(app, expected_revision=app["revision"])
+                break
+            except ConflictError:
+                conflicts += 1
+
+        while True:
+            revision, vulns = load_vulnerabilities_with_revision(APP_ID)
+            vulns[0] = dict(vulns[0], hits=vulns[0].get("hits", 0) + 1)
+            try:
+                save_vulnerabilities(APP_ID, vulns, expected_revision=revision)
+                break
+            except ConflictError:
+                conflicts += 1
+    result_queue.put(conflicts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--procs", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=50)
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="h4_stress_")
+    os.environ["H4_DATA_DIR"] = root   # inherited by the spawned workers
+    os.environ["H4_STORAGE_BACKEND"] = args.backend
+    try:
+        from backend.models import (
+            save_application, save_vulnerabilities, get_application,
+            load_vulnerabilities_with_revision, vulnerabilities_summary, repository, VULNS_DIR,
+            get_search_index,
+        )
+        save_application({"id": APP_ID, "name": "Stress", "status": "in-progress", "counter": 0})
+        save_vulnerabilities(APP_ID, [{"id": "seed", "title": "Seed", "severity": "High", "hits": 0}])
+
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        procs = [ctx.Process(target=worker, args=(p, args.ops, results)) for p in range(args.procs)]
+        t0 = time.perf_counter()
+        for p in procs:
+            p.start()
+        conflicts = sum(results.get() for _ in procs)
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - t0
+
+        repository.clear()
+        expected = args.procs * args.ops
+        app = get_application(APP_ID)
+        revision, vulns = load_vulnerabilities_with_revision(APP_ID)
+        if args.backend == "json":
+            with open(os.path.join(VULNS_DIR, f"{APP_ID}.json")) as f:
+                json.load(f)   # the base file must still be complete, parseable JSON
+        appended = {v["id"] for v in vulns if v["id"].startswith("P")}
+        granular = {v["id"] for v in vulns if v["id"].startswith("G")}
+
+        checks = {
+            "application counter": (app["counter"], expected),
+            "application revision": (app["revision"], 1 + expected),
+            "findings appended": (len(appended), expected),
+            "findings added granularly": (len(granular), expected),
+            "findings stored": (len(vulns), 1 + 2 * expected),
+            "findings counter": (vulns[0].get("hits"), expected),
+            "findings revision": (revision, 1 + 3 * expected),
+            "summary total": (vulnerabilities_summary()["total"], 1 + 2 * expected),
+            "search index": (get_search_index()._conn().execute(
+                "SELECT COUNT(*) FROM entries WHERE kind = 'finding' AND app_id = ?", (APP_ID,)).fetchone()[0],
+                1 + 2 * expected),
+        }
+        print(f"[{args.backend}] {args.procs} processes x {args.ops} ops in {elapsed:.1f} s, {conflicts} conflicts retried")
+        failed = False
+        for name, (got, want) in checks.items():
+            ok = got == want
+            failed |= not ok
+            print(f"  {'ok  ' if ok else 'FAIL'} {name}: {got} (expected {want})")
+        sys.exit(1 if failed else 0)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Hot-path benchmark suite over a generated corpus, with regression checks.
+
+    python -m benchmarks.suite run [--apps 200] [--findings 20] [--screenshots 40] [--repeat 5]
+                                   [--log-entries 200000] [--out results.json] [--baseline old.json]
+    python -m benchmarks.suite compare old.json new.json [--threshold 0.25]
+
+`run` builds a throwaway corpus (benchmarks/corpus.py), times each hot path
+and writes the medians as JSON. With --baseline (or `compare`) every
+benchmark whose median got more than --threshold slower than the baseline
+is flagged and the command exits non-zero. Compare runs made with the same
+corpus parameters on the same machine.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+from benchmarks.corpus import use_corpus, generate
+
+DEFAULT_THRESHOLD = 0.25   # flag medians more than 25% slower than the baseline
+NOISE_FLOOR_MS = 0.5       # ...unless they moved by less than this
+
+
+def measure(fn, repeat, setup=None):
+    """Run fn `repeat` times (after one untimed warm-up) and return the samples in ms."""
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def summarize(samples):
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "samples": len(samples),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ------------------------------ BENCHMARKS ------------------------------
+
+def benchmarks(app_ids, args, root):
+    """(name, fn, setup or None) for every hot path; imported late so the corpus env applies."""
+    from backend import models, utils
+    from backend.app import app
+    from backend.audit import audit_log
+
+    app.config.update(LOGIN_DISABLED=True, WTF_CSRF_ENABLED=False, TESTING=True)
+    client = app.test_client()
+    target = app_ids[len(app_ids) // 2]
+
+    # Exports go to a private artifact cache that "cold" runs empty first
+    utils.artifact_store.directory = os.path.join(root, "artifacts")
+    os.makedirs(utils.artifact_store.directory, exist_ok=True)
+
+    def clear_artifacts():
+        shutil.rmtree(utils.artifact_store.directory, ignore_errors=True)
+        os.makedirs(utils.artifact_store.directory)
+
+    def cold_repository():
+        if models.get_storage().name == "json":
+            models.repository.clear()
+
+    def get(url):
+        def fn():
+            response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        return fn
+
+    def update_findings():
+        revision, vulns = models.load_vulnerabilities_with_revision(target)
+        vulns[0]["title"] = f"Edited {time.perf_counter()}"
+        response = client.post(f"/applications/{target}/vulnerabilities/update",
+                               data={"vulnerabilities": json.dumps(vulns), "revision": str(revision)})
+        assert response.status_code == 200, response.get_json()
+
+    def log_actions():
+        for i in range(1000):
+            utils.log_action(f"Benchmark action {i}")
+        audit_log.flush()
+
+    print(f"Filling the audit log with {args.log_entries} entries...")
+    for i in range(args.log_entries):
+        audit_log.append({"timestamp": datetime.utcnow().isoformat(), "action": f"Seed entry {i}"})
+    audit_log.flush()
+
+    return [
+        ("load_applications", lambda: models.load_applications(), None),
+        ("load_applications (cold cache)", lambda: models.load_applications(), cold_repository),
+        ("GET /api/applications_summary", get("/api/applications_summary"), None),
+        ("GET /api/vulnerabilities_summary", get("/api/vulnerabilities_summary"), None),
+        (f"log_action x1000 ({args.log_entries} logged)", log_actions, None),
+        ("generate_word_report", lambda: utils.generate_word_report(target), clear_artifacts),
+        ("generate_word_report (cached)", lambda: utils.generate_word_report(target), None),
+        ("generate_excel_report", lambda: utils.generate_excel_report(target), clear_artifacts),
+        ("generate_excel_report (cached)", lambda: utils.generate_excel_report(target), None),
+        ("POST /applications/<id>/vulnerabilities/update", update_findings, None),
+    ]
+
+
+def run(args):
+    root = tempfile.mkdtemp(prefix="h4_suite_")
+    try:
+        use_corpus(root)
+        os.environ["H4_STORAGE_BACKEND"] = args.backend
+        t0 = time.perf_counter()
+        app_ids = generate(args.apps, args.findings, args.screenshots, args.seed)
+        print(f"Corpus: {args.apps} applications x {args.findings} findings, {args.screenshots} screenshots "
+              f"({time.perf_counter() - t0:.1f} s)")
+
+        results = {}
+        for name, fn, setup in benchmarks(app_ids, args, root):
+            results[name] = summarize(measure(fn, args.repeat, setup))
+            print(f"  {name:<55} {results[name]['median_ms']:>10.2f} ms")
+    finally:
+        if "backend.audit" in sys.modules:
+            sys.modules["backend.audit"].audit_log.flush()   # before its directory goes away
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "corpus": {"apps": args.apps, "findings": args.findings, "screenshots": args.screenshots,
+                       "seed": args.seed, "log_entries": args.log_entries, "backend": args.backend},
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+# ------------------------------ COMPARE ------------------------------
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Print old vs new medians; returns the names that regressed."""
+    if baseline.get("meta", {}).get("corpus") != current.get("meta", {}).get("corpus"):
+        print("warning: the runs used different corpus parameters")
+    regressions = []
+    print(f"{'benchmark':<55} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<55} {'-':>10} {new['median_ms']:>10.2f}      new")
+            continue
+        change = new["median_ms"] / old["median_ms"] - 1 if old["median_ms"] else 0.0
+        regressed = change > threshold and new["median_ms"] - old["median_ms"] > NOISE_FLOOR_MS
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<55} {old['median_ms']:>10.2f} {new['median_ms']:>10.2f} {change:>+7.0%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    for name in baseline["results"].keys() - current["results"].keys():
+        print(f"{name:<55} missing from the current run")
+    return regressions
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run", help="build a corpus and time the hot paths")
+    run_p.add_argument("--apps", type=int, default=200)
+    run_p.add_argument("--findings", type=int, default=20)
+    run_p.add_argument("--screenshots", type=int, default=40)
+    run_p.add_argument("--seed", type=int, default=1)
+    run_p.add_argument("--log-entries", type=int, default=200000, help="audit entries logged before timing log_action")
+    run_p.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    run_p.add_argument("--repeat", type=int, default=5)
+    run_p.add_argument("--out", help="write the results JSON here")
+    run_p.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    run_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    cmp_p = sub.add_parser("compare", help="compare two results files")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        baseline, current = _load(args.baseline), _load(args.current)
+    else:
+        if "backend.config" in sys.modules:
+            sys.exit("backend was imported before the corpus directory was set")
+        current = run(args)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=2)
+            print("Results written to", args.out)
+        if not args.baseline:
+            return
+        baseline = _load(args.baseline)
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
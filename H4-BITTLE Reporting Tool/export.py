@@ -1,23 +1,28 @@
-from backend.utils import generate_word_report
-import os
+"""
+Export one application's report and show where the time went.
 
-app_id = "200869fb-d1ac-4660-837e-15b61848c61a"
+    python export.py <app_id> [--excel] [--profile]
 
-# Check file existence before calling the function
-print("\n[DEBUG] File existence check:")
-template_path = "backend/templates/report_template.docx"
-app_file = f"backend/data/applications/app_{app_id}.json"
-vuln_file = f"backend/data/vulnerabilities/{app_id}.json"
+Prints the export's per-stage wall/CPU times, image counts and bytes,
+memory and output size as JSON. --profile also runs it under cProfile and
+writes exports/profiles/<kind>_<app_id>_<time>.prof (plus a .txt summary).
+"""
+import json
+import argparse
 
-print(f"Template file exists: {os.path.exists(template_path)} → {template_path}")
-print(f"App JSON exists: {os.path.exists(app_file)} → {app_file}")
-print(f"Vuln JSON exists: {os.path.exists(vuln_file)} → {vuln_file}")
+from backend.profiling import ExportStats
+from backend.utils import generate_word_report, generate_excel_report
 
-print("\n[DEBUG] Running generate_word_report...\n")
-try:
-    path = generate_word_report(app_id)
-    print("Report path:", path)
-except Exception as e:
-    import traceback
-    print("[ERROR] Failed to generate report:")
-    traceback.print_exc()
+parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+parser.add_argument("app_id")
+parser.add_argument("--excel", action="store_true", help="export the Excel workbook instead of the Word report")
+parser.add_argument("--profile", action="store_true", help="dump a cProfile of the export")
+args = parser.parse_args()
+
+kind = "excel" if args.excel else "word"
+generate = generate_excel_report if args.excel else generate_word_report
+stats = ExportStats(kind, args.app_id)
+path = generate(args.app_id, stats=stats, profile=args.profile)
+print(json.dumps(stats.report(), indent=2, default=str))
+if not path:
+    raise SystemExit(f"No report: application {args.app_id} or its template was not found")
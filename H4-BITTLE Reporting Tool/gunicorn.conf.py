@@ -0,0 +1,34 @@
+# gunicorn -c gunicorn.conf.py
+#
+#   H4_BIND      address to listen on (default 127.0.0.1:8000; put a TLS proxy in front)
+#   H4_WORKERS   worker processes (default 2 x CPUs + 1, at most 8)
+#   H4_THREADS   threads per worker (default 4)
+#
+# The app is loaded once in the master (preload_app) and forked, so data,
+# templates and the template catalogue are parsed once and shared
+# copy-on-write. Requests are short and mostly I/O bound, so each worker
+# runs a few threads; exports go to background jobs and do not tie up a
+# request thread.
+import os
+
+from backend.audit import audit_log
+
+wsgi_app = "wsgi:application"
+bind = os.environ.get("H4_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("H4_WORKERS") or min(2 * (os.cpu_count() or 1) + 1, 8))
+worker_class = "gthread"
+threads = int(os.environ.get("H4_THREADS") or 4)
+preload_app = True
+
+timeout = 120               # synchronous exports (/export/word/<id>) can take a while on big reports
+graceful_timeout = 60       # time a stopping worker gets to finish requests and running export jobs
+keepalive = 5
+max_requests = 0            # no periodic recycling: it would drop the warm caches
+
+def pre_fork(server, worker):
+    # Nothing buffered in the master may be copied into (and written by) every worker
+    audit_log.flush()
+
+def worker_exit(server, worker):
+    from backend.tasks import shutdown
+    shutdown()
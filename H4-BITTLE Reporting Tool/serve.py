@@ -0,0 +1,20 @@
+# Production server without gunicorn (e.g. on Windows): python serve.py
+# Uses H4_BIND (default 127.0.0.1:8000) and H4_THREADS (default 8) in one process.
+import os
+import sys
+import signal
+
+from waitress import serve
+
+from wsgi import application
+from backend.tasks import shutdown
+
+if __name__ == "__main__":
+    # SIGTERM (service stop, docker stop) unwinds through the finally below
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    host, _, port = os.environ.get("H4_BIND", "127.0.0.1:8000").rpartition(":")
+    try:
+        serve(application, host=host or "127.0.0.1", port=int(port),
+              threads=int(os.environ.get("H4_THREADS") or 8), ident="H4-BITTLE")
+    finally:
+        shutdown()
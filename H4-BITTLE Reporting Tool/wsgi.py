@@ -0,0 +1,6 @@
+# Production entry point: gunicorn -c gunicorn.conf.py (Linux/macOS) or
+# python serve.py (waitress, also on Windows). run.py is the development server.
+from backend.app import app, warm_up
+
+warm_up()
+application = app